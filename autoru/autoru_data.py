@@ -1,17 +1,98 @@
-import json
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
+import re
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from extraction import Field
+from embedded_state import json_ld, number_text
+from site_parser import SiteParser, SiteSpec
+from html_cache import DEFAULT_CACHE_DIR
+from driver_pool import USER_AGENT, DEFAULT_POOL_SIZE, DEFAULT_MAX_PAGES
+
+CHROME_ARGUMENTS = [
+    "--disable-blink-features=AutomationControlled",
+    "--headless",
+    f"user-agent={USER_AGENT}",
+]
+
+DETAIL_LINK_PATTERN = re.compile(r"auto\.ru/cars/used/sale/")
+
+# Абсолютные пути старой верстки карточки; используются, только если
+# не сработали селекторы по классам блоков
+CARD_PATH = "/html/body/div[1]/div/div[2]/div[3]/div/div[2]/div/div[2]/div/div[2]"
+INFO_PATH = CARD_PATH + "/div[5]/div[1]/div[2]/ul[1]"
+
+AUTORU = SiteParser(SiteSpec(
+    name="autoru",
+    chrome_arguments=CHROME_ARGUMENTS,
+    detail_link_pattern=DETAIL_LINK_PATTERN,
+    wait_locator=(By.XPATH, "//h1[@class='CardHead__title']"),
+    fields=[
+        Field("title", "//h1[@class='CardHead__title']"),
+        Field("price", ["css:.OfferPriceCaption__price",
+                        f"{CARD_PATH}/div[1]/div[1]/div[2]/div/div[1]/span/span"],
+              state=json_ld("offers.price", lambda value: f"{number_text(value, grouped=True)} ₽")),
+        Field("description", ["css:.CardDescriptionHTML",
+                              f"{CARD_PATH}/div[7]/div[2]/div/div[1]/div/div/span"],
+              state=json_ld("description")),
+        Field("engine_type", ["//li[contains(@class, 'CardInfoRow_engine')]/div[2]/div",
+                              f"{INFO_PATH}/li[7]/div[2]/div"]),
+        Field("body_type", ["//li[contains(@class, 'CardInfoRow_bodytype')]/div[2]/a",
+                            f"{INFO_PATH}/li[5]/div[2]/a"],
+              state=json_ld("bodyType")),
+        Field("drive_type", ["//li[contains(@class, 'CardInfoRow_drive')]/div[2]",
+                             f"{INFO_PATH}/li[11]/div[2]"]),
+        Field("transmission", ["//li[contains(@class, 'CardInfoRow_transmission')]/div[2]",
+                               f"{INFO_PATH}/li[10]/div[2]"]),
+        Field("mileage", ["//li[contains(@class, 'CardInfoRow_kmAge')]/div[2]",
+                          f"{INFO_PATH}/li[4]/div[2]"],
+              state=json_ld("mileageFromOdometer.value", lambda value: f"{number_text(value, grouped=True)} км")),
+        Field("location", "css:.MetroListPlace__regionName"),
+        Field("publication_date", ["css:.CardHead__creationDate",
+                                   f"{CARD_PATH}/div[1]/div[1]/div[1]/div/div[1]"]),
+    ],
+))
+
+
+def extract_autoru_record(html, link):
+    """Извлекает запись объявления auto.ru из HTML-снимка страницы.
+
+    Цена, описание, кузов и пробег берутся из разметки JSON-LD страницы,
+    остальные поля и запасной путь извлекаются из DOM.
 
+    Args:
+        html (str): Исходный код страницы объявления.
+        link (str): Ссылка на объявление.
+
+    Returns:
+        dict: Запись с полями объявления в формате autoru_data.json.
+    """
+    return AUTORU.extract_record(html, link)
+
+
+def parse_autoru_page(driver, link):
+    """Загружает страницу объявления auto.ru и извлекает из нее запись.
+
+    Страница считается загруженной, когда появился заголовок объявления
+    (wait_locator описания сайта); исходный код забирается из браузера один раз,
+    все поля извлекаются локально (см. extract_autoru_record).
+
+    Args:
+        driver (selenium.webdriver.Remote): Драйвер, выданный пулом.
+        link (str): Ссылка на объявление.
+
+    Returns:
+        dict: Запись с полями объявления в формате autoru_data.json.
+
+    Raises:
+        TimeoutException: Если заголовок объявления не загрузился.
+    """
+    return AUTORU.parse_page(driver, link)
 
-def parse_autoru_data():
+
+def parse_autoru_data(pool_size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES, skip_links=None,
+                      links=None, on_record=None, data_path="autoru_data.json"):
     """Парсит детальную информацию об автомобилях с сайта по сохраненным ссылкам.
 
-    Функция загружает список ссылок из файла json, последовательно посещает
-    каждую страницу с объявлением и извлекает следующие данные:
+    Функция загружает список ссылок из файла json, параллельно посещает
+    страницы с объявлениями через пул браузеров и извлекает следующие данные:
     - Название автомобиля
     - Цену
     - Описание
@@ -25,7 +106,17 @@ def parse_autoru_data():
     - Ссылку на объявление
 
     Args:
-        Нет аргументов.
+        pool_size (int): Число одновременно работающих браузеров.
+        max_pages (int): Число страниц, после которого браузер перезапускается.
+        skip_links (set[str], optional): Ссылки, которые не нужно загружать повторно
+            (инкрементальный режим).
+        links (iterable[str], optional): Ссылки для обработки вместо autoru_links.json,
+            например поток ссылок от работающего сборщика (см. pipeline.LinkStream).
+        on_record (callable, optional): Функция, получающая каждую новую запись сразу
+            после извлечения (см. stream_loader).
+        data_path (str): Итоговый файл; контрольная точка ведется рядом в файле .jsonl.
+            Отдельные пути позволяют нескольким процессам парсить свои части
+            списка ссылок (см. sharding).
 
     Returns:
         None: Функция не возвращает значений, но сохраняет результаты в файл.
@@ -37,9 +128,17 @@ def parse_autoru_data():
         Exception: Другие возможные исключения при парсинге.
 
     Notes:
-        - Использует headless-режим браузера Chrome.
-        - Добавляет задержки между запросами для имитации человеческого поведения.
+        - Использует пул headless-браузеров Chrome (см. driver_pool.DriverPool)
+          с облегченным профилем загрузки (см. driver_profile).
+        - Частота запросов регулируется адаптивным ограничителем домена (см. rate_limiter).
+        - Забирает исходный код страницы один раз и извлекает поля локально (см. extraction).
+        - Поля сначала читаются из встроенного в страницу JSON-состояния
+          (см. embedded_state), DOM используется как запасной путь.
+        - Страницы сохраняются в кэш (см. html_cache); если свежая копия уже есть,
+          поля извлекаются из нее без обращения к сети.
         - Обрабатывает случаи отсутствия данных, заменяя их на "Не указано".
+        - Каждая запись сразу дописывается в контрольную точку autoru_data.jsonl;
+          при повторном запуске уже обработанные ссылки пропускаются.
         - Сохраняет данные в формате JSON с сохранением кириллических символов.
 
     Examples:
@@ -48,110 +147,31 @@ def parse_autoru_data():
         Обработка: https://auto.ru/cars/used/sale/.../
         Данные сохранены в json
     """
-    service = ChromeService(executable_path="C:/chromedriver-win64/chromedriver.exe")
-    options = webdriver.ChromeOptions()
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--headless")
-    options.add_argument(
-        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    )
-
-    driver = webdriver.Chrome(service=service, options=options)
-
-    with open("autoru_links.json", "r", encoding="utf-8") as f:
-        links = json.load(f)
-
-    cars_data = []
-
-    for link in links:
-        print(f"Обработка: {link}")
-        try:
-            driver.get(link)
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "//h1[@class='CardHead__title']")))
-            time.sleep(1)
-
-            try:
-                title = driver.find_element(By.XPATH, "//h1[@class='CardHead__title']").text.strip()
-            except:
-                title = "Не указано"
-
-            try:
-                price = driver.find_element(By.XPATH,
-                                            "/html/body/div[1]/div/div[2]/div[3]/div/div[2]/div/div[2]/div/div[2]/div[1]/div[1]/div[2]/div/div[1]/span/span").text.strip()
-            except:
-                price = "Не указано"
-
-            try:
-                description = driver.find_element(By.XPATH,
-                                                  "/html/body/div[1]/div/div[2]/div[3]/div/div[2]/div/div[2]/div/div[2]/div[7]/div[2]/div/div[1]/div/div/span").text.strip()
-            except:
-                description = "Не указано"
-
-            try:
-                engine_type = driver.find_element(By.XPATH,
-                                                  "/html/body/div[1]/div/div[2]/div[3]/div/div[2]/div/div[2]/div/div[2]/div[5]/div[1]/div[2]/ul[1]/li[7]/div[2]/div").text.strip()
-            except:
-                engine_type = "Не указано"
-
-            try:
-                body_type = driver.find_element(By.XPATH,
-                                                "/html/body/div[1]/div/div[2]/div[3]/div/div[2]/div/div[2]/div/div[2]/div[5]/div[1]/div[2]/ul[1]/li[5]/div[2]/a").text.strip()
-            except:
-                body_type = "Не указано"
-
-            try:
-                transmission = driver.find_element(By.XPATH,
-                                                   "/html/body/div[1]/div/div[2]/div[3]/div/div[2]/div/div[2]/div/div[2]/div[5]/div[1]/div[2]/ul[1]/li[10]/div[2]").text.strip()
-            except:
-                transmission = "Не указано"
-
-            try:
-                drive_type = driver.find_element(By.XPATH,
-                                                 "/html/body/div[1]/div/div[2]/div[3]/div/div[2]/div/div[2]/div/div[2]/div[5]/div[1]/div[2]/ul[1]/li[11]/div[2]").text.strip()
-            except:
-                drive_type = "Не указано"
-
-            try:
-                mileage = driver.find_element(By.XPATH,
-                                              "/html/body/div[1]/div/div[2]/div[3]/div/div[2]/div/div[2]/div/div[2]/div[5]/div[1]/div[2]/ul[1]/li[4]/div[2]").text.strip()
-            except:
-                mileage = "Не указано"
-
-            try:
-                location = driver.find_element(By.CLASS_NAME, "MetroListPlace__regionName").text.strip()
-            except:
-                location = "Не указано"
-
-            try:
-                date_public = driver.find_element(By.XPATH,
-                                                  "/html/body/div[1]/div/div[2]/div[3]/div/div[2]/div/div[2]/div/div[2]/div[1]/div[1]/div[1]/div/div[1]").text.strip()
-            except:
-                date_public = "Не указано"
-
-            cars_data.append({
-                "title": title,
-                "price": price,
-                "description": description,
-                "engine_type": engine_type,
-                "body_type": body_type,
-                "drive_type": drive_type,
-                "transmission": transmission,
-                "mileage": mileage,
-                "location": location,
-                "publication_date": date_public,
-                "link": link
-            })
-
-            time.sleep(1)
-
-        except Exception as e:
-            print(f"Ошибка: {str(e)}")
-            continue
-
-    driver.quit()
-
-    with open("autoru_data.json", "w", encoding="utf-8") as f:
-        json.dump(cars_data, f, ensure_ascii=False, indent=4)
-
-    print("Данные сохранены в autoru_data.json")
\ No newline at end of file
+    AUTORU.parse_data(parse_autoru_page, pool_size=pool_size, max_pages=max_pages, skip_links=skip_links,
+                      links=links, on_record=on_record, data_path=data_path)
+
+
+def replay_autoru_data(source=DEFAULT_CACHE_DIR, workers=None):
+    """Повторно извлекает данные из архивных страниц объявлений без обращения к сети.
+
+    Применяет extract_autoru_record ко всем сохраненным страницам объявлений
+    autoru из кэша страниц или каталога архивных HTML-файлов параллельно на
+    всех ядрах процессора и сохраняет результат в тех же файлах, что и
+    parse_autoru_data.
+
+    Args:
+        source (str): Каталог кэша страниц (см. html_cache) или архива HTML-файлов.
+        workers (int, optional): Число процессов; по умолчанию число CPU.
+
+    Returns:
+        int: Количество извлеченных записей.
+
+    Examples:
+        >>> replay_autoru_data("html_cache")
+        Повторно извлечено 300 записей, данные сохранены в autoru_data.json
+    """
+    return AUTORU.replay(extract_autoru_record, source, workers)
+
+
+if __name__ == "__main__":
+    parse_autoru_data()
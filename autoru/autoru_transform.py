@@ -40,6 +40,49 @@ def extract_publication(publication_date):
     publication_date = publication_date.replace(' ', ':')
     return publication_date
 
+def transform_autoru_frame(autoru_df):
+    """Преобразует и очищает сырые записи объявлений autoru.
+
+    Выполняет те же преобразования, что и transform_autoru_data, но над
+    переданным DataFrame, поэтому подходит и для всего файла, и для
+    небольших пачек записей, получаемых во время парсинга (см. stream_loader).
+
+    Args:
+        autoru_df (pandas.DataFrame): Записи в формате autoru_data.json.
+
+    Returns:
+        pandas.DataFrame: Очищенный DataFrame (см. transform_autoru_data).
+    """
+    autoru_df[['brand', 'model', 'year']] = pd.DataFrame(autoru_df['title'].apply(extract_car_info).tolist(),
+                                                          index=autoru_df.index, columns=['brand', 'model', 'year'])
+    autoru_df['price'] = autoru_df['price'].str.replace(' ', '').str.rstrip('₽').astype(int)
+    autoru_df['engine_type'] = autoru_df['engine_type'].str.replace(' ', '')
+    autoru_df[['engine_volume', 'power', 'engine_type']] = pd.DataFrame(
+        autoru_df['engine_type'].apply(extract_engine).tolist(), index=autoru_df.index,
+        columns=['engine_volume', 'power', 'engine_type'])
+    autoru_df['body_type'] = autoru_df['body_type'].str.split().str[0]
+    autoru_df['drive_type'] = autoru_df['drive_type'].apply(val_drive_type)
+    autoru_df['transmission'] = autoru_df['transmission'].apply(transform_transmission)
+    autoru_df['publication_date'] = autoru_df['publication_date'].apply(extract_publication)
+    autoru_df['publication_date'] = pd.to_datetime(autoru_df['publication_date'], format='%d:%m:%Y', errors='coerce')
+
+    autoru_df = autoru_df.dropna(subset=['engine_type', 'drive_type'])
+    autoru_df = autoru_df.reset_index(drop=True)
+    autoru_df['power'] = autoru_df['power'].astype(int)
+    autoru_df.columns = autoru_df.columns.str.lower()
+    for col in autoru_df.columns:
+        if col != 'link':
+            autoru_df[col] = autoru_df[col].apply(lambda x: x.lower() if isinstance(x, str) else x)
+    autoru_df['mileage'] = autoru_df['mileage'].str.replace(' ', '').str.replace(r'[^0-9]', '', regex=True).astype(int)
+    autoru_df = autoru_df.drop(columns=['title', 'power'])
+
+    # print(autoru_df[['brand', 'model', 'year', 'price']])
+    # print(autoru_df[['engine_volume', 'engine_type', 'body_type']])
+    # print(autoru_df[['drive_type', 'transmission', 'publication_date', 'location', 'mileage']])
+    # print(autoru_df[['description', 'link']])
+    # print(autoru_df.dtypes)
+    return autoru_df
+
 def transform_autoru_data():
     """Преобразует и очищает данные об автомобилях из файла json.
 
@@ -87,32 +130,4 @@ def transform_autoru_data():
                'publication_date', 'description', 'link'],
               dtype='object')
     """
-    autoru_df = pd.read_json('autoru_data.json')
-
-    autoru_df[['brand', 'model', 'year']] = autoru_df['title'].apply(extract_car_info).apply(pd.Series)
-    autoru_df['price'] = autoru_df['price'].str.replace(' ', '').str.rstrip('₽').astype(int)
-    autoru_df['engine_type'] = autoru_df['engine_type'].str.replace(' ', '')
-    autoru_df[['engine_volume', 'power', 'engine_type']] = autoru_df['engine_type'].apply(extract_engine).apply(
-        pd.Series)
-    autoru_df['body_type'] = autoru_df['body_type'].str.split().str[0]
-    autoru_df['drive_type'] = autoru_df['drive_type'].apply(val_drive_type).apply(pd.Series)
-    autoru_df['transmission'] = autoru_df['transmission'].apply(transform_transmission).apply(pd.Series)
-    autoru_df['publication_date'] = autoru_df['publication_date'].apply(extract_publication).apply(pd.Series)
-    autoru_df['publication_date'] = pd.to_datetime(autoru_df['publication_date'], format='%d:%m:%Y', errors='coerce')
-
-    autoru_df = autoru_df.dropna(subset=['engine_type', 'drive_type'])
-    autoru_df = autoru_df.reset_index(drop=True)
-    autoru_df['power'] = autoru_df['power'].astype(int)
-    autoru_df.columns = autoru_df.columns.str.lower()
-    for col in autoru_df.columns:
-        if col != 'link':
-            autoru_df[col] = autoru_df[col].apply(lambda x: x.lower() if isinstance(x, str) else x)
-    autoru_df['mileage'] = autoru_df['mileage'].str.replace(' ', '').str.replace(r'[^0-9]', '', regex=True).astype(int)
-    autoru_df = autoru_df.drop(columns=['title', 'power'])
-
-    # print(autoru_df[['brand', 'model', 'year', 'price']])
-    # print(autoru_df[['engine_volume', 'engine_type', 'body_type']])
-    # print(autoru_df[['drive_type', 'transmission', 'publication_date', 'location', 'mileage']])
-    # print(autoru_df[['description', 'link']])
-    # print(autoru_df.dtypes)
-    return autoru_df
\ No newline at end of file
+    return transform_autoru_frame(pd.read_json('autoru_data.json'))
\ No newline at end of file
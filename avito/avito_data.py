@@ -1,18 +1,84 @@
-import json
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
+import re
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from extraction import Field, strip_label
+from embedded_state import json_ld, number_text
+from site_parser import SiteParser, SiteSpec
+from html_cache import DEFAULT_CACHE_DIR
+from driver_pool import DEFAULT_POOL_SIZE, DEFAULT_MAX_PAGES
+
+CHROME_ARGUMENTS = [
+    "--headless",
+    "--disable-gpu",
+    "--no-sandbox",
+]
+
+DETAIL_LINK_PATTERN = re.compile(r"avito\.ru/.+/avtomobili/.+_\d+")
+
+
+AVITO = SiteParser(SiteSpec(
+    name="avito",
+    chrome_arguments=CHROME_ARGUMENTS,
+    detail_link_pattern=DETAIL_LINK_PATTERN,
+    wait_locator=(By.XPATH, "//h1[@itemprop='name']"),
+    wait_timeout=5,
+    fields=[
+        Field("title", "//h1[@itemprop='name']"),
+        Field("price", ["//span[@itemprop='price']/@content",
+                        "//span[@data-marker='item-view/item-price']"],
+              post=lambda value: value.replace(" ", ""), state=json_ld("offers.price", number_text)),
+        Field("description", "//div[@data-marker='item-view/item-description']", state=json_ld("description")),
+        Field("engine_type", "//li[contains(., 'Тип двигателя:')]", post=strip_label("Тип двигателя:")),
+        Field("body_type", "//li[contains(., 'Тип кузова:')]", post=strip_label("Тип кузова:")),
+        Field("drive_type", "//li[contains(., 'Привод:')]", post=strip_label("Привод:")),
+        Field("transmission", "//li[contains(., 'Коробка передач:')]", post=strip_label("Коробка передач:")),
+        Field("location", "/html/body/div[1]/div/div[4]/div[1]/div/div[2]/div[3]/div/div[1]/div/div[2]/div[4]/div/div[1]/div[1]/div/span"),
+        Field("publication_date", "//span[@data-marker='item-view/item-date']"),
+    ],
+))
+
+
+def extract_avito_record(html, link):
+    """Извлекает запись объявления avito.ru из HTML-снимка страницы.
+
+    Цена и описание берутся из разметки JSON-LD страницы, остальные поля
+    и запасной путь извлекаются из DOM.
 
+    Args:
+        html (str): Исходный код страницы объявления.
+        link (str): Ссылка на объявление.
+
+    Returns:
+        dict: Запись с полями объявления в формате avito_data.json.
+    """
+    return AVITO.extract_record(html, link)
+
+
+def parse_avito_page(driver, link):
+    """Загружает страницу объявления avito.ru и извлекает из нее запись.
+
+    Страница считается загруженной, когда появился заголовок объявления
+    (wait_locator описания сайта); исходный код забирается из браузера один раз,
+    все поля извлекаются локально (см. extract_avito_record).
+
+    Args:
+        driver (selenium.webdriver.Remote): Драйвер, выданный пулом.
+        link (str): Ссылка на объявление.
+
+    Returns:
+        dict: Запись с полями объявления в формате avito_data.json.
+
+    Raises:
+        TimeoutException: Если заголовок объявления не загрузился.
+    """
+    return AVITO.parse_page(driver, link)
 
-def parse_avito_data():
+
+def parse_avito_data(pool_size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES, skip_links=None,
+                     links=None, on_record=None, data_path="avito_data.json"):
     """Парсит детальную информацию об автомобилях с сайта по сохраненным ссылкам.
 
-    Функция загружает список ссылок из файла json, последовательно посещает
-    каждую страницу с объявлением и извлекает следующие данные:
+    Функция загружает список ссылок из файла json, параллельно посещает
+    страницы с объявлениями через пул браузеров и извлекает следующие данные:
     - Название автомобиля
     - Цену
     - Описание
@@ -26,7 +92,17 @@ def parse_avito_data():
     - Ссылку на объявление
 
     Args:
-        Нет аргументов.
+        pool_size (int): Число одновременно работающих браузеров.
+        max_pages (int): Число страниц, после которого браузер перезапускается.
+        skip_links (set[str], optional): Ссылки, которые не нужно загружать повторно
+            (инкрементальный режим).
+        links (iterable[str], optional): Ссылки для обработки вместо avito_links.json,
+            например поток ссылок от работающего сборщика (см. pipeline.LinkStream).
+        on_record (callable, optional): Функция, получающая каждую новую запись сразу
+            после извлечения (см. stream_loader).
+        data_path (str): Итоговый файл; контрольная точка ведется рядом в файле .jsonl.
+            Отдельные пути позволяют нескольким процессам парсить свои части
+            списка ссылок (см. sharding).
 
     Returns:
         None: Функция не возвращает значений, но сохраняет результаты в файл.
@@ -38,9 +114,17 @@ def parse_avito_data():
         Exception: Другие возможные исключения при парсинге.
 
     Notes:
-        - Использует headless-режим браузера Chrome.
-        - Добавляет задержки между запросами для имитации человеческого поведения.
+        - Использует пул headless-браузеров Chrome (см. driver_pool.DriverPool)
+          с облегченным профилем загрузки (см. driver_profile).
+        - Частота запросов регулируется адаптивным ограничителем домена (см. rate_limiter).
+        - Забирает исходный код страницы один раз и извлекает поля локально (см. extraction).
+        - Поля сначала читаются из встроенного в страницу JSON-состояния
+          (см. embedded_state), DOM используется как запасной путь.
+        - Страницы сохраняются в кэш (см. html_cache); если свежая копия уже есть,
+          поля извлекаются из нее без обращения к сети.
         - Обрабатывает случаи отсутствия данных, заменяя их на "Не указано".
+        - Каждая запись сразу дописывается в контрольную точку avito_data.jsonl;
+          при повторном запуске уже обработанные ссылки пропускаются.
         - Сохраняет данные в формате JSON с сохранением кириллических символов.
 
     Examples:
@@ -48,104 +132,31 @@ def parse_avito_data():
         Обработка: https://auto.ru/cars/used/sale/.../
         Данные сохранены в json
     """
-    def get_car_param(param_name):
-        try:
-            elements = driver.find_elements(By.XPATH, "//li")
-            for elem in elements:
-                if param_name in elem.text:
-                    return elem.text.replace(param_name, "").strip()
-        except:
-            pass
-        return "Не указано"
-
-    try:
-        with open("avito_links.json", "r", encoding="utf-8") as f:
-            links = json.load(f)
-        print(f"Успешно загружено {len(links)} ссылок из avito_links.json")
-    except Exception as e:
-        print(f"Ошибка при чтении файла avito_links.json: {str(e)}")
-        links = []
-
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-
-    service = Service("C:/chromedriver-win64/chromedriver.exe")
-    driver = webdriver.Chrome(service=service, options=options)
-
-    cars_data = []
-
-    if not links:
-        print("Список ссылок пуст. Завершаем работу.")
-    else:
-        for link in links:
-            print(f"Обработка: {link}")
-            try:
-                driver.get(link)
-
-                title = WebDriverWait(driver, 5).until(
-                    EC.presence_of_element_located((By.XPATH, "//h1[@itemprop='name']"))
-                ).text.strip()
-
-                try:
-                    price = WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.XPATH, "//span[@itemprop='price']"))
-                    ).get_attribute("content").strip()
-                except Exception as e:
-                    try:
-                        price = WebDriverWait(driver, 10).until(
-                            EC.presence_of_element_located((By.XPATH, "//span[@data-marker='item-view/item-price']"))
-                        ).text.strip().replace("\u2009", "").replace("\xa0", "")
-                    except Exception as e:
-                        price = "Не указано"
-
-                try:
-                    description = driver.find_element(By.XPATH,
-                                                      "//div[@data-marker='item-view/item-description']").text.strip()
-                except:
-                    description = "Не указано"
-
-                engine_type = get_car_param("Тип двигателя:")
-                drive_type = get_car_param("Привод:")
-                body_type = get_car_param("Тип кузова:")
-                transmission = get_car_param("Коробка передач:")
-
-                try:
-                    location = driver.find_element(By.XPATH,
-                                                   "/html/body/div[1]/div/div[4]/div[1]/div/div[2]/div[3]/div/div[1]/div/div[2]/div[4]/div/div[1]/div[1]/div/span").text.strip()
-                except:
-                    location = "Не указано"
-
-                try:
-                    publication_date = driver.find_element(By.XPATH,
-                                                           "//span[@data-marker='item-view/item-date']").text.strip()
-                except:
-                    publication_date = "Не указано"
-
-                cars_data.append({
-                    "title": title,
-                    "price": price,
-                    "description": description,
-                    "engine_type": engine_type,
-                    "body_type": body_type,
-                    "drive_type": drive_type,
-                    "transmission": transmission,
-                    "location": location,
-                    "publication_date": publication_date,
-                    "link": link
-                })
-
-                time.sleep(1)
-
-            except Exception as e:
-                print(f"Ошибка при обработке {link}: {str(e)}")
-                continue
-
-    with open("avito_data.json", "w", encoding="utf-8") as f:
-        json.dump(cars_data, f, ensure_ascii=False, indent=4)
-
-    print("Данные сохранены в avito_data.json")
-    driver.quit()
-
-parse_avito_data()
\ No newline at end of file
+    AVITO.parse_data(parse_avito_page, pool_size=pool_size, max_pages=max_pages, skip_links=skip_links,
+                     links=links, on_record=on_record, data_path=data_path)
+
+
+def replay_avito_data(source=DEFAULT_CACHE_DIR, workers=None):
+    """Повторно извлекает данные из архивных страниц объявлений без обращения к сети.
+
+    Применяет extract_avito_record ко всем сохраненным страницам объявлений
+    avito из кэша страниц или каталога архивных HTML-файлов параллельно на
+    всех ядрах процессора и сохраняет результат в тех же файлах, что и
+    parse_avito_data.
+
+    Args:
+        source (str): Каталог кэша страниц (см. html_cache) или архива HTML-файлов.
+        workers (int, optional): Число процессов; по умолчанию число CPU.
+
+    Returns:
+        int: Количество извлеченных записей.
+
+    Examples:
+        >>> replay_avito_data("html_cache")
+        Повторно извлечено 300 записей, данные сохранены в avito_data.json
+    """
+    return AVITO.replay(extract_avito_record, source, workers)
+
+
+if __name__ == "__main__":
+    parse_avito_data()
@@ -1,21 +1,34 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
+from functools import partial
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
-import time
 import json
+from driver_pool import create_chrome_driver, USER_AGENT
+from http_fetch import fetch_pages
 
-def collect_avito_links():
+BASE_URL = "https://www.avito.ru/all/avtomobili/s_probegom-ASgBAgICAUSGFMjmAQ?p="
+
+CHROME_ARGUMENTS = [
+    "--disable-blink-features=AutomationControlled",
+    f"user-agent={USER_AGENT}",
+    "--headless",
+]
+
+def collect_avito_links(base_url=BASE_URL, num_pages=3, use_browser=False, on_links=None):
     """Собирает ссылки на объявления о продаже автомобилей с сайта.
 
-    Функция использует Selenium WebDriver для парсинга страниц с объявлениями.
-    Проходит по указанному количеству страниц, собирает все уникальные ссылки
-    на объявления и сохраняет их в JSON-файл.
+    Функция загружает страницы с объявлениями асинхронными HTTP-запросами
+    и обращается к Selenium WebDriver только для страниц, которые требуют
+    отрисовки JavaScript или показывают проверку. Проходит по указанному
+    количеству страниц, собирает все уникальные ссылки на объявления и
+    сохраняет их в JSON-файл.
 
     Args:
-        Нет аргументов.
+        base_url (str): Адрес выдачи без номера страницы. Позволяет направить
+            сборщик на локальный стенд с записанными страницами.
+        num_pages (int): Количество страниц выдачи.
+        use_browser (bool): Загружать все страницы через браузер.
+        on_links (callable, optional): Функция on_links(links), которой передаются
+            новые ссылки каждой страницы сразу после ее разбора (см. pipeline).
 
     Returns:
         None: Функция не возвращает значений, но сохраняет результаты в файл.
@@ -25,10 +38,11 @@ def collect_avito_links():
         IOError: При проблемах с сохранением файла.
 
     Notes:
-        - Использует headless-режим браузера для фоновой работы.
+        - Страницы загружаются параллельно через общий пул соединений (см. http_fetch).
+        - Использует headless-режим браузера для запасного пути.
         - Добавляет пользовательский user-agent для обхода защиты.
         - Сохраняет только уникальные ссылки (дубликаты игнорируются).
-        - Включает задержки для имитации человеческого поведения.
+        - Страницы разбираются по мере загрузки, а не после загрузки всех страниц.
 
     Examples:
         Обработка страницы 1...
@@ -37,51 +51,48 @@ def collect_avito_links():
         Страница 2: Найдено объявлений: 25
         Ссылки сохранены в autoru_links.json
     """
-    service = ChromeService(executable_path="C:/chromedriver-win64/chromedriver.exe")
-    options = webdriver.ChromeOptions()
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument(
-        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-    options.add_argument("--headless")
-    driver = webdriver.Chrome(service=service, options=options)
-
-    base_url = "https://www.avito.ru/all/avtomobili/s_probegom-ASgBAgICAUSGFMjmAQ?p="
+    urls = [base_url + str(page) for page in range(1, num_pages + 1)]
+    page_numbers = {url: page for page, url in enumerate(urls, start=1)}
     links_set = set()
 
-    num_pages = 3
-
-    for page in range(1, num_pages + 1):
-        url = base_url + str(page)
+    def handle_page(url, html):
+        page = page_numbers[url]
         print(f"Обработка страницы {page}...")
 
-        try:
-            driver.get(url)
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-marker='item']"))
-            )
-            time.sleep(1)
+        soup = BeautifulSoup(html, "html.parser")
+
+        listings = soup.find_all("div", {"data-marker": "item"})
+        print(f"Страница {page}: Найдено объявлений: {len(listings)}")
 
-            html = driver.page_source
-            soup = BeautifulSoup(html, "html.parser")
+        new_links = []
+        for item in listings:
+            link_tag = item.find("a", {"data-marker": "item-title"})
+            link = "https://www.avito.ru" + link_tag["href"] if link_tag else None
 
-            listings = soup.find_all("div", {"data-marker": "item"})
-            print(f"Страница {page}: Найдено объявлений: {len(listings)}")
+            if link and link not in links_set:
+                links_set.add(link)
+                new_links.append(link)
 
-            for item in listings:
-                link_tag = item.find("a", {"data-marker": "item-title"})
-                link = "https://www.avito.ru" + link_tag["href"] if link_tag else None
+        if on_links and new_links:
+            on_links(new_links)
 
-                if link and link not in links_set:
-                    links_set.add(link)
+    pages = fetch_pages(
+        urls,
+        ready_marker='data-marker="item"',
+        browser_factory=partial(create_chrome_driver, CHROME_ARGUMENTS),
+        wait_locator=(By.CSS_SELECTOR, "div[data-marker='item']"),
+        use_browser=use_browser,
+        on_page=handle_page,
+    )
 
-        except Exception as e:
-            print(f"Ошибка на странице {page}: {str(e)}")
-            continue
+    for page, (url, html) in enumerate(pages, start=1):
+        if html is None:
+            print(f"Ошибка на странице {page}: страница не загружена")
 
     with open("avito_links.json", "w", encoding="utf-8") as f:
         json.dump(list(links_set), f, ensure_ascii=False, indent=4)
     print("Ссылки сохранены в avito_links.json")
 
-    driver.quit()
 
-collect_avito_links()
\ No newline at end of file
+if __name__ == "__main__":
+    collect_avito_links()
\ No newline at end of file
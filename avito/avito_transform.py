@@ -25,6 +25,44 @@ def transform_transmission(transmission):
         return 'механическая'
     return 'автоматическая'
 
+def transform_avito_frame(avito_df):
+    """Преобразует и очищает сырые записи объявлений avito.
+
+    Выполняет те же преобразования, что и transform_avito_data, но над
+    переданным DataFrame, поэтому подходит и для всего файла, и для
+    небольших пачек записей, получаемых во время парсинга (см. stream_loader).
+
+    Args:
+        avito_df (pandas.DataFrame): Записи в формате avito_data.json.
+
+    Returns:
+        pandas.DataFrame: Очищенный DataFrame (см. transform_avito_data).
+    """
+    avito_df[['brand', 'model', 'engine_volume', 'year', 'mileage']] = pd.DataFrame(
+        avito_df['title'].apply(extract_car_info).tolist(), index=avito_df.index,
+        columns=['brand', 'model', 'engine_volume', 'year', 'mileage'])
+    avito_df = avito_df.dropna(subset=['brand', 'model', 'engine_volume', 'year', 'mileage'])
+    avito_df = avito_df.reset_index(drop=True)
+    avito_df['year'] = avito_df['year'].astype(int)
+    avito_df['mileage'] = avito_df['mileage'].astype(int)
+    avito_df['price'] = avito_df['price'].astype(int)
+    avito_df['transmission'] = avito_df['transmission'].apply(transform_transmission)
+    avito_df['body_type'] = avito_df['body_type'].str.split().str[0]
+    avito_df = avito_df.drop(columns=['publication_date', 'title'])
+    avito_df['publication_date'] = datetime.now().strftime('%d-%m-%Y')
+    avito_df['publication_date'] = pd.to_datetime(avito_df['publication_date'], format='%d-%m-%Y')
+    for col in avito_df.columns:
+        if col != 'link':
+            avito_df[col] = avito_df[col].apply(lambda x: x.lower() if isinstance(x, str) else x)
+
+    # print(avito_df[['brand', 'model', 'engine_volume', 'year', 'mileage']])
+    # print(avito_df[['price', 'transmission', 'body_type', 'publication_date']])
+    # print(avito_df[['engine_type', 'location', 'description']])
+    # print(avito_df[['link', 'drive_type']])
+
+    # print(avito_df.dtypes)
+    return avito_df
+
 def transform_avito_data():
     """Преобразует и очищает данные об автомобилях из файла json.
 
@@ -71,28 +109,4 @@ def transform_avito_data():
                'publication_date', 'description', 'link'],
               dtype='object')
     """
-    avito_df = pd.read_json('avito_data.json')
-
-    avito_df[['brand', 'model', 'engine_volume', 'year', 'mileage']] = avito_df['title'].apply(extract_car_info).apply(
-        pd.Series)
-    avito_df = avito_df.dropna(subset=['brand', 'model', 'engine_volume', 'year', 'mileage'])
-    avito_df = avito_df.reset_index(drop=True)
-    avito_df['year'] = avito_df['year'].astype(int)
-    avito_df['mileage'] = avito_df['mileage'].astype(int)
-    avito_df['price'] = avito_df['price'].astype(int)
-    avito_df['transmission'] = avito_df['transmission'].apply(transform_transmission).apply(pd.Series)
-    avito_df['body_type'] = avito_df['body_type'].str.split().str[0]
-    avito_df = avito_df.drop(columns=['publication_date', 'title'])
-    avito_df['publication_date'] = datetime.now().strftime('%d-%m-%Y')
-    avito_df['publication_date'] = pd.to_datetime(avito_df['publication_date'], format='%d-%m-%Y')
-    for col in avito_df.columns:
-        if col != 'link':
-            avito_df[col] = avito_df[col].apply(lambda x: x.lower() if isinstance(x, str) else x)
-
-    # print(avito_df[['brand', 'model', 'engine_volume', 'year', 'mileage']])
-    # print(avito_df[['price', 'transmission', 'body_type', 'publication_date']])
-    # print(avito_df[['engine_type', 'location', 'description']])
-    # print(avito_df[['link', 'drive_type']])
-
-    # print(avito_df.dtypes)
-    return avito_df
+    return transform_avito_frame(pd.read_json('avito_data.json'))
@@ -0,0 +1,69 @@
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+from load_to_database import migrate_data_postgresql, drop_table_postgresql
+
+BENCHMARK_TABLE = "load_benchmark"
+DEFAULT_ROWS = [1000, 10000, 50000]
+
+BRANDS = ["Toyota Camry", "Kia Rio", "Hyundai Solaris", "Lada Vesta", "Skoda Octavia", "BMW X5"]
+TRANSMISSIONS = ["автомат", "механика", "робот", "вариатор"]
+
+
+def synthetic_listings(rows, seed=0):
+    """Создает DataFrame объявлений той же формы, что и результат transform_<site>_frame.
+
+    Описания содержат переводы строк и табуляции, чтобы проверялось экранирование COPY.
+    """
+    rng = random.Random(seed)
+    started = datetime(2024, 1, 1)
+    return pd.DataFrame({
+        "title": [f"{rng.choice(BRANDS)}, {rng.randint(2005, 2024)}" for _ in range(rows)],
+        "price": [rng.randint(300, 9000) * 1000 for _ in range(rows)],
+        "description": [f"Один владелец.\nПробег родной\t{rng.random():.6f}" for _ in range(rows)],
+        "engine_volume": [round(rng.uniform(1.0, 4.5), 1) for _ in range(rows)],
+        "transmission": [rng.choice(TRANSMISSIONS) for _ in range(rows)],
+        "mileage": [rng.randint(0, 300000) for _ in range(rows)],
+        "location": ["Москва"] * rows,
+        "publication_date": [started + timedelta(minutes=rng.randint(0, 500000)) for _ in range(rows)],
+        "link": [f"https://auto.drom.ru/moscow/car/{index}.html" for index in range(rows)],
+    })
+
+
+def benchmark(rows_list, methods=("insert", "copy"), dsn=None):
+    """Замеряет время полной загрузки DataFrame в PostgreSQL каждым способом.
+
+    Args:
+        rows_list (list[int]): Размеры DataFrame.
+        methods (tuple[str]): Значения параметра method функции migrate_data_postgresql.
+        dsn (str, optional): Адрес базы данных; по умолчанию из конфигурации (см. database).
+
+    Returns:
+        list[dict]: Результаты: rows, method, seconds, rows_per_second.
+    """
+    results = []
+    for rows in rows_list:
+        df = synthetic_listings(rows)
+        for method in methods:
+            drop_table_postgresql(BENCHMARK_TABLE, dsn=dsn)
+            started = time.perf_counter()
+            if not migrate_data_postgresql(df, BENCHMARK_TABLE, method=method, dsn=dsn):
+                raise RuntimeError(f"Загрузка способом {method} завершилась ошибкой")
+            seconds = time.perf_counter() - started
+            results.append({"rows": rows, "method": method, "seconds": seconds, "rows_per_second": rows / seconds})
+            print(f"{rows} строк, {method}: {seconds:.2f} с ({rows / seconds:.0f} строк/с)")
+    drop_table_postgresql(BENCHMARK_TABLE, dsn=dsn)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сравнение загрузки в PostgreSQL через to_sql и COPY")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--dsn", help="адрес базы данных; по умолчанию DATABASE_URL или переменные PG*")
+    args = parser.parse_args()
+
+    seconds = {(result["rows"], result["method"]): result["seconds"] for result in benchmark(args.rows, dsn=args.dsn)}
+    for rows in args.rows:
+        print(f"{rows} строк: COPY быстрее to_sql в {seconds[rows, 'insert'] / seconds[rows, 'copy']:.1f} раза")
@@ -0,0 +1,131 @@
+import csv
+import os
+import threading
+from datetime import datetime
+import psutil
+
+DEFAULT_MAX_RSS_MB = int(os.environ.get("BROWSER_MAX_RSS_MB", 1500))
+MEMORY_LOG_PATH = "browser_memory.csv"
+MEMORY_LOG_FIELDS = ["time", "session", "pages", "rss_mb", "available_mb"]
+
+_log_lock = threading.Lock()
+
+
+def browser_rss(driver):
+    """Возвращает суммарный RSS процесса chromedriver и всех процессов Chrome в байтах.
+
+    Процессы Chrome (браузер, вкладки, GPU) запускаются chromedriver, поэтому
+    учитывается все его дерево процессов. Память сессии службы браузеров
+    замеряет сама служба (см. remote_browser.AttachedRemote.browser_rss).
+
+    Args:
+        driver (selenium.webdriver.Remote): Драйвер, запущенный локально или
+            подключенный к службе браузеров.
+
+    Returns:
+        int | None: Объем памяти или None, если процесс недоступен.
+    """
+    remote_rss = getattr(driver, "browser_rss", None)
+    if remote_rss is not None:
+        return remote_rss()
+    process = getattr(getattr(driver, "service", None), "process", None)
+    if process is None:
+        return None
+    try:
+        root = psutil.Process(process.pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return None
+    total = 0
+    for child in processes:
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            continue
+    return total
+
+
+class MemoryGovernor:
+    """Следит за памятью браузеров пула и решает, когда браузер пора перезапустить.
+
+    После каждой страницы замеряется RSS дерева процессов браузера (см.
+    browser_rss). Если он превысил max_rss_mb, пул закрывает браузер и
+    при следующей выдаче создает новый; обрабатываемый список ссылок при
+    этом не прерывается. Каждый замер дописывается в CSV-файл log_path
+    (время, сессия, число страниц, RSS и свободная память системы), по
+    которому можно подобрать размер пулов и лимиты.
+
+    Args:
+        max_rss_mb (float | None): Порог памяти одного браузера в МБ; None отключает проверку.
+        log_path (str | None): Файл журнала памяти; None отключает журнал.
+
+    Examples:
+        >>> governor = MemoryGovernor(max_rss_mb=1200)
+        >>> governor.over_budget(driver, pages=35)
+        False
+    """
+
+    def __init__(self, max_rss_mb=DEFAULT_MAX_RSS_MB, log_path=MEMORY_LOG_PATH):
+        self.max_rss_mb = max_rss_mb
+        self.log_path = log_path
+        self.samples = 0
+        self.total_mb = 0.0
+        self.peak_mb = 0.0
+        self.recycled = 0
+        self._lock = threading.Lock()
+
+    def sample(self, driver, pages):
+        """Замеряет память браузера и дописывает замер в журнал.
+
+        Args:
+            driver (selenium.webdriver.Remote): Драйвер пула.
+            pages (int): Число страниц, обработанных браузером.
+
+        Returns:
+            float | None: RSS браузера в МБ или None, если его нельзя измерить.
+        """
+        rss = browser_rss(driver)
+        if rss is None:
+            return None
+        rss_mb = rss / 1024 / 1024
+        with self._lock:
+            self.samples += 1
+            self.total_mb += rss_mb
+            self.peak_mb = max(self.peak_mb, rss_mb)
+        if self.log_path:
+            self._log(driver, pages, rss_mb)
+        return rss_mb
+
+    def over_budget(self, driver, pages):
+        """Замеряет память браузера и возвращает True, если его нужно перезапустить."""
+        rss_mb = self.sample(driver, pages)
+        if rss_mb is None or not self.max_rss_mb or rss_mb < self.max_rss_mb:
+            return False
+        with self._lock:
+            self.recycled += 1
+        print(f"Браузер занял {rss_mb:.0f} МБ после {pages} страниц и будет перезапущен")
+        return True
+
+    def summary(self):
+        """Возвращает строку со средним и пиковым расходом памяти браузера."""
+        with self._lock:
+            if not self.samples:
+                return "Память браузеров не измерялась"
+            return (f"Память браузера: в среднем {self.total_mb / self.samples:.0f} МБ, "
+                    f"максимум {self.peak_mb:.0f} МБ, перезапусков по памяти: {self.recycled}")
+
+    def _log(self, driver, pages, rss_mb):
+        row = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "session": driver.session_id,
+            "pages": pages,
+            "rss_mb": round(rss_mb, 1),
+            "available_mb": round(psutil.virtual_memory().available / 1024 / 1024),
+        }
+        with _log_lock:
+            new_file = not os.path.exists(self.log_path)
+            with open(self.log_path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=MEMORY_LOG_FIELDS)
+                if new_file:
+                    writer.writeheader()
+                writer.writerow(row)
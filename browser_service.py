@@ -0,0 +1,352 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from browser_memory import MemoryGovernor, DEFAULT_MAX_RSS_MB, browser_rss
+from driver_pool import create_chrome_driver
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 4445
+MAX_SESSIONS = 8
+MAX_LEASES = 20
+MAX_SESSION_AGE = 3600
+MAX_LEASE_SECONDS = 1800
+HEALTH_INTERVAL = 60
+LEASE_WAIT = 60
+
+
+class BrowserSession:
+    """Запущенный браузер службы и его счетчики для решения о пересоздании."""
+
+    def __init__(self, key, driver):
+        self.key = key
+        self.driver = driver
+        self.created = time.monotonic()
+        self.leases = 0
+        self.leased_at = None
+
+    @property
+    def session_id(self):
+        return self.driver.session_id
+
+    def lease_info(self):
+        """Возвращает данные, по которым клиент подключается к сессии (см. remote_browser)."""
+        return {
+            "session_id": self.driver.session_id,
+            "executor_url": self.driver.service.service_url,
+            "capabilities": self.driver.capabilities,
+        }
+
+    def is_alive(self):
+        """Проверяет, что браузер отвечает на команды."""
+        try:
+            self.driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    def reset(self):
+        """Готовит браузер к следующему клиенту: одна вкладка, пустая страница, без cookies."""
+        handles = self.driver.window_handles
+        for handle in handles[1:]:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        self.driver.switch_to.window(handles[0])
+        self.driver.get("about:blank")
+        self.driver.delete_all_cookies()
+        if self.key[2]:
+            # Сетевые события прошлого клиента не должны попасть следующему
+            self.driver.get_log("performance")
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class BrowserService:
+    """Служба, держащая запущенные браузеры между запусками потоков ETL.
+
+    Браузеры разных профилей (аргументы Chrome, облегченный режим, журнал
+    сети) хранятся отдельно. Клиент получает свободную сессию нужного
+    профиля через lease, а при закрытии драйвера возвращает ее через
+    release; браузер при этом не закрывается, а очищается и ждет следующего
+    клиента, поэтому плановые запуски не тратят время на старт Chrome.
+
+    Сессия пересоздается, если браузер перестал отвечать, обслужил
+    max_leases клиентов, проработал дольше max_age секунд или занял
+    больше max_rss_mb памяти (см. browser_memory). Клиент замеряет память
+    выданной сессии после каждой страницы через /rss и возвращает сессию,
+    превысившую порог; свободные сессии, в том числе по памяти,
+    проверяются каждые HEALTH_INTERVAL секунд; пересозданная
+    сессия сразу заменяется новой, чтобы запас прогретых браузеров не
+    уменьшался. Сессии, не возвращенные за MAX_LEASE_SECONDS (клиент упал),
+    закрываются.
+
+    Args:
+        max_sessions (int): Максимальное число браузеров службы.
+        max_leases (int): Число выдач, после которого браузер пересоздается.
+        max_age (float): Время жизни браузера в секундах.
+        max_rss_mb (float | None): Порог памяти браузера в МБ.
+    """
+
+    def __init__(self, max_sessions=MAX_SESSIONS, max_leases=MAX_LEASES, max_age=MAX_SESSION_AGE,
+                 max_rss_mb=DEFAULT_MAX_RSS_MB):
+        self.max_sessions = max_sessions
+        self.max_leases = max_leases
+        self.max_age = max_age
+        self.governor = MemoryGovernor(max_rss_mb)
+        self._idle = []
+        self._leased = {}
+        self._starting = 0
+        self._changed = threading.Condition()
+        self._stopped = threading.Event()
+
+    def lease(self, key, wait=LEASE_WAIT):
+        """Выдает свободную сессию профиля key, при необходимости запуская браузер.
+
+        Args:
+            key (tuple): Профиль (аргументы Chrome, lite, capture_network).
+            wait (float): Время ожидания свободного места в секундах.
+
+        Returns:
+            BrowserSession | None: Сессия или None, если все места заняты дольше wait.
+        """
+        deadline = time.monotonic() + wait
+        while True:
+            with self._changed:
+                session = self._take_idle(key)
+                if session is None and not self._has_room():
+                    # Место занимает свободный браузер другого профиля: он уступает его
+                    evicted = self._idle.pop(0) if self._idle else None
+                    if evicted is None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return None
+                        self._changed.wait(remaining)
+                        continue
+                    threading.Thread(target=evicted.quit, daemon=True).start()
+                if session is None:
+                    self._starting += 1
+            if session is not None:
+                if session.is_alive():
+                    return self._hand_out(session)
+                self._discard(session)
+                continue
+            try:
+                session = self._start(key)
+            finally:
+                with self._changed:
+                    self._starting -= 1
+            return self._hand_out(session)
+
+    def release(self, session_id):
+        """Принимает сессию от клиента и возвращает ее в число свободных или пересоздает."""
+        with self._changed:
+            session = self._leased.pop(session_id, None)
+        if session is None:
+            return False
+        if self._expired(session) or self.governor.over_budget(session.driver, session.leases):
+            self._recycle(session)
+            return True
+        try:
+            session.reset()
+        except Exception as e:
+            print(f"Сессия {session_id} не прошла очистку: {e}")
+            self._recycle(session)
+            return True
+        with self._changed:
+            session.leased_at = None
+            self._idle.append(session)
+            self._changed.notify_all()
+        return True
+
+    def rss(self, session_id):
+        """Возвращает RSS процессов браузера сессии session_id в байтах или None."""
+        with self._changed:
+            session = self._leased.get(session_id) or next(
+                (session for session in self._idle if session.session_id == session_id), None)
+        return browser_rss(session.driver) if session else None
+
+    def check(self):
+        """Проверяет свободные и зависшие выданные сессии, пересоздавая неисправные."""
+        now = time.monotonic()
+        with self._changed:
+            idle = list(self._idle)
+            stale = [session for session in self._leased.values()
+                     if now - session.leased_at > MAX_LEASE_SECONDS]
+            for session in stale:
+                del self._leased[session.session_id]
+        for session in stale:
+            print(f"Сессия {session.session_id} не возвращена за {MAX_LEASE_SECONDS} с и закрывается")
+            self._discard(session)
+        for session in idle:
+            if (self._expired(session) or not session.is_alive()
+                    or self.governor.over_budget(session.driver, session.leases)):
+                with self._changed:
+                    if session not in self._idle:
+                        continue
+                    self._idle.remove(session)
+                self._recycle(session)
+
+    def status(self):
+        """Возвращает число свободных и выданных сессий по профилям."""
+        with self._changed:
+            profiles = {}
+            for state, sessions in (("idle", self._idle), ("leased", self._leased.values())):
+                for session in sessions:
+                    name = " ".join(session.key[0]) or "default"
+                    profiles.setdefault(name, {"idle": 0, "leased": 0})[state] += 1
+            return {"sessions": len(self._idle) + len(self._leased), "profiles": profiles}
+
+    def run_health_checks(self, interval=HEALTH_INTERVAL):
+        """Периодически вызывает check до вызова close."""
+        while not self._stopped.wait(interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Ошибка проверки сессий: {e}")
+
+    def close(self):
+        """Закрывает все браузеры службы."""
+        self._stopped.set()
+        with self._changed:
+            sessions = self._idle + list(self._leased.values())
+            self._idle, self._leased = [], {}
+        for session in sessions:
+            session.quit()
+
+    def _has_room(self):
+        return len(self._idle) + len(self._leased) + self._starting < self.max_sessions
+
+    def _take_idle(self, key):
+        for index, session in enumerate(self._idle):
+            if session.key == key:
+                return self._idle.pop(index)
+        return None
+
+    def _start(self, key):
+        arguments, lite, capture_network = key
+        started = time.monotonic()
+        driver = create_chrome_driver(list(arguments), lite, capture_network, use_service=False)
+        print(f"Запущен браузер {driver.session_id} за {time.monotonic() - started:.1f} с")
+        return BrowserSession(key, driver)
+
+    def _hand_out(self, session):
+        with self._changed:
+            session.leases += 1
+            session.leased_at = time.monotonic()
+            self._leased[session.session_id] = session
+        return session
+
+    def _expired(self, session):
+        return (session.leases >= self.max_leases
+                or time.monotonic() - session.created >= self.max_age)
+
+    def _discard(self, session):
+        session.quit()
+        with self._changed:
+            self._changed.notify_all()
+
+    def _recycle(self, session):
+        # Браузер заменяется новым того же профиля, чтобы следующий
+        # клиент снова получил прогретую сессию
+        session.quit()
+        with self._changed:
+            if not self._has_room():
+                self._changed.notify_all()
+                return
+            self._starting += 1
+        try:
+            replacement = self._start(session.key)
+        except Exception as e:
+            print(f"Не удалось пересоздать браузер: {e}")
+            replacement = None
+        with self._changed:
+            self._starting -= 1
+            if replacement is not None:
+                self._idle.append(replacement)
+            self._changed.notify_all()
+
+
+def serve_browsers(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Запускает HTTP-интерфейс службы браузеров.
+
+    POST /lease с телом {"arguments": [...], "lite": true, "capture_network": false}
+    выдает сессию, POST /release с телом {"session_id": "..."} возвращает ее,
+    POST /rss с тем же телом возвращает память браузера сессии,
+    GET /health показывает состояние службы.
+
+    Args:
+        service (BrowserService): Служба браузеров.
+        host (str): Адрес, на котором принимаются запросы.
+        port (int): Порт; 0 означает любой свободный.
+
+    Returns:
+        tuple: (server, url) — сервер ThreadingHTTPServer и его адрес.
+    """
+    class BrowserServiceHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/health":
+                self.send_json(404, {"error": "not found"})
+                return
+            self.send_json(200, service.status())
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path == "/lease":
+                key = (tuple(body.get("arguments", [])), body.get("lite", True), body.get("capture_network", False))
+                try:
+                    session = service.lease(key)
+                except Exception as e:
+                    self.send_json(500, {"error": str(e)})
+                    return
+                if session is None:
+                    self.send_json(503, {"error": "all browsers are busy"})
+                    return
+                self.send_json(200, session.lease_info())
+            elif self.path == "/release":
+                self.send_json(200, {"released": service.release(body.get("session_id"))})
+            elif self.path == "/rss":
+                self.send_json(200, {"rss": service.rss(body.get("session_id"))})
+            else:
+                self.send_json(404, {"error": "not found"})
+
+        def send_json(self, status, data):
+            payload = json.dumps(data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), BrowserServiceHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Служба прогретых браузеров для парсеров")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    parser.add_argument("--max-leases", type=int, default=MAX_LEASES)
+    parser.add_argument("--max-age", type=float, default=MAX_SESSION_AGE)
+    parser.add_argument("--max-rss-mb", type=float, default=DEFAULT_MAX_RSS_MB)
+    args = parser.parse_args()
+
+    browser_service = BrowserService(args.max_sessions, args.max_leases, args.max_age, args.max_rss_mb)
+    server, url = serve_browsers(browser_service, args.host, args.port)
+    print(f"Служба браузеров запущена на {url}; укажите BROWSER_SERVICE_URL={url} для потоков ETL")
+    try:
+        browser_service.run_health_checks()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        browser_service.close()
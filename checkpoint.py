@@ -0,0 +1,126 @@
+import json
+import os
+
+
+class JsonlCheckpoint:
+    """Файл контрольной точки, в который записи дописываются по одной строке JSON.
+
+    Каждая запись сразу сбрасывается на диск, поэтому при падении процесса
+    теряется не больше одной незавершенной строки. При повторном запуске
+    по файлу восстанавливается множество уже обработанных ссылок.
+
+    Args:
+        path (str): Путь к файлу JSONL.
+
+    Examples:
+        >>> with JsonlCheckpoint("autoru_data.jsonl") as checkpoint:
+        ...     done = checkpoint.done_links()
+        ...     checkpoint.append({"title": "...", "link": "https://auto.ru/..."})
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self):
+        """Открывает файл на дозапись, дописывая перевод строки после оборванной записи."""
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                broken_tail = f.read(1) != b"\n"
+        else:
+            broken_tail = False
+        self._file = open(self.path, "a", encoding="utf-8")
+        if broken_tail:
+            self._file.write("\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def append(self, record):
+        """Дописывает запись и сбрасывает ее на диск."""
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def done_links(self):
+        """Возвращает множество ссылок, уже записанных в контрольную точку."""
+        return {record["link"] for record in iter_jsonl(self.path) if "link" in record}
+
+    def remove(self):
+        """Удаляет файл контрольной точки после успешного завершения прохода."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def checkpoint_path_for(data_path):
+    """Возвращает путь к контрольной точке для итогового файла, например autoru_data.jsonl."""
+    return os.path.splitext(data_path)[0] + ".jsonl"
+
+
+def dead_letter_path_for(data_path):
+    """Возвращает путь к файлу неудавшихся ссылок, например autoru_data.failed.jsonl."""
+    return os.path.splitext(data_path)[0] + ".failed.jsonl"
+
+
+def rejected_path_for(data_path):
+    """Возвращает путь к файлу записей, не прошедших преобразование, например autoru_data.rejected.jsonl."""
+    return os.path.splitext(data_path)[0] + ".rejected.jsonl"
+
+
+def iter_jsonl(path):
+    """Построчно читает записи из файла JSONL.
+
+    Оборванные строки, оставшиеся после аварийного завершения, пропускаются.
+
+    Args:
+        path (str): Путь к файлу JSONL.
+
+    Yields:
+        dict: Очередная запись.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def export_json_array(jsonl_path, json_path):
+    """Потоково переписывает записи из JSONL в JSON-массив.
+
+    Формат результата совпадает с json.dump(..., ensure_ascii=False, indent=4),
+    при этом в памяти одновременно находится только одна запись.
+
+    Args:
+        jsonl_path (str): Путь к файлу JSONL.
+        json_path (str): Путь к итоговому файлу JSON.
+
+    Returns:
+        int: Количество записанных записей.
+    """
+    count = 0
+    with open(json_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for record in iter_jsonl(jsonl_path):
+            item = json.dumps(record, ensure_ascii=False, indent=4).replace("\n", "\n    ")
+            f.write(("," if count else "") + "\n    " + item)
+            count += 1
+        f.write("\n]" if count else "]")
+    return count
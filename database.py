@@ -0,0 +1,86 @@
+import os
+import threading
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL
+
+DATABASE_URL_ENV = "DATABASE_URL"
+DEFAULT_DATABASE = "parser"
+POOL_SIZE = int(os.environ.get("DATABASE_POOL_SIZE", 5))
+MAX_OVERFLOW = int(os.environ.get("DATABASE_MAX_OVERFLOW", 5))
+POOL_TIMEOUT = 30
+POOL_RECYCLE = 1800
+STATEMENT_TIMEOUT_MS = int(os.environ.get("DATABASE_STATEMENT_TIMEOUT_MS", 10 * 60 * 1000))
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def database_url():
+    """Возвращает адрес базы данных из конфигурации.
+
+    Адрес берется из переменной окружения DATABASE_URL, например
+    postgresql://parser:secret@db:5432/parser. Если она не задана, адрес
+    собирается из стандартных переменных PostgreSQL PGHOST, PGPORT,
+    PGDATABASE, PGUSER и PGPASSWORD; без пароля psycopg2 использует
+    ~/.pgpass. Учетные данные в коде потоков ETL не хранятся.
+
+    Returns:
+        sqlalchemy.engine.URL | str: Адрес базы данных.
+    """
+    url = os.environ.get(DATABASE_URL_ENV)
+    if url:
+        return url
+    return URL.create(
+        "postgresql",
+        username=os.environ.get("PGUSER"),
+        password=os.environ.get("PGPASSWORD"),
+        host=os.environ.get("PGHOST", "localhost"),
+        port=int(os.environ.get("PGPORT", 5432)),
+        database=os.environ.get("PGDATABASE", DEFAULT_DATABASE),
+    )
+
+
+def get_engine(dsn=None):
+    """Возвращает общий движок SQLAlchemy для адреса dsn.
+
+    На каждый адрес создается один движок с пулом соединений на весь
+    процесс, поэтому загрузки всех площадок и последовательные задачи
+    потока используют уже открытые соединения, а не устанавливают
+    TCP-соединение и не проходят аутентификацию на каждый вызов.
+    Соединения проверяются перед выдачей (pool_pre_ping) и пересоздаются
+    через POOL_RECYCLE секунд, а для каждого соединения задается
+    statement_timeout, чтобы зависший запрос не держал блокировки таблиц
+    бесконечно.
+
+    Args:
+        dsn (str | sqlalchemy.engine.URL, optional): Адрес базы данных; по
+            умолчанию database_url().
+
+    Returns:
+        sqlalchemy.engine.Engine: Движок с пулом соединений.
+    """
+    dsn = dsn or database_url()
+    key = dsn.render_as_string(hide_password=False) if isinstance(dsn, URL) else dsn
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = create_engine(
+                dsn,
+                pool_size=POOL_SIZE,
+                max_overflow=MAX_OVERFLOW,
+                pool_timeout=POOL_TIMEOUT,
+                pool_recycle=POOL_RECYCLE,
+                pool_pre_ping=True,
+                connect_args={"options": f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"},
+            )
+            _engines[key] = engine
+        return engine
+
+
+def dispose_engines():
+    """Закрывает соединения всех движков, например перед завершением процесса."""
+    with _engines_lock:
+        engines = list(_engines.values())
+        _engines.clear()
+    for engine in engines:
+        engine.dispose()
@@ -0,0 +1,86 @@
+from checkpoint import JsonlCheckpoint, export_json_array, dead_letter_path_for
+from browser_memory import DEFAULT_MAX_RSS_MB
+from driver_pool import DriverPool, DEFAULT_POOL_SIZE, DEFAULT_MAX_PAGES
+from driver_profile import page_stats
+from html_cache import canonical_url
+from retry_queue import RetryQueue
+
+
+def unique_pending(links, done):
+    """Возвращает канонические ссылки, которых нет в done, без повторов."""
+    for link in links:
+        link = canonical_url(link)
+        if link not in done:
+            done.add(link)
+            yield link
+
+
+def run_detail_parser(links, parse_page, driver_factory, data_path, checkpoint_path,
+                      pool_size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES, skip_links=None, on_record=None,
+                      dead_letter_path=None, max_memory_mb=DEFAULT_MAX_RSS_MB):
+    """Обрабатывает страницы объявлений с контрольной точкой и возобновлением.
+
+    Каждая полученная запись сразу дописывается в файл JSONL, поэтому
+    память не зависит от числа ссылок, а при падении сохраняется все, что
+    было обработано. Если файл контрольной точки остался от прерванного
+    запуска, ссылки из него пропускаются. Так же пропускаются ссылки из
+    skip_links, например уже сохраненные в базе данных. После обработки всех
+    ссылок записи переписываются в data_path, а контрольная точка удаляется.
+
+    Ссылки приводятся к каноническому виду (см. html_cache.canonical_url):
+    например, у ссылок avito отбрасывается параметр context, который
+    меняется от сеанса к сеансу. Поэтому сравнение с контрольной точкой и
+    skip_links, а также ссылка в записи не зависят от сеанса сбора ссылок.
+
+    Ссылки, на которых парсинг упал, повторяются с нарастающей паузой
+    (см. retry_queue), не задерживая остальные. Ссылки, исчерпавшие попытки,
+    сохраняются в dead_letter_path и при следующем запуске обрабатываются заново.
+
+    Args:
+        links (iterable[str]): Ссылки на объявления.
+        parse_page (callable): Функция parse_page(driver, link), возвращающая запись.
+        driver_factory (callable): Функция без аргументов, создающая драйвер.
+        data_path (str): Путь к итоговому файлу *_data.json.
+        checkpoint_path (str): Путь к файлу контрольной точки *_data.jsonl.
+        pool_size (int): Число одновременно работающих браузеров.
+        max_pages (int): Число страниц, после которого браузер перезапускается.
+        skip_links (set[str], optional): Ссылки, которые не нужно загружать.
+        on_record (callable, optional): Функция on_record(record), вызываемая для
+            каждой новой записи сразу после ее сохранения в контрольной точке
+            (например, MicroBatchLoader.add, см. stream_loader).
+        dead_letter_path (str, optional): Файл неудавшихся ссылок; по умолчанию
+            рядом с data_path, например autoru_data.failed.jsonl.
+        max_memory_mb (float | None): Порог памяти браузера в МБ, после которого
+            он перезапускается (см. browser_memory).
+
+    Returns:
+        int: Количество записей в итоговом файле.
+    """
+    with JsonlCheckpoint(checkpoint_path) as checkpoint:
+        done = {canonical_url(link) for link in checkpoint.done_links()}
+        if done:
+            print(f"Найдено {len(done)} обработанных ссылок в {checkpoint_path}, они будут пропущены")
+        if skip_links:
+            print(f"Пропускается {len(skip_links)} уже загруженных ссылок")
+            done |= {canonical_url(link) for link in skip_links}
+
+        pending = unique_pending(links, done)
+        retries = RetryQueue(dead_letter_path or dead_letter_path_for(data_path))
+        with retries, DriverPool(driver_factory, size=pool_size, max_pages=max_pages,
+                                 max_memory_mb=max_memory_mb) as pool:
+            for link, record, error in pool.imap(parse_page, retries.links(pending), task_wrapper=retries.wrap):
+                if error:
+                    print(f"Ошибка при обработке {link}: {str(error)}")
+                    continue
+                checkpoint.append(record)
+                if on_record:
+                    on_record(record)
+
+    print(page_stats.summary())
+    print(pool.governor.summary())
+    print(retries.summary())
+
+    count = export_json_array(checkpoint_path, data_path)
+    checkpoint.remove()
+    print(f"Данные сохранены в {data_path}")
+    return count
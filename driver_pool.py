@@ -0,0 +1,391 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import httpx
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException, TimeoutException, NoSuchElementException
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from browser_memory import MemoryGovernor, DEFAULT_MAX_RSS_MB
+from html_cache import get_cache
+from network_capture import enable_performance_log
+from remote_browser import lease_driver, service_url
+from driver_profile import apply_lite_options, enable_request_blocking, page_stats, response_status
+from rate_limiter import get_limiter, is_challenge_page
+
+CHROMEDRIVER_PATH = "C:/chromedriver-win64/chromedriver.exe"
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_MAX_PAGES = 50
+
+# Элемент входной последовательности imap, означающий "новых элементов пока нет"
+# (см. retry_queue.RetryQueue.links): пул тем временем отдает готовые результаты
+IDLE = object()
+IDLE_POLL_SECONDS = 1.0
+
+# Общий для всех пулов процесса лимит браузеров (см. set_browser_budget)
+_browser_slots = None
+
+
+class ChallengePageError(Exception):
+    """Вместо страницы сайт показал капчу или страницу блокировки."""
+
+    def __init__(self, url):
+        super().__init__(f"Проверка вместо страницы {url}")
+        self.url = url
+
+
+class HttpStatusError(Exception):
+    """Страница открылась с HTTP-статусом ошибки (4xx или 5xx)."""
+
+    def __init__(self, url, status_code):
+        super().__init__(f"HTTP {status_code} для {url}")
+        self.url = url
+        self.status_code = status_code
+
+
+def create_chrome_driver(arguments, lite=True, capture_network=False, use_service=True):
+    """Создает экземпляр Chrome WebDriver с заданными аргументами командной строки.
+
+    Если задана переменная окружения BROWSER_SERVICE_URL, браузер не
+    запускается, а берется готовая сессия у службы браузеров (см.
+    browser_service). Если служба недоступна, запускается локальный браузер.
+
+    Args:
+        arguments (list[str]): Аргументы Chrome, например "--headless".
+        lite (bool): Использовать облегченный профиль: стратегия загрузки eager
+            и блокировка изображений, медиа, шрифтов и сторонних счетчиков
+            (см. driver_profile).
+        capture_network (bool): Включить журнал производительности Chrome,
+            из которого читаются сетевые ответы страницы (см. network_capture).
+        use_service (bool): Брать сессию у службы браузеров, если она настроена.
+
+    Returns:
+        selenium.webdriver.Remote: Запущенный экземпляр браузера.
+    """
+    url = service_url() if use_service else None
+    if url:
+        try:
+            return lease_driver(url, arguments, lite, capture_network)
+        except httpx.HTTPError as e:
+            print(f"Служба браузеров {url} недоступна ({e}), запускается локальный браузер")
+
+    service = ChromeService(executable_path=CHROMEDRIVER_PATH)
+    options = webdriver.ChromeOptions()
+    for argument in arguments:
+        options.add_argument(argument)
+    if lite:
+        apply_lite_options(options)
+    if capture_network:
+        enable_performance_log(options)
+    driver = webdriver.Chrome(service=service, options=options)
+    if lite:
+        enable_request_blocking(driver)
+    return driver
+
+
+def load_page(driver, url, wait_locator=None, timeout=10, use_cache=True):
+    """Открывает страницу с учетом ограничителя частоты запросов домена.
+
+    Если в кэше страниц (см. html_cache) есть свежая копия, она возвращается
+    без обращения к сети; браузер в этом случае страницу не открывает.
+
+    Перед запросом ожидает своей очереди в get_limiter(url), а после
+    загрузки сообщает ограничителю время ответа, HTTP-статус и признак
+    капчи, чтобы тот подстроил скорость. Заменяет фиксированные паузы
+    time.sleep. Капча и статус ошибки превращаются в исключения, чтобы
+    очередь повторов (см. retry_queue) отличала их от таймаутов. Объем
+    трафика и время загрузки добавляются в driver_profile.page_stats.
+
+    Args:
+        driver (selenium.webdriver.Remote): Драйвер.
+        url (str): Адрес страницы.
+        wait_locator (tuple, optional): Локатор (By, selector), появление которого ожидается.
+        timeout (float): Время ожидания локатора в секундах.
+        use_cache (bool): Читать и сохранять страницу в кэше.
+
+    Returns:
+        str: Исходный код загруженной страницы.
+
+    Raises:
+        TimeoutException: Если локатор не появился за timeout секунд.
+        ChallengePageError: Если вместо страницы открылась капча или блокировка.
+        HttpStatusError: Если страница вернула статус 4xx или 5xx.
+    """
+    cache = get_cache() if use_cache else None
+    if cache:
+        html = cache.get(url)
+        if html is not None:
+            return html
+
+    limiter = get_limiter(url)
+    limiter.acquire()
+    started = time.monotonic()
+    try:
+        driver.get(url)
+        if wait_locator:
+            WebDriverWait(driver, timeout).until(EC.presence_of_element_located(wait_locator))
+    except TimeoutException:
+        status_code = response_status(driver)
+        blocked = is_challenge_page(driver.page_source, driver.current_url)
+        limiter.report(time.monotonic() - started, status_code, blocked=blocked)
+        check_page(url, status_code, blocked)
+        raise
+    elapsed = time.monotonic() - started
+    html = driver.page_source
+    status_code = response_status(driver)
+    blocked = is_challenge_page(html, driver.current_url)
+    limiter.report(elapsed, status_code, blocked=blocked)
+    page_stats.record(driver, url, elapsed)
+    check_page(url, status_code, blocked)
+    if cache:
+        cache.put(url, html)
+    return html
+
+
+def check_page(url, status_code, blocked):
+    """Вызывает исключение, если страница не содержит объявления.
+
+    Raises:
+        ChallengePageError: Если показана капча или блокировка.
+        HttpStatusError: Если статус ответа 4xx или 5xx.
+    """
+    if blocked:
+        raise ChallengePageError(url)
+    if status_code and status_code >= 400:
+        raise HttpStatusError(url, status_code)
+
+
+def set_browser_budget(limit):
+    """Ограничивает общее число браузеров во всех пулах процесса.
+
+    Нужен, когда несколько источников парсятся одновременно (см. market_etl):
+    у каждого источника свой пул со своим размером, но суммарно запускается
+    не больше limit браузеров. Действует на пулы, созданные после вызова.
+
+    Args:
+        limit (int | None): Максимальное число браузеров; None снимает ограничение.
+    """
+    global _browser_slots
+    _browser_slots = threading.BoundedSemaphore(limit) if limit else None
+
+
+@contextmanager
+def budgeted_driver(driver_factory):
+    """Выдает отдельный драйвер вне пула с учетом общего лимита браузеров.
+
+    Браузеры сборщиков выдачи и запасного пути http_fetch занимают слот
+    общего лимита так же, как браузеры пулов, поэтому set_browser_budget
+    ограничивает все браузеры процесса. По выходе из блока драйвер
+    закрывается, а слот освобождается.
+
+    Args:
+        driver_factory (callable): Функция без аргументов, создающая драйвер.
+
+    Examples:
+        >>> with budgeted_driver(partial(create_chrome_driver, ["--headless"])) as driver:
+        ...     html = load_page(driver, url)
+    """
+    slots = _browser_slots
+    if slots:
+        slots.acquire()
+    try:
+        driver = driver_factory()
+        try:
+            yield driver
+        finally:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+    finally:
+        if slots:
+            slots.release()
+
+
+class DriverPool:
+    """Пул браузеров для параллельной обработки списка страниц.
+
+    Пул ограничивает число одновременно запущенных браузеров значением size,
+    создает их лениво при первой необходимости и пересоздает драйвер после
+    max_pages обработанных страниц, после его падения или когда браузер
+    занял больше max_memory_mb памяти (см. browser_memory). Перезапуск
+    происходит между страницами, поэтому обработка списка не прерывается.
+
+    Args:
+        driver_factory (callable): Функция без аргументов, создающая новый драйвер.
+        size (int): Максимальное число одновременно работающих браузеров.
+        max_pages (int): Число страниц, после которого драйвер пересоздается.
+        max_memory_mb (float | None): Порог памяти браузера в МБ, после которого
+            драйвер пересоздается; None отключает проверку.
+
+    Examples:
+        >>> with DriverPool(lambda: create_chrome_driver(["--headless"]), size=4) as pool:
+        ...     for link, title, error in pool.imap(lambda driver, url: driver.title, links):
+        ...         print(link, title)
+    """
+
+    def __init__(self, driver_factory, size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES,
+                 max_memory_mb=DEFAULT_MAX_RSS_MB):
+        self.driver_factory = driver_factory
+        self.size = size
+        self.max_pages = max_pages
+        self.governor = MemoryGovernor(max_memory_mb)
+        self._pages = {}
+        self._slots = _browser_slots
+        # None в очереди означает свободный слот, под который драйвер еще не создан
+        self._idle = queue.Queue()
+        for _ in range(size):
+            self._idle.put(None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def acquire(self):
+        """Выдает свободный драйвер, при необходимости создавая новый.
+
+        Блокирует вызывающий поток, пока все драйверы пула заняты.
+
+        Returns:
+            selenium.webdriver.Remote: Драйвер, закрепленный за вызывающим потоком.
+        """
+        driver = self._idle.get()
+        if driver is None:
+            if self._slots and not self._wait_for_slot():
+                return self.acquire()
+            try:
+                driver = self.driver_factory()
+            except Exception:
+                if self._slots:
+                    self._slots.release()
+                self._idle.put(None)
+                raise
+            self._pages[driver] = 0
+        return driver
+
+    def _wait_for_slot(self):
+        # Пока общий лимит исчерпан, в пул мог вернуться свободный драйвер:
+        # тогда слот не нужен, и ожидание прекращается, чтобы не держать
+        # простаивающий браузер, пока поток ждет запуска нового
+        while not self._slots.acquire(timeout=0.5):
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                continue
+            self._idle.put(driver)
+            if driver is not None:
+                self._idle.put(None)
+                return False
+        return True
+
+    def _quit(self, driver):
+        self._pages.pop(driver, None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        if self._slots:
+            self._slots.release()
+
+    def release(self, driver, broken=False):
+        """Возвращает драйвер в пул.
+
+        Драйвер закрывается, а его слот освобождается, если браузер упал,
+        исчерпал лимит страниц или превысил лимит памяти.
+
+        Args:
+            driver (selenium.webdriver.Remote): Ранее выданный драйвер.
+            broken (bool): Признак того, что браузер перестал отвечать.
+        """
+        pages = self._pages.get(driver, 0) + 1
+        if broken or pages >= self.max_pages or self.governor.over_budget(driver, pages):
+            self._quit(driver)
+            self._idle.put(None)
+            return
+        self._pages[driver] = pages
+        self._idle.put(driver)
+
+    @contextmanager
+    def lease(self):
+        """Контекстный менеджер, выдающий драйвер на время обработки одной страницы."""
+        driver = self.acquire()
+        broken = False
+        try:
+            yield driver
+        except (TimeoutException, NoSuchElementException):
+            raise
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self.release(driver, broken)
+
+    def imap(self, func, items, task_wrapper=None):
+        """Параллельно применяет func(driver, item) к каждому элементу items.
+
+        Одновременно в работе находится не более 2 * size элементов, поэтому
+        объем памяти не зависит от длины входной последовательности.
+
+        Последовательность items может выдавать IDLE, если следующий элемент
+        появится позже: тогда пул не ждет его, а отдает завершившиеся
+        результаты и запрашивает элемент снова не позже чем через IDLE_POLL_SECONDS.
+
+        Args:
+            func (callable): Функция обработки страницы, принимающая драйвер и элемент.
+            items (iterable): Элементы для обработки, например ссылки.
+            task_wrapper (callable, optional): Функция, оборачивающая задачу task(item)
+                целиком, вместе с получением драйвера из пула (см. retry_queue.RetryQueue.wrap).
+
+        Yields:
+            tuple: (item, result, error) в порядке завершения обработки. При ошибке
+            result равен None, а error содержит исключение.
+        """
+        def run(item):
+            with self.lease() as driver:
+                return func(driver, item)
+
+        if task_wrapper:
+            run = task_wrapper(run)
+        iterator = iter(items)
+        end = object()
+        exhausted = False
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            pending = {}
+            while True:
+                idle = False
+                while not exhausted and len(pending) < self.size * 2:
+                    item = next(iterator, end)
+                    if item is end:
+                        exhausted = True
+                    elif item is IDLE:
+                        idle = True
+                        break
+                    else:
+                        pending[executor.submit(run, item)] = item
+                if not pending:
+                    if exhausted:
+                        return
+                    continue
+                done, _ = wait(pending, timeout=IDLE_POLL_SECONDS if idle else None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    error = future.exception()
+                    yield item, (None if error else future.result()), error
+
+    def close(self):
+        """Закрывает все свободные драйверы пула."""
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if driver is not None:
+                self._quit(driver)
@@ -0,0 +1,128 @@
+import threading
+
+BLOCKED_URL_PATTERNS = [
+    # изображения и медиа
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.m3u8",
+    # шрифты
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    # реклама и счетчики
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*mc.yandex.ru*", "*an.yandex.ru*", "*yandex.ru/ads*", "*adfox.ru*",
+    "*top-fwz1.mail.ru*", "*vk.com/rtrg*", "*connect.facebook.net*", "*criteo.*",
+]
+
+CONTENT_SETTINGS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.managed_default_content_settings.media_stream": 2,
+    "profile.managed_default_content_settings.notifications": 2,
+}
+
+PAGE_STATS_SCRIPT = """
+const navigation = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+let bytes = navigation ? navigation.transferSize : 0;
+for (const resource of resources) {
+    bytes += resource.transferSize;
+}
+return {
+    bytes: bytes,
+    resources: resources.length,
+    dom_ready_ms: navigation ? navigation.domContentLoadedEventEnd - navigation.startTime : null
+};
+"""
+
+RESPONSE_STATUS_SCRIPT = """
+const navigation = performance.getEntriesByType('navigation')[0];
+return navigation && navigation.responseStatus ? navigation.responseStatus : null;
+"""
+
+
+def apply_lite_options(options):
+    """Настраивает облегченный профиль загрузки страниц.
+
+    Страница считается загруженной после DOMContentLoaded (стратегия eager),
+    изображения и медиа отключаются настройками профиля.
+
+    Args:
+        options (selenium.webdriver.ChromeOptions): Опции, которые будут изменены.
+    """
+    options.page_load_strategy = "eager"
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_experimental_option("prefs", CONTENT_SETTINGS)
+
+
+def enable_request_blocking(driver, patterns=None):
+    """Блокирует запросы к ресурсам, не нужным для чтения текста страницы.
+
+    Использует Chrome DevTools Protocol (Network.setBlockedURLs): запросы
+    к изображениям, медиа, шрифтам и сторонним рекламным и аналитическим
+    хостам отменяются до отправки в сеть.
+
+    Args:
+        driver (selenium.webdriver.Chrome): Драйвер Chromium.
+        patterns (list[str], optional): Шаблоны адресов вместо BLOCKED_URL_PATTERNS.
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns or BLOCKED_URL_PATTERNS})
+
+
+def response_status(driver):
+    """Возвращает HTTP-статус загруженной в браузер страницы или None, если он недоступен.
+
+    Статус берется из Navigation Timing (поле responseStatus, Chrome 109+),
+    поэтому отдельный запрос к странице не нужен.
+    """
+    try:
+        return driver.execute_script(RESPONSE_STATUS_SCRIPT)
+    except Exception:
+        return None
+
+
+class PageLoadStats:
+    """Накопительная статистика загрузки страниц: объем трафика и время.
+
+    Объем берется из Resource Timing API браузера (transferSize), поэтому для
+    сторонних ресурсов без заголовка Timing-Allow-Origin он занижен; это
+    нижняя оценка, пригодная для сравнения профилей между собой.
+    """
+
+    def __init__(self):
+        self.pages = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, driver, url, elapsed):
+        """Снимает статистику только что загруженной страницы и добавляет ее к итогам.
+
+        Args:
+            driver (selenium.webdriver.Remote): Драйвер с загруженной страницей.
+            url (str): Адрес страницы.
+            elapsed (float): Время загрузки в секундах.
+
+        Returns:
+            dict: Статистика страницы (bytes, resources, dom_ready_ms).
+        """
+        try:
+            stats = driver.execute_script(PAGE_STATS_SCRIPT) or {}
+        except Exception:
+            stats = {}
+        page_bytes = stats.get("bytes") or 0
+        with self._lock:
+            self.pages += 1
+            self.bytes += page_bytes
+            self.seconds += elapsed
+        print(f"Загружено {url}: {page_bytes / 1024:.0f} КБ за {elapsed:.2f} с")
+        return stats
+
+    def summary(self):
+        """Возвращает строку со средним объемом и временем загрузки страницы."""
+        with self._lock:
+            if not self.pages:
+                return "Страницы не загружались"
+            return (f"Загружено страниц: {self.pages}, в среднем "
+                    f"{self.bytes / self.pages / 1024:.0f} КБ и {self.seconds / self.pages:.2f} с на страницу")
+
+
+page_stats = PageLoadStats()
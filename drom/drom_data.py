@@ -1,17 +1,93 @@
-import time
-import json
-from selenium import webdriver
+import re
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from extraction import Field, first_word
+from embedded_state import json_ld, number_text
+from site_parser import SiteParser, SiteSpec
+from html_cache import DEFAULT_CACHE_DIR
+from driver_pool import load_page, USER_AGENT, DEFAULT_POOL_SIZE, DEFAULT_MAX_PAGES
+
+CHROME_ARGUMENTS = [
+    "--headless",
+    "--ignore-certificate-errors",
+    "--disable-web-security",
+    "--disable-extensions",
+    "--disable-gpu",
+    "--no-sandbox",
+    f"user-agent={USER_AGENT}",
+]
+
+DETAIL_LINK_PATTERN = re.compile(r"drom\.ru/.+/\d+\.html")
+
+
+DROM = SiteParser(SiteSpec(
+    name="drom",
+    chrome_arguments=CHROME_ARGUMENTS,
+    detail_link_pattern=DETAIL_LINK_PATTERN,
+    wait_locator=(By.CSS_SELECTOR, "h1 span.css-1kb7l9z"),
+    wait_timeout=5,
+    fields=[
+        Field("title", "css:h1 span.css-1kb7l9z"),
+        Field("price", "/html/body/div[2]/div[4]/div[1]/div[1]/div[2]/div[2]/div[1]/div/div[1]",
+              state=json_ld("offers.price", lambda value: f"{number_text(value, grouped=True)} ₽")),
+        Field("description", "/html/body/div[2]/div[4]/div[1]/div[1]/div[2]/div[2]/div[4]/div[1]/span[2]",
+              state=json_ld("description")),
+        Field("engine", "css:td.css-1azz3as.eka0pcn0"),
+        Field("transmission", "//th[contains(text(), 'Коробка передач')]/following-sibling::td"),
+        Field("mileage", "//th[contains(text(), 'Пробег')]/following-sibling::td"),
+        Field("power", "css:span.css-gy2hs8.e162wx9x0", post=first_word),
+        Field("body_type", "//th[contains(text(), 'Кузов')]/following-sibling::td"),
+        Field("drive_type", "//th[contains(text(), 'Привод')]/following-sibling::td"),
+        Field("location", "/html/body/div[2]/div[4]/div[1]/div[1]/div[2]/div[2]/div[4]/div[2]"),
+        Field("publication_date", "/html/body/div[2]/div[4]/div[1]/div[1]/div[2]/div[1]/div[4]/div/div[1]"),
+    ],
+))
+
+
+def extract_drom_record(html, link):
+    """Извлекает запись объявления drom.ru из HTML-снимка страницы.
+
+    Цена и описание берутся из разметки JSON-LD страницы, остальные поля
+    и запасной путь извлекаются из DOM.
 
-def parse_drom_data():
+    Args:
+        html (str): Исходный код страницы объявления.
+        link (str): Ссылка на объявление.
+
+    Returns:
+        dict: Запись с полями объявления в формате drom_data.json.
+    """
+    return DROM.extract_record(html, link)
+
+
+def parse_drom_page(driver, link):
+    """Загружает страницу объявления drom.ru и извлекает из нее запись.
+
+    Исходный код страницы забирается из браузера один раз, все поля
+    извлекаются локально (см. extract_drom_record).
+
+    Args:
+        driver (selenium.webdriver.Remote): Драйвер, выданный пулом.
+        link (str): Ссылка на объявление.
+
+    Returns:
+        dict: Запись с полями объявления в формате drom_data.json.
+    """
+    print(f"Обработка: {link}")
+    try:
+        html = load_page(driver, link, DROM.spec.wait_locator, timeout=DROM.spec.wait_timeout)
+    except TimeoutException:
+        html = driver.page_source
+
+    return extract_drom_record(html, link)
+
+
+def parse_drom_data(pool_size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES, skip_links=None,
+                    links=None, on_record=None, data_path="drom_data.json"):
     """Парсит детальную информацию об автомобилях с сайта по сохраненным ссылкам.
 
-    Функция загружает список ссылок из файла json, последовательно посещает
-    каждую страницу с объявлением и извлекает следующие данные:
+    Функция загружает список ссылок из файла json, параллельно посещает
+    страницы с объявлениями через пул браузеров и извлекает следующие данные:
     - Название автомобиля
     - Цену
     - Описание
@@ -25,7 +101,17 @@ def parse_drom_data():
     - Ссылку на объявление
 
     Args:
-        Нет аргументов.
+        pool_size (int): Число одновременно работающих браузеров.
+        max_pages (int): Число страниц, после которого браузер перезапускается.
+        skip_links (set[str], optional): Ссылки, которые не нужно загружать повторно
+            (инкрементальный режим).
+        links (iterable[str], optional): Ссылки для обработки вместо drom_links.json,
+            например поток ссылок от работающего сборщика (см. pipeline.LinkStream).
+        on_record (callable, optional): Функция, получающая каждую новую запись сразу
+            после извлечения (см. stream_loader).
+        data_path (str): Итоговый файл; контрольная точка ведется рядом в файле .jsonl.
+            Отдельные пути позволяют нескольким процессам парсить свои части
+            списка ссылок (см. sharding).
 
     Returns:
         None: Функция не возвращает значений, но сохраняет результаты в файл.
@@ -37,9 +123,17 @@ def parse_drom_data():
         Exception: Другие возможные исключения при парсинге.
 
     Notes:
-        - Использует headless-режим браузера Chrome.
-        - Добавляет задержки между запросами для имитации человеческого поведения.
+        - Использует пул headless-браузеров Chrome (см. driver_pool.DriverPool)
+          с облегченным профилем загрузки (см. driver_profile).
+        - Частота запросов регулируется адаптивным ограничителем домена (см. rate_limiter).
+        - Забирает исходный код страницы один раз и извлекает поля локально (см. extraction).
+        - Поля сначала читаются из встроенного в страницу JSON-состояния
+          (см. embedded_state), DOM используется как запасной путь.
+        - Страницы сохраняются в кэш (см. html_cache); если свежая копия уже есть,
+          поля извлекаются из нее без обращения к сети.
         - Обрабатывает случаи отсутствия данных, заменяя их на "Не указано".
+        - Каждая запись сразу дописывается в контрольную точку drom_data.jsonl;
+          при повторном запуске уже обработанные ссылки пропускаются.
         - Сохраняет данные в формате JSON с сохранением кириллических символов.
 
     Examples:
@@ -48,119 +142,31 @@ def parse_drom_data():
         Обработка: https://auto.ru/cars/used/sale/.../
         Данные сохранены в json
     """
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--ignore-certificate-errors")
-    chrome_options.add_argument("--disable-web-security")
-    chrome_options.add_argument("--disable-extensions")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument(
-        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    )
-
-    service = Service('C:/chromedriver-win64/chromedriver.exe')
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-
-    with open("drom_links.json", "r", encoding="utf-8") as f:
-        links = json.load(f)
-
-    cars_data = []
-
-    for link in links:
-        print(f"Обработка: {link}")
-        try:
-            driver.get(link)
-            wait = WebDriverWait(driver, 5)
-
-            try:
-                title = wait.until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "h1 span.css-1kb7l9z"))).text.strip()
-            except:
-                title = "Не указано"
-
-            try:
-                price = driver.find_element(By.XPATH,
-                                            "/html/body/div[2]/div[4]/div[1]/div[1]/div[2]/div[2]/div[1]/div/div[1]").text.strip()
-            except:
-                price = "Не указано"
-
-            try:
-                description = driver.find_element(By.XPATH,
-                                                  "/html/body/div[2]/div[4]/div[1]/div[1]/div[2]/div[2]/div[4]/div[1]/span[2]").text.strip()
-            except:
-                description = "Не указано"
-
-            try:
-                location = driver.find_element(By.XPATH,
-                                               "/html/body/div[2]/div[4]/div[1]/div[1]/div[2]/div[2]/div[4]/div[2]").text.strip()
-            except:
-                location = "Не указано"
-
-            try:
-                publication_date = driver.find_element(By.XPATH,
-                                                       "/html/body/div[2]/div[4]/div[1]/div[1]/div[2]/div[1]/div[4]/div/div[1]").text.strip()
-            except:
-                publication_date = "Не указано"
-
-            try:
-                engine = driver.find_element(By.CSS_SELECTOR, "td.css-1azz3as.eka0pcn0").text.strip()
-            except:
-                engine = "Не указано"
-
-            try:
-                transmission = driver.find_element(By.XPATH,
-                                                   "//th[contains(text(), 'Коробка передач')]/following-sibling::td").text.strip()
-            except:
-                transmission = "Не указано"
-
-            try:
-                mileage = driver.find_element(By.XPATH,
-                                              "//th[contains(text(), 'Пробег')]/following-sibling::td").text.strip()
-            except:
-                mileage = "Не указано"
-
-            try:
-                power = driver.find_element(By.CSS_SELECTOR, "span.css-gy2hs8.e162wx9x0").text.split()[0]
-            except:
-                power = "Не указано"
-
-            try:
-                body_type = driver.find_element(By.XPATH,
-                                                "//th[contains(text(), 'Кузов')]/following-sibling::td").text.strip()
-            except:
-                body_type = "Не указано"
-
-            try:
-                drive_type = driver.find_element(By.XPATH,
-                                                 "//th[contains(text(), 'Привод')]/following-sibling::td").text.strip()
-            except:
-                drive_type = "Не указано"
-
-            cars_data.append({
-                "title": title,
-                "price": price,
-                "description": description,
-                "engine": engine,
-                "transmission": transmission,
-                "mileage": mileage,
-                "power": power,
-                "body_type": body_type,
-                "drive_type": drive_type,
-                "location": location,
-                "publication_date": publication_date,
-                "link": link
-            })
-
-        except Exception as e:
-            print(f"Error {link}: {e}")
-            continue
-
-    driver.quit()
-
-    with open("drom_data.json", "w", encoding="utf-8") as f:
-        json.dump(cars_data, f, ensure_ascii=False, indent=4)
-
-    print("Данные сохранены в drom_data.json")
-
-parse_drom_data()
\ No newline at end of file
+    DROM.parse_data(parse_drom_page, pool_size=pool_size, max_pages=max_pages, skip_links=skip_links,
+                    links=links, on_record=on_record, data_path=data_path)
+
+
+def replay_drom_data(source=DEFAULT_CACHE_DIR, workers=None):
+    """Повторно извлекает данные из архивных страниц объявлений без обращения к сети.
+
+    Применяет extract_drom_record ко всем сохраненным страницам объявлений
+    drom из кэша страниц или каталога архивных HTML-файлов параллельно на
+    всех ядрах процессора и сохраняет результат в тех же файлах, что и
+    parse_drom_data.
+
+    Args:
+        source (str): Каталог кэша страниц (см. html_cache) или архива HTML-файлов.
+        workers (int, optional): Число процессов; по умолчанию число CPU.
+
+    Returns:
+        int: Количество извлеченных записей.
+
+    Examples:
+        >>> replay_drom_data("html_cache")
+        Повторно извлечено 300 записей, данные сохранены в drom_data.json
+    """
+    return DROM.replay(extract_drom_record, source, workers)
+
+
+if __name__ == "__main__":
+    parse_drom_data()
@@ -1,21 +1,44 @@
-import time
-import json
-from selenium import webdriver
+from functools import partial
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from bs4 import BeautifulSoup
+import json
+from driver_pool import create_chrome_driver, USER_AGENT
+from http_fetch import fetch_pages
+
+BASE_URL = "https://auto.drom.ru/used/all/"
+
+CHROME_ARGUMENTS = [
+    "--headless",
+    "--ignore-certificate-errors",
+    "--disable-web-security",
+    "--disable-extensions",
+    "--disable-gpu",
+    "--no-sandbox",
+    f"user-agent={USER_AGENT}",
+]
+
 
-def collect_drom_links():
+def drom_page_url(base_url, page):
+    """Возвращает адрес страницы выдачи: первая страница без суффикса, далее pageN/."""
+    return base_url if page == 1 else f"{base_url}page{page}/"
+
+
+def collect_drom_links(base_url=BASE_URL, num_pages=3, use_browser=False, on_links=None):
     """Собирает ссылки на объявления о продаже автомобилей с сайта.
 
-    Функция использует Selenium WebDriver для парсинга страниц с объявлениями.
-    Проходит по указанному количеству страниц, собирает все уникальные ссылки
-    на объявления и сохраняет их в JSON-файл.
+    Функция строит адреса страниц выдачи напрямую (.../used/all/pageN/),
+    загружает их асинхронными HTTP-запросами и обращается к Selenium
+    WebDriver только для страниц, которые требуют отрисовки JavaScript или
+    показывают проверку. Проходит по указанному количеству страниц, собирает
+    все уникальные ссылки на объявления и сохраняет их в JSON-файл.
 
     Args:
-        Нет аргументов.
+        base_url (str): Адрес первой страницы выдачи. Позволяет направить
+            сборщик на локальный стенд с записанными страницами.
+        num_pages (int): Количество страниц выдачи.
+        use_browser (bool): Загружать все страницы через браузер.
+        on_links (callable, optional): Функция on_links(links), которой передаются
+            новые ссылки каждой страницы сразу после ее разбора (см. pipeline).
 
     Returns:
         None: Функция не возвращает значений, но сохраняет результаты в файл.
@@ -25,70 +48,63 @@ def collect_drom_links():
         IOError: При проблемах с сохранением файла.
 
     Notes:
-        - Использует headless-режим браузера для фоновой работы.
+        - Страницы загружаются параллельно через общий пул соединений (см. http_fetch),
+          поэтому ошибка на одной странице не прерывает обход остальных.
+        - Частота запросов регулируется адаптивным ограничителем домена (см. rate_limiter).
+        - Использует headless-режим браузера для запасного пути.
         - Добавляет пользовательский user-agent для обхода защиты.
         - Сохраняет только уникальные ссылки (дубликаты игнорируются).
-        - Включает задержки для имитации человеческого поведения.
+        - Страницы разбираются по мере загрузки, а не после загрузки всех страниц.
 
     Examples:
-        >>> collect_drom_links()
+        >>> collect_drom_links(num_pages=2)
         Обработка страницы 1...
-        Страница 1: Найдено объявлений: 25
+        Страница 1: Найдено объявлений: 20
         Обработка страницы 2...
-        Страница 2: Найдено объявлений: 25
-        Ссылки сохранены в autoru_links.json
+        Страница 2: Найдено объявлений: 20
+        Собрано 40 ссылок на объявления.
     """
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--ignore-certificate-errors")
-    chrome_options.add_argument("--disable-web-security")
-    chrome_options.add_argument("--disable-extensions")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument(
-        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-
-    service = Service('C:/chromedriver-win64/chromedriver.exe')
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-
-    url = "https://auto.drom.ru/used/all/"
-
-    all_ad_links = []
-
-    num_pages = 3
-
-    driver.get(url)
-
-    for page in range(num_pages):
-        print(f"Парсинг страницы {page + 1}...")
-
-        try:
-            wait = WebDriverWait(driver, 10)
-            ad_elements = wait.until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, 'a[data-ftid="bull_title"]')))
-        except Exception as e:
-            print(f"Ошибка при загрузке элементов на странице {page + 1}: {e}")
-            ad_elements = []
-
-        ad_links = [ad.get_attribute('href') for ad in ad_elements if ad.get_attribute('href')]
-        all_ad_links.extend(ad_links)
-
-        print(f"Найдено {len(ad_links)} ссылок на странице {page + 1}.")
-
-        try:
-            next_button = wait.until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, 'a[data-ftid="component_pagination-item-next"]')))
-            next_button.click()
-            time.sleep(1)
-        except Exception as e:
-            print(f"Не удалось перейти на следующую страницу: {e}")
-            break
-
-    driver.quit()
+    urls = [drom_page_url(base_url, page) for page in range(1, num_pages + 1)]
+    page_numbers = {url: page for page, url in enumerate(urls, start=1)}
+    links_set = set()
+
+    def handle_page(url, html):
+        page = page_numbers[url]
+        print(f"Обработка страницы {page}...")
+
+        soup = BeautifulSoup(html, "html.parser")
+
+        listings = soup.select('a[data-ftid="bull_title"]')
+        print(f"Страница {page}: Найдено объявлений: {len(listings)}")
+
+        new_links = []
+        for link_tag in listings:
+            link = link_tag.get("href")
+            if link and link not in links_set:
+                links_set.add(link)
+                new_links.append(link)
+
+        if on_links and new_links:
+            on_links(new_links)
+
+    pages = fetch_pages(
+        urls,
+        ready_marker='data-ftid="bull_title"',
+        browser_factory=partial(create_chrome_driver, CHROME_ARGUMENTS),
+        wait_locator=(By.CSS_SELECTOR, 'a[data-ftid="bull_title"]'),
+        use_browser=use_browser,
+        on_page=handle_page,
+    )
+
+    for page, (url, html) in enumerate(pages, start=1):
+        if html is None:
+            print(f"Ошибка на странице {page}: страница не загружена")
 
     with open('drom_links.json', 'w', encoding='utf-8') as f:
-        json.dump(all_ad_links, f, ensure_ascii=False, indent=4)
+        json.dump(list(links_set), f, ensure_ascii=False, indent=4)
+
+    print(f"Собрано {len(links_set)} ссылок на объявления.")
 
-    print(f"Собрано {len(all_ad_links)} ссылок на объявления.")
 
-collect_drom_links()
\ No newline at end of file
+if __name__ == "__main__":
+    collect_drom_links()
\ No newline at end of file
@@ -1,50 +1,18 @@
 import pandas as pd
 
 
-def transform_drom_data():
-    """Преобразует и очищает данные об автомобилях из файла json.
+def transform_drom_frame(drom_df):
+    """Преобразует и очищает сырые записи объявлений drom.
 
-    Функция выполняет следующие преобразования:
-    - Извлекает марку, модель и год из названия автомобиля
-    - Преобразует цену в числовой формат
-    - Разбирает характеристики двигателя на отдельные компоненты
-    - Нормализует типы кузова, привода и коробки передач
-    - Преобразует дату публикации в формат datetime
-    - Удаляет некорректные записи
-    - Приводит все строковые значения к нижнему регистру
-    - Преобразует пробег в числовой формат
-    - Удаляет ненужные столбцы
+    Выполняет те же преобразования, что и transform_drom_data, но над
+    переданным DataFrame, поэтому подходит и для всего файла, и для
+    небольших пачек записей, получаемых во время парсинга (см. stream_loader).
 
     Args:
-        Нет параметров (работает с файлом json)
+        drom_df (pandas.DataFrame): Записи в формате drom_data.json.
 
     Returns:
-        pandas.DataFrame: Очищенный DataFrame с автомобилями, содержащий столбцы:
-            - brand (str): Марка автомобиля
-            - model (str): Модель автомобиля
-            - year (int): Год выпуска
-            - price (int): Цена в рублях
-            - engine_volume (float): Объем двигателя
-            - engine_type (str): Тип двигателя
-            - body_type (str): Тип кузова
-            - drive_type (str): Тип привода
-            - transmission (str): Тип коробки передач
-            - mileage (int): Пробег в км
-            - location (str): Местоположение
-            - publication_date (datetime): Дата публикации
-            - description (str): Описание
-            - link (str): Ссылка на объявление
-
-    Raises:
-        FileNotFoundError: Если файл autoru_data.json не найден
-        JSONDecodeError: Если файл содержит некорректный JSON
-        KeyError: Если в данных отсутствуют ожидаемые столбцы
-
-    Examples:
-        Index(['brand', 'model', 'year', 'price', 'engine_volume', 'engine_type',
-               'body_type', 'drive_type', 'transmission', 'mileage', 'location',
-               'publication_date', 'description', 'link'],
-              dtype='object')
+        pandas.DataFrame: Очищенный DataFrame (см. transform_drom_data).
     """
     def extract_car_info(title):
         parts = title.split(' ')
@@ -87,19 +55,20 @@ def transform_drom_data():
         publication_date = publication.split("от")[1].strip()
         return publication_date
 
-    drom_df = pd.read_json('drom_data.json')
-
     drom_df['title'] = drom_df['title'].replace("Не указано", None)
     drom_df.dropna(subset=['title'], inplace=True)
-    drom_df[['brand', 'model', 'year']] = drom_df['title'].apply(extract_car_info).apply(pd.Series)
+    drom_df[['brand', 'model', 'year']] = pd.DataFrame(drom_df['title'].apply(extract_car_info).tolist(),
+                                                      index=drom_df.index, columns=['brand', 'model', 'year'])
     drom_df['price'] = drom_df['price'].apply(lambda x: x.replace(' ', '')[:-1]).astype(int)
-    drom_df[['engine_type', 'engine_volume']] = drom_df['engine'].apply(extract_engine).apply(pd.Series)
-    drom_df['transmission'] = drom_df['transmission'].apply(transform_transmission).apply(pd.Series)
-    drom_df['mileage'] = drom_df['mileage'].apply(extract_mileage).apply(pd.Series)
+    drom_df[['engine_type', 'engine_volume']] = pd.DataFrame(drom_df['engine'].apply(extract_engine).tolist(),
+                                                            index=drom_df.index,
+                                                            columns=['engine_type', 'engine_volume'])
+    drom_df['transmission'] = drom_df['transmission'].apply(transform_transmission)
+    drom_df['mileage'] = drom_df['mileage'].apply(extract_mileage)
     drom_df['power'] = drom_df['power'].astype(int)
-    drom_df['drive_type'] = drom_df['drive_type'].apply(extract_drive_type).apply(pd.Series)
-    drom_df['location'] = drom_df['location'].apply(extract_location).apply(pd.Series)
-    drom_df['publication_date'] = drom_df['publication_date'].apply(extract_publication).apply(pd.Series)
+    drom_df['drive_type'] = drom_df['drive_type'].apply(extract_drive_type)
+    drom_df['location'] = drom_df['location'].apply(extract_location)
+    drom_df['publication_date'] = drom_df['publication_date'].apply(extract_publication)
     drom_df['publication_date'] = pd.to_datetime(drom_df['publication_date'], format='%d.%m.%Y')
     drom_df = drom_df.drop(columns=['title', 'power', 'engine'])
     drom_df.columns = drom_df.columns.str.lower()
@@ -114,4 +83,53 @@ def transform_drom_data():
     # print(drom_df.dtypes)
     return drom_df
 
-transform_drom_data()
\ No newline at end of file
+
+def transform_drom_data():
+    """Преобразует и очищает данные об автомобилях из файла json.
+
+    Функция выполняет следующие преобразования:
+    - Извлекает марку, модель и год из названия автомобиля
+    - Преобразует цену в числовой формат
+    - Разбирает характеристики двигателя на отдельные компоненты
+    - Нормализует типы кузова, привода и коробки передач
+    - Преобразует дату публикации в формат datetime
+    - Удаляет некорректные записи
+    - Приводит все строковые значения к нижнему регистру
+    - Преобразует пробег в числовой формат
+    - Удаляет ненужные столбцы
+
+    Args:
+        Нет параметров (работает с файлом json)
+
+    Returns:
+        pandas.DataFrame: Очищенный DataFrame с автомобилями, содержащий столбцы:
+            - brand (str): Марка автомобиля
+            - model (str): Модель автомобиля
+            - year (int): Год выпуска
+            - price (int): Цена в рублях
+            - engine_volume (float): Объем двигателя
+            - engine_type (str): Тип двигателя
+            - body_type (str): Тип кузова
+            - drive_type (str): Тип привода
+            - transmission (str): Тип коробки передач
+            - mileage (int): Пробег в км
+            - location (str): Местоположение
+            - publication_date (datetime): Дата публикации
+            - description (str): Описание
+            - link (str): Ссылка на объявление
+
+    Raises:
+        FileNotFoundError: Если файл autoru_data.json не найден
+        JSONDecodeError: Если файл содержит некорректный JSON
+        KeyError: Если в данных отсутствуют ожидаемые столбцы
+
+    Examples:
+        Index(['brand', 'model', 'year', 'price', 'engine_volume', 'engine_type',
+               'body_type', 'drive_type', 'transmission', 'mileage', 'location',
+               'publication_date', 'description', 'link'],
+              dtype='object')
+    """
+    return transform_drom_frame(pd.read_json('drom_data.json'))
+
+if __name__ == '__main__':
+    transform_drom_data()
\ No newline at end of file
@@ -0,0 +1,148 @@
+import json
+import re
+
+VEHICLE_TYPES = {"Car", "Vehicle", "Product", "Offer", "MotorizedBicycle"}
+LABEL_KEYS = ("label", "title", "name", "caption")
+VALUE_KEYS = ("displayValue", "value", "text", "rawValue")
+
+WINDOW_STATE_PATTERN = re.compile(r"window\.(__[A-Za-z0-9_]+__)\s*=\s*")
+
+_decoder = json.JSONDecoder()
+
+
+class EmbeddedState:
+    """Встроенное в страницу состояние: разметка JSON-LD и JSON-объекты из скриптов.
+
+    Маркетплейсы отдают данные объявления не только в DOM, но и в виде
+    schema.org JSON-LD (script type="application/ld+json") и начального
+    состояния приложения (window.__NAME__ = {...} или script type="application/json").
+    Извлечение из них не зависит от верстки и не требует кликов в браузере.
+
+    Args:
+        json_ld (list[dict]): Объекты JSON-LD, включая элементы @graph.
+        objects (dict): Состояния приложения по имени переменной или id скрипта.
+    """
+
+    def __init__(self, json_ld=None, objects=None):
+        self.json_ld = json_ld or []
+        self.objects = objects or {}
+
+    def __bool__(self):
+        return bool(self.json_ld or self.objects)
+
+    @classmethod
+    def from_tree(cls, tree):
+        """Собирает встроенное состояние из всех тегов script дерева lxml."""
+        state = cls()
+        for script in tree.iter("script"):
+            text = script.text
+            if not text:
+                continue
+            script_type = (script.get("type") or "").lower()
+            if script_type == "application/ld+json":
+                state._add_json_ld(text)
+            elif script_type == "application/json" and script.get("id"):
+                try:
+                    state.objects[script.get("id")] = json.loads(text)
+                except ValueError:
+                    continue
+            else:
+                for match in WINDOW_STATE_PATTERN.finditer(text):
+                    try:
+                        state.objects[match.group(1)] = _decoder.raw_decode(text, match.end())[0]
+                    except ValueError:
+                        continue
+        return state
+
+    def _add_json_ld(self, text):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return
+        items = data if isinstance(data, list) else [data]
+        for item in items:
+            if isinstance(item, dict):
+                self.json_ld.extend(entry for entry in item.get("@graph", [item]) if isinstance(entry, dict))
+
+
+def lookup(data, path):
+    """Возвращает значение по пути вида "offers.price" или "items.0.name"; None, если его нет."""
+    for key in path.split("."):
+        if isinstance(data, list):
+            data = data[int(key)] if key.isdigit() and int(key) < len(data) else None
+        elif isinstance(data, dict):
+            data = data.get(key)
+        else:
+            return None
+        if data is None:
+            return None
+    return data
+
+
+def json_ld(path, convert=str, types=VEHICLE_TYPES):
+    """Создает функцию чтения поля из JSON-LD объекта объявления.
+
+    Args:
+        path (str): Путь к значению, например "offers.price".
+        convert (callable): Преобразование найденного значения в формат *_data.json.
+        types (set[str]): Допустимые значения @type объекта.
+
+    Returns:
+        callable: Функция getter(state), возвращающая строку или None.
+    """
+    def getter(state):
+        for item in state.json_ld:
+            item_types = item.get("@type")
+            item_types = set(item_types) if isinstance(item_types, list) else {item_types}
+            if types and not item_types & types:
+                continue
+            value = lookup(item, path)
+            if value not in (None, "", [], {}):
+                return convert(value)
+        return None
+    return getter
+
+
+def find_labeled_value(data, label):
+    """Рекурсивно ищет объект, подписанный label, и возвращает его отображаемое значение.
+
+    Подходит для списков характеристик вида
+    [{"label": "Год выпуска", "value": "2019"}, ...] независимо от их места
+    в структуре состояния.
+    """
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if any(node.get(key) == label for key in LABEL_KEYS):
+                for key in VALUE_KEYS:
+                    value = node.get(key)
+                    if isinstance(value, (str, int, float)) and value != "":
+                        return str(value)
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+    return None
+
+
+def labeled(label):
+    """Создает функцию чтения характеристики по ее подписи из состояния приложения."""
+    def getter(state):
+        for data in state.objects.values():
+            value = find_labeled_value(data, label)
+            if value:
+                return " ".join(value.split())
+        return None
+    return getter
+
+
+def number_text(value, grouped=False):
+    """Приводит число из JSON (число или строку) к целому числу в виде строки.
+
+    Args:
+        value: Значение, например 1250000 или "1250000.00".
+        grouped (bool): Разделять разряды пробелами, как на странице ("1 250 000"),
+            чтобы значение совпадало с текстом из DOM.
+    """
+    number = int(float(str(value).replace(" ", "")))
+    return f"{number:,}".replace(",", " ") if grouped else str(number)
@@ -0,0 +1,172 @@
+from collections import namedtuple
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
+from lxml.etree import XPath
+from embedded_state import EmbeddedState
+
+NOT_SPECIFIED = "Не указано"
+
+# Символ из области частного использования: отмечает переводы строк, которые
+# браузер показывает на месте <br> и вокруг блочных элементов, и не считается пробельным
+LINE_BREAK = "\ue000"
+
+# Элементы, текст которых браузер не показывает
+HIDDEN_TAGS = {"script", "style", "noscript", "template", "head", "title"}
+# Элементы, которые браузер отделяет от соседнего текста переводами строк
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "dd", "div", "dl", "dt", "fieldset", "figcaption",
+    "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main",
+    "nav", "ol", "p", "pre", "section", "table", "tr", "ul",
+}
+
+Field = namedtuple("Field", ["name", "selectors", "post", "state"], defaults=[None, None])
+Field.__doc__ = """Описание одного поля записи.
+
+Args:
+    name (str): Имя поля в записи *_data.json.
+    selectors (str | list[str]): XPath-выражение или список выражений, которые
+        проверяются по порядку до первого совпадения. Префикс "css:" означает
+        CSS-селектор.
+    post (callable, optional): Функция постобработки найденного текста.
+    state (callable | list[callable], optional): Функции чтения поля из
+        встроенного состояния страницы (см. embedded_state). Проверяются до
+        селекторов; селекторы используются, только если ни одна не вернула значение.
+"""
+
+
+def compile_selector(selector):
+    """Компилирует XPath-выражение или CSS-селектор (с префиксом "css:")."""
+    if selector.startswith("css:"):
+        return CSSSelector(selector[len("css:"):])
+    return XPath(selector)
+
+
+def is_hidden(element):
+    """Проверяет, что браузер не показывает элемент и его содержимое."""
+    if not isinstance(element.tag, str) or element.tag in HIDDEN_TAGS:
+        return True
+    if element.get("hidden") is not None or element.get("aria-hidden") == "true":
+        return True
+    return "display:none" in (element.get("style") or "").replace(" ", "").lower()
+
+
+def visible_text(element):
+    """Возвращает видимый текст элемента с отметками LINE_BREAK на месте переводов строк.
+
+    Текст скрытых элементов (script, style, атрибут hidden, display: none)
+    пропускается, <br> и границы блочных элементов дают перевод строки,
+    как в свойстве text элемента WebDriver.
+    """
+    parts = []
+
+    def walk(node):
+        if is_hidden(node):
+            return
+        block = node.tag in BLOCK_TAGS
+        if block:
+            parts.append(LINE_BREAK)
+        parts.append(node.text or "")
+        for child in node:
+            walk(child)
+            parts.append(child.tail or "")
+        if block or node.tag == "br":
+            parts.append(LINE_BREAK)
+
+    walk(element)
+    return "".join(parts)
+
+
+def node_text(node):
+    """Возвращает текст узла так, как его показывает WebDriver.
+
+    Пробельные символы схлопываются в один пробел, видимые переводы строк
+    сохраняются, пустые строки отбрасываются. Результат XPath-выражения
+    вида @attr обрабатывается так же.
+    """
+    value = node if isinstance(node, str) else visible_text(node)
+    lines = (" ".join(line.split()) for line in value.split(LINE_BREAK))
+    return "\n".join(line for line in lines if line)
+
+
+def first_word(value):
+    """Постобработка: оставляет только первое слово значения."""
+    words = value.split()
+    return words[0] if words else NOT_SPECIFIED
+
+
+def strip_label(label):
+    """Постобработка: удаляет подпись параметра, например "Привод:", из значения."""
+    return lambda value: value.replace(label, "").strip()
+
+
+def state_value(state, getters):
+    """Возвращает первое значение поля, найденное во встроенном состоянии, или None."""
+    for getter in getters:
+        try:
+            value = getter(state)
+        except (KeyError, IndexError, TypeError, ValueError):
+            continue
+        if value:
+            return value
+    return None
+
+
+def parse_html(html):
+    """Разбирает HTML-снимок страницы в дерево lxml (текст узлов см. в node_text)."""
+    return lxml_html.fromstring(html)
+
+
+class Extractor:
+    """Извлекает набор полей из HTML-снимка страницы за один проход.
+
+    Селекторы компилируются один раз при создании объекта и затем
+    применяются к дереву lxml локально, без обращений к WebDriver. Если у
+    поля задано чтение из встроенного состояния (JSON-LD, window.__STATE__),
+    значение берется оттуда, а DOM используется как запасной путь.
+
+    Args:
+        fields (list[Field]): Поля записи в порядке их следования в *_data.json.
+
+    Examples:
+        >>> extractor = Extractor([Field("title", "//h1"), Field("price", "css:span.price")])
+        >>> extractor.extract(driver.page_source)
+        {'title': 'Chery Arrizo 8, 2023', 'price': '1 999 999 ₽'}
+    """
+
+    def __init__(self, fields):
+        self.fields = []
+        for field in fields:
+            selectors = [field.selectors] if isinstance(field.selectors, str) else field.selectors
+            getters = [field.state] if callable(field.state) else list(field.state or [])
+            self.fields.append((field.name, [compile_selector(s) for s in selectors], field.post, getters))
+        self.uses_state = any(getters for _, _, _, getters in self.fields)
+
+    def extract(self, html):
+        """Извлекает все поля из HTML-снимка.
+
+        Args:
+            html (str): Исходный код страницы.
+
+        Returns:
+            dict: Значения полей. Для ненайденных полей используется "Не указано".
+        """
+        tree = parse_html(html)
+        state = EmbeddedState.from_tree(tree) if self.uses_state else None
+        record = {}
+        for name, selectors, post, getters in self.fields:
+            value = state_value(state, getters) if state else None
+            if value is not None:
+                record[name] = value
+                continue
+            value = NOT_SPECIFIED
+            for selector in selectors:
+                result = selector(tree)
+                if not isinstance(result, list):
+                    result = [result] if result else []
+                if result:
+                    value = node_text(result[0])
+                    break
+            if post and value != NOT_SPECIFIED:
+                value = post(value)
+            record[name] = value
+        return record
@@ -0,0 +1,235 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import zstandard
+
+DEFAULT_CACHE_DIR = "html_cache"
+DEFAULT_TTL_DAYS = 30
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+DEFAULT_FRESH_SECONDS = 24 * 60 * 60
+COMPRESSION_LEVEL = 10
+# Индекс открывают одновременно несколько процессов (шарды, см. sharding):
+# журнал WAL позволяет читать во время записи, а запись ждет освобождения
+# блокировки до INDEX_LOCK_TIMEOUT секунд вместо ошибки "database is locked"
+INDEX_LOCK_TIMEOUT = 60
+EVICT_INTERVAL_SECONDS = 60 * 60
+EVICT_WRITTEN_FRACTION = 0.05
+
+TRACKING_PARAMS = {"from", "context", "source_view", "_"}
+TRACKING_PREFIXES = ("utm_",)
+
+
+def canonical_url(url):
+    """Приводит адрес к каноническому виду для использования в ключе кэша.
+
+    Схема и хост переводятся в нижний регистр, фрагмент и метки отслеживания
+    (utm_*, from, context, source_view) отбрасываются, параметры запроса сортируются.
+
+    Examples:
+        >>> canonical_url("https://WWW.avito.ru/moskva/avtomobili/x_123?context=abc&b=2&a=1#photo")
+        'https://www.avito.ru/moskva/avtomobili/x_123?a=1&b=2'
+    """
+    parts = urlsplit(url)
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if key not in TRACKING_PARAMS and not key.startswith(TRACKING_PREFIXES))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), ""))
+
+
+class HtmlCache:
+    """Дисковый кэш загруженных HTML-страниц.
+
+    Записи индексируются по каноническому адресу и дате загрузки, а сами
+    страницы хранятся в сжатом zstd виде под именем, равным SHA-256 их
+    содержимого, поэтому одинаковые страницы занимают место один раз.
+    Индекс ведется в SQLite. Записи старше ttl_days удаляются, а при
+    превышении max_bytes удаляются записи, к которым дольше всего не обращались.
+    Очистка запускается из put() раз в EVICT_INTERVAL_SECONDS или после
+    записи EVICT_WRITTEN_FRACTION от max_bytes новых данных, поэтому кэш
+    не разрастается в долгоживущих процессах.
+
+    Args:
+        directory (str): Каталог кэша.
+        ttl_days (int): Срок хранения записей в днях.
+        max_bytes (int): Максимальный суммарный размер сжатых страниц.
+
+    Examples:
+        >>> cache = HtmlCache("html_cache")
+        >>> cache.put("https://auto.drom.ru/moscow/toyota/camry/123.html", html)
+        >>> cache.get("https://auto.drom.ru/moscow/toyota/camry/123.html")
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, ttl_days=DEFAULT_TTL_DAYS, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.ttl_days = ttl_days
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._evicted_at = time.time()
+        self._written_since_evict = 0
+        self._db = sqlite3.connect(os.path.join(directory, "index.sqlite"), timeout=INDEX_LOCK_TIMEOUT,
+                                   check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT NOT NULL,
+                fetch_date TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (url, fetch_date)
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+        """)
+
+    def _blob_path(self, digest):
+        return os.path.join(self.directory, "objects", digest[:2], digest + ".html.zst")
+
+    def get(self, url, max_age=DEFAULT_FRESH_SECONDS):
+        """Возвращает последнюю сохраненную версию страницы, если она не старше max_age.
+
+        Args:
+            url (str): Адрес страницы.
+            max_age (float, optional): Допустимый возраст записи в секундах;
+                None означает любую версию в пределах срока хранения.
+
+        Returns:
+            str | None: HTML страницы или None, если свежей записи нет.
+        """
+        key = canonical_url(url)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fetch_date, digest, fetched_at FROM entries WHERE url = ? "
+                "ORDER BY fetched_at DESC LIMIT 1", (key,)).fetchone()
+            if row is None or (max_age is not None and now - row[2] > max_age):
+                return None
+            self._db.execute("UPDATE entries SET accessed_at = ? WHERE url = ? AND fetch_date = ?",
+                             (now, key, row[0]))
+            self._db.commit()
+        try:
+            with open(self._blob_path(row[1]), "rb") as f:
+                return zstandard.ZstdDecompressor().decompress(f.read()).decode("utf-8")
+        except (OSError, zstandard.ZstdError):
+            return None
+
+    def put(self, url, html):
+        """Сохраняет страницу под ключом (канонический адрес, сегодняшняя дата).
+
+        Args:
+            url (str): Адрес страницы.
+            html (str): Исходный код страницы.
+
+        Returns:
+            str: SHA-256 содержимого страницы.
+        """
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            compressed = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL).compress(data)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR IGNORE INTO blobs (digest, size) VALUES (?, ?)", (digest, size))
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (url, fetch_date, digest, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (canonical_url(url), date.today().isoformat(), digest, now, now))
+            self._db.commit()
+            self._written_since_evict += size
+            due = (now - self._evicted_at >= EVICT_INTERVAL_SECONDS
+                   or self._written_since_evict >= self.max_bytes * EVICT_WRITTEN_FRACTION)
+            if due:
+                self._evicted_at = now
+                self._written_since_evict = 0
+        if due:
+            self.evict()
+        return digest
+
+    def iter_entries(self, latest_only=False):
+        """Перебирает все сохраненные страницы.
+
+        Args:
+            latest_only (bool): Возвращать только последнюю версию каждой страницы.
+
+        Yields:
+            tuple: (url, fetch_date, html) для каждой записи индекса.
+        """
+        if latest_only:
+            query = "SELECT url, MAX(fetch_date), digest FROM entries GROUP BY url ORDER BY url"
+        else:
+            query = "SELECT url, fetch_date, digest FROM entries ORDER BY url, fetch_date"
+        with self._lock:
+            rows = self._db.execute(query).fetchall()
+        for url, fetch_date, digest in rows:
+            try:
+                with open(self._blob_path(digest), "rb") as f:
+                    yield url, fetch_date, zstandard.ZstdDecompressor().decompress(f.read()).decode("utf-8")
+            except (OSError, zstandard.ZstdError):
+                continue
+
+    def evict(self):
+        """Удаляет устаревшие записи и сокращает кэш до max_bytes.
+
+        Returns:
+            int: Количество удаленных файлов страниц.
+        """
+        with self._lock:
+            self._evicted_at = time.time()
+            self._written_since_evict = 0
+            self._db.execute("DELETE FROM entries WHERE fetched_at < ?",
+                             (time.time() - self.ttl_days * 24 * 60 * 60,))
+            total = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM blobs WHERE digest IN (SELECT digest FROM entries)"
+            ).fetchone()[0]
+            if total > self.max_bytes:
+                rows = self._db.execute(
+                    "SELECT e.url, e.fetch_date, e.digest, b.size FROM entries e JOIN blobs b ON b.digest = e.digest "
+                    "ORDER BY e.accessed_at").fetchall()
+                references = {}
+                for _, _, digest, _ in rows:
+                    references[digest] = references.get(digest, 0) + 1
+                for url, fetch_date, digest, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    self._db.execute("DELETE FROM entries WHERE url = ? AND fetch_date = ?", (url, fetch_date))
+                    references[digest] -= 1
+                    if not references[digest]:
+                        total -= size
+            orphans = [row[0] for row in self._db.execute(
+                "SELECT digest FROM blobs WHERE digest NOT IN (SELECT digest FROM entries)")]
+            self._db.executemany("DELETE FROM blobs WHERE digest = ?", [(digest,) for digest in orphans])
+            self._db.commit()
+        for digest in orphans:
+            try:
+                os.remove(self._blob_path(digest))
+            except OSError:
+                pass
+        return len(orphans)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Возвращает общий для процесса кэш страниц, при первом обращении очищая устаревшие записи."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HtmlCache()
+            _cache.evict()
+        return _cache
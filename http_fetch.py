@@ -0,0 +1,252 @@
+import asyncio
+import importlib.util
+import os
+import re
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, urlsplit
+import httpx
+from driver_pool import USER_AGENT, budgeted_driver, load_page
+from html_cache import get_cache
+from rate_limiter import get_limiter, is_challenge_page
+
+DEFAULT_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "ru-RU,ru;q=0.9,en;q=0.8",
+}
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 15
+
+BLOCKED_STATUSES = {401, 403, 429, 503}
+JAVASCRIPT_MARKERS = ("enable javascript", "включите javascript")
+# Обычные страницы тоже просят включить JavaScript, но внутри <noscript>,
+# который браузер не показывает; такие блоки и скрипты при проверке не учитываются
+INVISIBLE_BLOCKS = re.compile(r"<(noscript|script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+
+
+def needs_browser(status_code, html, ready_marker=None):
+    """Определяет, нужно ли загружать страницу через Selenium.
+
+    Страница считается непригодной для разбора без браузера, если сервер
+    ответил статусом блокировки, вернул страницу с проверкой (капчей) или
+    в ответе нет маркера, который появляется только после отрисовки списка.
+
+    Args:
+        status_code (int): HTTP-статус ответа.
+        html (str): Тело ответа.
+        ready_marker (str, optional): Подстрока, обязательная для готовой страницы.
+
+    Returns:
+        bool: True, если страницу нужно загрузить в браузере.
+    """
+    if status_code in BLOCKED_STATUSES or is_challenge_page(html):
+        return True
+    visible = INVISIBLE_BLOCKS.sub("", html).lower()
+    if any(marker in visible for marker in JAVASCRIPT_MARKERS):
+        return True
+    if ready_marker and ready_marker not in html:
+        return True
+    return False
+
+
+async def fetch_all(urls, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT, headers=None, on_result=None):
+    """Асинхронно загружает страницы через общий пул HTTP-соединений.
+
+    Использует keep-alive и HTTP/2, если установлен пакет h2. Каждый запрос
+    проходит через ограничитель частоты своего домена (см. rate_limiter).
+
+    Args:
+        urls (list[str]): Адреса страниц.
+        concurrency (int): Максимальное число одновременных запросов.
+        timeout (float): Таймаут одного запроса в секундах.
+        headers (dict, optional): Заголовки запроса вместо DEFAULT_HEADERS.
+        on_result (callable, optional): Функция on_result(url, status_code, html),
+            вызываемая сразу после получения каждого ответа.
+
+    Returns:
+        list[tuple]: Кортежи (url, status_code, html) в порядке urls. При сетевой
+        ошибке status_code и html равны None.
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    http2 = importlib.util.find_spec("h2") is not None
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(http2=http2, headers=headers or DEFAULT_HEADERS, limits=limits,
+                                 timeout=timeout, follow_redirects=True) as client:
+        async def fetch(url):
+            limiter = get_limiter(url)
+            async with semaphore:
+                await limiter.acquire_async()
+                started = time.monotonic()
+                try:
+                    response = await client.get(url)
+                except httpx.HTTPError as e:
+                    limiter.report(time.monotonic() - started, blocked=isinstance(e, httpx.TimeoutException))
+                    print(f"Ошибка загрузки {url}: {e}")
+                    result = url, None, None
+                else:
+                    limiter.report(time.monotonic() - started, response.status_code,
+                                   is_challenge_page(response.text, str(response.url)))
+                    result = url, response.status_code, response.text
+            if on_result:
+                on_result(*result)
+            return result
+
+        return await asyncio.gather(*(fetch(url) for url in urls))
+
+
+def fetch_with_browser(urls, browser_factory, wait_locator=None, timeout=10, on_page=None):
+    """Загружает страницы в одном браузере и возвращает их исходный код.
+
+    Браузер занимает слот общего лимита браузеров (см. driver_pool.budgeted_driver).
+
+    Args:
+        urls (list[str]): Адреса страниц.
+        browser_factory (callable): Функция без аргументов, создающая драйвер.
+        wait_locator (tuple, optional): Локатор (By, selector), появление которого ожидается.
+        timeout (float): Время ожидания локатора в секундах.
+        on_page (callable, optional): Функция on_page(url, html), вызываемая для
+            каждой загруженной страницы.
+
+    Returns:
+        dict: Соответствие url -> html. Страницы, которые не загрузились, отсутствуют.
+    """
+    pages = {}
+    with budgeted_driver(browser_factory) as driver:
+        for url in urls:
+            try:
+                pages[url] = load_page(driver, url, wait_locator, timeout, use_cache=False)
+            except Exception as e:
+                print(f"Ошибка загрузки {url} в браузере: {e}")
+                continue
+            if on_page:
+                on_page(url, pages[url])
+    return pages
+
+
+def fetch_pages(urls, ready_marker=None, browser_factory=None, wait_locator=None,
+                concurrency=DEFAULT_CONCURRENCY, use_browser=False, cache_max_age=None, on_page=None):
+    """Загружает страницы по HTTP и обращается к браузеру только при необходимости.
+
+    Сначала все страницы запрашиваются асинхронно без браузера. Страницы,
+    для которых needs_browser вернула True, а также страницы с сетевой
+    ошибкой повторно загружаются через Selenium, если передан browser_factory.
+    Полученные страницы сохраняются в кэш (см. html_cache) для повторного
+    извлечения без сети; из кэша они читаются, только если задан cache_max_age.
+    Если передан on_page, он вызывается для каждой страницы сразу после ее
+    получения, не дожидаясь остальных, что позволяет обрабатывать выдачу
+    потоком (см. pipeline).
+
+    Args:
+        urls (list[str]): Адреса страниц.
+        ready_marker (str, optional): Подстрока, обязательная для готовой страницы.
+        browser_factory (callable, optional): Функция, создающая драйвер для запасного пути.
+        wait_locator (tuple, optional): Локатор, ожидаемый в браузере.
+        concurrency (int): Максимальное число одновременных HTTP-запросов.
+        use_browser (bool): Загружать все страницы сразу через браузер.
+        cache_max_age (float, optional): Допустимый возраст копии в кэше в секундах.
+        on_page (callable, optional): Функция on_page(url, html) для каждой полученной страницы.
+
+    Returns:
+        list[tuple]: Пары (url, html) в порядке urls. Если страницу получить
+        не удалось, html равен None.
+
+    Examples:
+        >>> pages = fetch_pages(["https://auto.ru/rossiya/cars/used/?page=1"], ready_marker="ListingItem")
+        >>> url, html = pages[0]
+    """
+    cache = get_cache()
+    pages = {}
+    if cache_max_age is not None:
+        for url in urls:
+            html = cache.get(url, max_age=cache_max_age)
+            if html is not None:
+                pages[url] = html
+                if on_page:
+                    on_page(url, html)
+    missing = [url for url in urls if url not in pages]
+    fallback = list(missing)
+
+    if missing and not use_browser:
+        fallback = []
+
+        def handle_result(url, status_code, html):
+            if html is None or needs_browser(status_code, html, ready_marker):
+                fallback.append(url)
+                return
+            pages[url] = html
+            if on_page:
+                on_page(url, html)
+
+        asyncio.run(fetch_all(missing, concurrency, on_result=handle_result))
+        fallback.sort(key=missing.index)
+
+    if fallback and browser_factory:
+        print(f"Страниц, требующих браузер: {len(fallback)}")
+        pages.update(fetch_with_browser(fallback, browser_factory, wait_locator, on_page=on_page))
+
+    for url in missing:
+        if url in pages:
+            cache.put(url, pages[url])
+
+    return [(url, pages.get(url)) for url in urls]
+
+
+def recorded_page_path(directory, url):
+    """Возвращает путь к файлу, в котором хранится записанная страница для url."""
+    parts = urlsplit(url)
+    key = parts.path + ("?" + parts.query if parts.query else "")
+    return os.path.join(directory, quote(key, safe="") + ".html")
+
+
+def record_page(directory, url, html):
+    """Сохраняет страницу в каталог записанных страниц для локального стенда."""
+    os.makedirs(directory, exist_ok=True)
+    with open(recorded_page_path(directory, url), "w", encoding="utf-8") as f:
+        f.write(html)
+
+
+def serve_recorded_pages(directory, host="127.0.0.1", port=0):
+    """Запускает локальный HTTP-сервер, отдающий записанные страницы.
+
+    Сервер заменяет сайт при отладке и проверке сборщиков ссылок: запрос
+    /path?query отдает файл, ранее сохраненный через record_page для
+    адреса с тем же путем и параметрами. Для остальных адресов возвращается 404.
+
+    Args:
+        directory (str): Каталог с записанными страницами.
+        host (str): Адрес для прослушивания.
+        port (int): Порт; 0 означает любой свободный.
+
+    Returns:
+        tuple: (server, base_url). Сервер работает в фоновом потоке и
+        останавливается вызовом server.shutdown().
+
+    Examples:
+        >>> server, base_url = serve_recorded_pages("recorded/autoru")
+        >>> collect_autoru_links(base_url=base_url + "/rossiya/cars/used/?page=")
+        >>> server.shutdown()
+    """
+    class RecordedPageHandler(SimpleHTTPRequestHandler):
+        def do_GET(self):
+            path = recorded_page_path(directory, "http://stand" + self.path)
+            if not os.path.exists(path):
+                self.send_error(404)
+                return
+            with open(path, "rb") as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), RecordedPageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
@@ -0,0 +1,120 @@
+import json
+import os
+from contextlib import contextmanager
+from datetime import date, timedelta
+from html_cache import canonical_url
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+DEFAULT_MAX_AGE_DAYS = 7
+
+
+def lock_file(f):
+    """Захватывает исключительную блокировку открытого файла f, ожидая ее освобождения."""
+    if os.name == "nt":
+        f.seek(0)
+        while True:
+            try:
+                # LK_LOCK сам повторяет попытку в течение 10 секунд
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+    fcntl.flock(f, fcntl.LOCK_EX)
+
+
+def unlock_file(f):
+    """Освобождает блокировку, захваченную lock_file."""
+    if os.name == "nt":
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class LinkIndex:
+    """Локальный индекс загруженных объявлений: ссылка -> дата последней загрузки.
+
+    Индекс дополняет столбец link целевой таблицы: по нему определяется,
+    какие из уже сохраненных объявлений устарели и должны быть загружены заново.
+    Ссылки хранятся в каноническом виде (см. html_cache.canonical_url), поэтому
+    одна и та же страница, собранная в разных сеансах, занимает одну запись.
+
+    Индекс обновляют одновременно несколько процессов (шарды, см.
+    sharding), поэтому чтение, изменение и сохранение выполняются под
+    файловой блокировкой (см. locked), а файл заменяется целиком.
+
+    Args:
+        path (str): Путь к файлу индекса в формате JSON.
+
+    Examples:
+        >>> with LinkIndex.locked("autoru_index.json") as index:
+        ...     skip_links = index.fresh_links(stored_links, max_age_days=7)
+        ...     index.touch(loaded_links)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for link, stamp in json.load(f).items():
+                    link = canonical_url(link)
+                    self.entries[link] = max(stamp, self.entries.get(link, stamp))
+
+    def touch(self, links, when=None):
+        """Отмечает ссылки как загруженные в указанную дату (по умолчанию сегодня)."""
+        stamp = (when or date.today()).isoformat()
+        for link in links:
+            self.entries[canonical_url(link)] = stamp
+
+    def fresh_links(self, stored_links, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        """Возвращает сохраненные ссылки, которые не нужно загружать повторно.
+
+        Ссылка считается свежей, если с ее последней загрузки прошло не больше
+        max_age_days дней. Ссылки из таблицы, которых еще нет в индексе,
+        считаются загруженными сегодня и добавляются в индекс.
+
+        Args:
+            stored_links (iterable[str]): Ссылки из столбца link целевой таблицы.
+            max_age_days (int): Срок, после которого объявление загружается заново.
+
+        Returns:
+            set: Канонические ссылки, которые можно пропустить.
+        """
+        threshold = (date.today() - timedelta(days=max_age_days)).isoformat()
+        today = date.today().isoformat()
+        fresh = set()
+        for link in map(canonical_url, stored_links):
+            stamp = self.entries.setdefault(link, today)
+            if stamp >= threshold:
+                fresh.add(link)
+        return fresh
+
+    def save(self):
+        """Сохраняет индекс на диск, заменяя файл целиком, чтобы читатели не видели его наполовину записанным."""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    @classmethod
+    @contextmanager
+    def locked(cls, path):
+        """Загружает индекс под блокировкой файла <path>.lock и сохраняет его при выходе из блока.
+
+        Пока блокировка удерживается, другие процессы ждут ее, поэтому их
+        изменения не затирают друг друга. Если в блоке возникло исключение,
+        индекс не сохраняется.
+        """
+        with open(f"{path}.lock", "a") as lock:
+            lock_file(lock)
+            try:
+                index = cls(path)
+                yield index
+                index.save()
+            finally:
+                unlock_file(lock)
@@ -1,19 +1,33 @@
+import io
 import logging
-from sqlalchemy import create_engine, text
+from itertools import chain, islice
+import pandas as pd
+import psycopg2
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
+from database import get_engine
+from html_cache import canonical_url
+from schema import (LISTINGS_TABLE, LISTING_COLUMNS, LOOKUP_COLUMNS, LISTING_INDEXES, source_table,
+                    create_source_partition, create_listing_indexes, merge_listings)
 
+COPY_CHUNK_SIZE = 10000
 
-def drop_table_postgresql(user, password, host, port, database, table_name):
+# PostgreSQL column types for pandas dtype kinds; everything else is stored as TEXT
+POSTGRESQL_TYPES = {
+    'i': 'BIGINT',
+    'u': 'BIGINT',
+    'f': 'DOUBLE PRECISION',
+    'b': 'BOOLEAN',
+    'M': 'TIMESTAMP',
+}
+
+def drop_table_postgresql(table_name, dsn=None):
     """
     Drops a table in PostgreSQL database.
 
     Args:
-        user (str): PostgreSQL username
-        password (str): PostgreSQL password
-        host (str): PostgreSQL host
-        port (str): PostgreSQL port
-        database (str): Database name
         table_name (str): Name of the table to drop
+        dsn (str, optional): Database URL; by default taken from configuration (see database.database_url)
 
     Returns:
         bool: True if table was dropped successfully, False otherwise
@@ -21,8 +35,7 @@ def drop_table_postgresql(user, password, host, port, database, table_name):
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     logger = logging.getLogger(__name__)
 
-    connection_string = f'postgresql://{user}:{password}@{host}:{port}/{database}'
-    engine = create_engine(connection_string)
+    engine = get_engine(dsn)
 
     try:
         logger.info(f"Attempting to drop table '{table_name}'")
@@ -39,28 +52,32 @@ def drop_table_postgresql(user, password, host, port, database, table_name):
         logger.error(f"Error dropping table '{table_name}': {e}")
         return False
 
-    finally:
-        engine.dispose()
-        logger.info("Database connection closed")
-
-def migrate_data_postgresql(user, password, host, port, database, df, table_name):
+def migrate_data_postgresql(df, table_name, if_exists='replace', method='copy', dsn=None):
     """
     Migrate data from a pandas DataFrame to a PostgreSQL table.
 
+    Args:
+        if_exists (str): Behaviour when the table exists, passed to DataFrame.to_sql
+            ('replace' for a full reload, 'append' for incremental loads)
+        method (str): 'copy' streams rows through COPY FROM STDIN (see bulk_load_postgresql),
+            'insert' uses DataFrame.to_sql with row INSERTs
+        dsn (str, optional): Database URL; by default taken from configuration (see database.database_url)
+
     Returns:
         bool: True if migration is successful, False otherwise.
     """
+    if method == 'copy':
+        return bulk_load_postgresql(df, table_name, if_exists=if_exists, dsn=dsn)
 
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     logger = logging.getLogger(__name__)
 
-    connection_string = f'postgresql://{user}:{password}@{host}:{port}/{database}'
-    engine = create_engine(connection_string)
+    engine = get_engine(dsn)
 
     try:
         logger.info(f"Starting data migration to PostgreSQL table '{table_name}'.")
 
-        df.to_sql(table_name, engine, if_exists='replace', index=False)
+        df.to_sql(table_name, engine, if_exists=if_exists, index=False)
 
         logger.info(f"Data successfully migrated to table '{table_name}'.")
         return True
@@ -69,6 +86,355 @@ def migrate_data_postgresql(user, password, host, port, database, df, table_name
         logger.error(f"An error occurred while migrating data to PostgreSQL: {e}")
         return False
 
+def fetch_links_postgresql(table_name, dsn=None):
+    """
+    Fetches the set of ad links already stored in a PostgreSQL table.
+
+    Args:
+        table_name (str): Name of the table with a 'link' column
+        dsn (str, optional): Database URL; by default taken from configuration (see database.database_url)
+
+    Returns:
+        set: Stored links, or an empty set if the table does not exist yet
+    """
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger(__name__)
+
+    engine = get_engine(dsn)
+
+    try:
+        with engine.connect() as connection:
+            result = connection.execute(text(f'SELECT link FROM {table_name}'))
+            links = {row[0] for row in result}
+
+        logger.info(f"Fetched {len(links)} stored links from table '{table_name}'")
+        return links
+
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not fetch links from table '{table_name}': {e}")
+        return set()
+
+def postgresql_column_types(df, column_types=None):
+    """
+    Maps DataFrame columns to PostgreSQL column types.
+
+    Args:
+        df (pandas.DataFrame): Data to be loaded
+        column_types (dict, optional): Explicit types by column name, e.g. {'price': 'INTEGER'},
+            overriding the types derived from dtypes
+
+    Returns:
+        dict: Column name -> PostgreSQL type, in DataFrame column order
+    """
+    column_types = column_types or {}
+    return {
+        column: column_types.get(column, POSTGRESQL_TYPES.get(dtype.kind, 'TEXT'))
+        for column, dtype in df.dtypes.items()
+    }
+
+def frame_rows(df):
+    """
+    Iterates over DataFrame rows as tuples, with NaN and NaT replaced by None.
+    """
+    return df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+def copy_text_value(value):
+    """
+    Formats a single value for COPY in text format: NULL as \\N, with backslashes,
+    tabs and line breaks escaped.
+    """
+    if value is None or (isinstance(value, float) and value != value):
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+def copy_rows(cursor, table_name, columns, rows, chunk_size=COPY_CHUNK_SIZE):
+    """
+    Streams rows into a table with COPY ... FROM STDIN, chunk_size rows per COPY.
+
+    Only one chunk is held in memory at a time, so rows may be a lazy iterator.
+
+    Args:
+        cursor: psycopg2 cursor inside an open transaction
+        table_name (str): Target table
+        columns (list): Column names in row order
+        rows (iterable): Tuples of values
+        chunk_size (int): Rows per COPY statement
+
+    Returns:
+        int: Number of rows copied
+    """
+    column_list = ', '.join(f'"{column}"' for column in columns)
+    statement = f'COPY {table_name} ({column_list}) FROM STDIN'
+    rows = iter(rows)
+    total = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return total
+        buffer = io.StringIO()
+        for row in chunk:
+            buffer.write('\t'.join(map(copy_text_value, row)) + '\n')
+        buffer.seek(0)
+        cursor.copy_expert(statement, buffer)
+        total += len(chunk)
+
+def bulk_load_postgresql(data, table_name, if_exists='append',
+                         column_types=None, columns=None, chunk_size=COPY_CHUNK_SIZE, dsn=None):
+    """
+    Loads a DataFrame or an iterator of records into PostgreSQL through COPY FROM STDIN.
+
+    COPY sends rows as one stream instead of one INSERT per row, which is what
+    DataFrame.to_sql does. The table is created with explicit column types, and
+    the whole load runs in one transaction, so a failed load leaves the table
+    as it was.
+
+    Args:
+        data (pandas.DataFrame | iterable): DataFrame, or dicts such as checkpoint records
+        table_name (str): Target table
+        if_exists (str): 'replace' recreates the table, 'append' creates it only if missing,
+            'fail' raises an error if it exists
+        column_types (dict, optional): Explicit PostgreSQL types by column name; for records
+            columns without an explicit type are stored as TEXT
+        columns (list, optional): Columns to load from records; by default the keys of the
+            first record
+        chunk_size (int): Rows per COPY statement
+        dsn (str, optional): Database URL; by default taken from configuration (see database.database_url)
+
+    Returns:
+        bool: True if the load is successful, False otherwise.
+    """
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger(__name__)
+
+    if isinstance(data, pd.DataFrame):
+        types = postgresql_column_types(data, column_types)
+        rows = frame_rows(data)
+    else:
+        records = iter(data)
+        first = next(records, None)
+        if first is None:
+            logger.info(f"No records to load into table '{table_name}'")
+            return True
+        columns = columns or list(first)
+        types = {column: (column_types or {}).get(column, 'TEXT') for column in columns}
+        rows = (tuple(record.get(column) for column in columns) for record in chain([first], records))
+
+    definition = ', '.join(f'"{column}" {column_type}' for column, column_type in types.items())
+    engine = get_engine(dsn)
+    connection = engine.raw_connection()
+
+    try:
+        logger.info(f"Starting bulk load into PostgreSQL table '{table_name}'.")
+
+        with connection.cursor() as cursor:
+            if if_exists == 'replace':
+                cursor.execute(f'DROP TABLE IF EXISTS {table_name}')
+            exists_clause = 'IF NOT EXISTS ' if if_exists == 'append' else ''
+            cursor.execute(f'CREATE TABLE {exists_clause}{table_name} ({definition})')
+            count = copy_rows(cursor, table_name, list(types), rows, chunk_size)
+        connection.commit()
+
+        logger.info(f"Copied {count} rows into table '{table_name}'.")
+        return True
+
+    except (SQLAlchemyError, psycopg2.Error) as e:
+        connection.rollback()
+        logger.error(f"An error occurred while bulk loading data to PostgreSQL: {e}")
+        return False
+
     finally:
-        engine.dispose()
-        logger.info("Database connection closed.")
\ No newline at end of file
+        connection.close()
+
+def shadow_table_name(table_name):
+    """
+    Returns the name of the shadow table used to rebuild table_name, e.g. 'listings_drom_shadow' for 'listings_drom'.
+    """
+    return f'{table_name}_shadow'
+
+def upsert_listings_postgresql(df, source, table_name=None, chunk_size=COPY_CHUNK_SIZE, dsn=None):
+    """
+    Merges a batch of one source's ads into the typed, partitioned listings table.
+
+    The batch is copied into a temporary staging table and merged with schema.merge_listings:
+    lookup values become ids, numbers are cast to the compact listing types, missing
+    monthly partitions are created, and only new and changed ads are written. Columns
+    that the listings schema does not know are not loaded. Links are stored in canonical
+    form (see html_cache.canonical_url). The schema must already exist (see
+    schema.apply_migrations).
+
+    Ads are keyed by (source, link, publication_date) (see schema.UNIQUE_KEY), not by
+    link alone, because a unique index of a partitioned table must include its partition
+    key. A link is still stored only once across monthly partitions: an ad that is already
+    in the table keeps its stored publication date, so a repeated load updates that row
+    instead of inserting a copy into another month.
+
+    Args:
+        df (pandas.DataFrame): Batch of transformed ads
+        source (str): Source of the ads, e.g. 'drom'
+        table_name (str, optional): Source partition or its shadow copy; by default
+            schema.source_table(source)
+        chunk_size (int): Rows per COPY statement
+        dsn (str, optional): Database URL; by default taken from configuration (see database.database_url)
+
+    Returns:
+        bool: True if the merge is successful, False otherwise.
+    """
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger(__name__)
+
+    table_name = table_name or source_table(source)
+    known = set(LISTING_COLUMNS) | set(LOOKUP_COLUMNS)
+    df = df[[column for column in df.columns if column in known]].copy()
+    df['link'] = df['link'].map(canonical_url)
+    types = postgresql_column_types(df)
+    staging = f'{table_name}_staging'
+    definition = ', '.join(f'"{column}" {column_type}' for column, column_type in types.items())
+
+    connection = get_engine(dsn).raw_connection()
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE TEMP TABLE {staging} ({definition}) ON COMMIT DROP')
+            copy_rows(cursor, staging, list(types), frame_rows(df), chunk_size)
+            count, changed = merge_listings(cursor, source, table_name, staging, list(types))
+        connection.commit()
+
+        logger.info(f"Merged {count} ads into table '{table_name}': "
+                    f"{changed} inserted or updated, {count - changed} unchanged")
+        return True
+
+    except (SQLAlchemyError, psycopg2.Error) as e:
+        connection.rollback()
+        logger.error(f"An error occurred while merging ads into '{table_name}': {e}")
+        return False
+
+    finally:
+        connection.close()
+
+def prepare_listings_shadow_postgresql(source, dsn=None):
+    """
+    Creates an empty shadow copy of a source partition for a full reload.
+
+    The shadow table has the listings columns, is partitioned by publication month
+    and has only the unique index needed by upsert_listings_postgresql; the other
+    indexes are built by swap_listings_partition_postgresql after the load.
+
+    Args:
+        source (str): Source of the ads, e.g. 'drom'
+        dsn (str, optional): Database URL; by default taken from configuration (see database.database_url)
+
+    Returns:
+        bool: True if the shadow table was created, False otherwise.
+    """
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger(__name__)
+
+    shadow_name = shadow_table_name(source_table(source))
+    connection = get_engine(dsn).raw_connection()
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {shadow_name}')
+            create_source_partition(cursor, source, shadow_name, attach=False)
+            create_listing_indexes(cursor, shadow_name, ['key'])
+        connection.commit()
+
+        logger.info(f"Shadow table '{shadow_name}' created")
+        return True
+
+    except (SQLAlchemyError, psycopg2.Error) as e:
+        connection.rollback()
+        logger.error(f"Error creating shadow table '{shadow_name}': {e}")
+        return False
+
+    finally:
+        connection.close()
+
+def swap_listings_partition_postgresql(source, lock_timeout='5s', dsn=None):
+    """
+    Replaces a source partition of listings with its fully loaded shadow copy.
+
+    The indexes of LISTING_INDEXES are built and ANALYZE is run on the shadow table while
+    readers still use the current partition. Then one short transaction detaches and drops the current partition,
+    attaches the shadow table in its place and renames the shadow table, its monthly
+    partitions and indexes. The shadow table already has the CHECK (source = ...)
+    constraint and the same indexes as listings, so attaching it neither scans the rows
+    nor builds indexes. An empty shadow table is not swapped in.
+
+    Args:
+        source (str): Source of the ads, e.g. 'drom'
+        lock_timeout (str): Longest wait for readers to release the table before giving up
+        dsn (str, optional): Database URL; by default taken from configuration (see database.database_url)
+
+    Returns:
+        bool: True if the partition was swapped, False otherwise.
+    """
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger(__name__)
+
+    table_name = source_table(source)
+    shadow_name = shadow_table_name(table_name)
+    connection = get_engine(dsn).raw_connection()
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {shadow_name}')
+            rows = cursor.fetchone()[0]
+            if not rows:
+                logger.warning(f"Shadow table '{shadow_name}' is empty, partition '{table_name}' is left unchanged")
+                connection.rollback()
+                return False
+
+            logger.info(f"Building indexes on shadow table '{shadow_name}' ({rows} rows)")
+            create_listing_indexes(cursor, shadow_name, [name for name in LISTING_INDEXES if name != 'key'])
+            cursor.execute(f'ANALYZE {shadow_name}')
+        connection.commit()
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"SET LOCAL lock_timeout = '{lock_timeout}'")
+            cursor.execute(f'ALTER TABLE {LISTINGS_TABLE} DETACH PARTITION {table_name}')
+            cursor.execute(f'DROP TABLE {table_name}')
+            cursor.execute(f'ALTER TABLE {LISTINGS_TABLE} ATTACH PARTITION {shadow_name} FOR VALUES IN (%s)', (source,))
+            # Monthly partitions and indexes of the shadow table take the names of the live ones
+            cursor.execute("SELECT relname, relkind FROM pg_class WHERE relkind IN ('r', 'p', 'i', 'I') "
+                           "AND relpersistence <> 't' AND starts_with(relname, %s)", (f'{shadow_name}_',))
+            for name, relkind in cursor.fetchall():
+                kind = 'INDEX' if relkind in ('i', 'I') else 'TABLE'
+                cursor.execute(f'ALTER {kind} {name} RENAME TO {table_name}{name[len(shadow_name):]}')
+            cursor.execute(f'ALTER TABLE {shadow_name} RENAME TO {table_name}')
+            cursor.execute(f'ALTER TABLE {table_name} RENAME CONSTRAINT {shadow_name}_source_check '
+                           f'TO {table_name}_source_check')
+        connection.commit()
+
+        logger.info(f"Partition '{table_name}' swapped with '{shadow_name}' ({rows} rows)")
+        return True
+
+    except (SQLAlchemyError, psycopg2.Error) as e:
+        connection.rollback()
+        logger.error(f"Error swapping partition '{table_name}': {e}")
+        return False
+
+    finally:
+        connection.close()
+
+def swap_load_listings_postgresql(df, source, chunk_size=COPY_CHUNK_SIZE, dsn=None):
+    """
+    Fully reloads one source's ads in listings without ever exposing a partial partition.
+
+    Loads df into a fresh shadow copy of the source partition and swaps it in
+    (see prepare_listings_shadow_postgresql and swap_listings_partition_postgresql).
+
+    Args:
+        df (pandas.DataFrame): Complete set of transformed ads of the source
+        source (str): Source of the ads, e.g. 'drom'
+        chunk_size (int): Rows per COPY statement
+        dsn (str, optional): Database URL; by default taken from configuration (see database.database_url)
+
+    Returns:
+        bool: True if the partition was rebuilt and swapped, False otherwise.
+    """
+    shadow_name = shadow_table_name(source_table(source))
+    return (prepare_listings_shadow_postgresql(source, dsn=dsn)
+            and upsert_listings_postgresql(df, source, shadow_name, chunk_size=chunk_size, dsn=dsn)
+            and swap_listings_partition_postgresql(source, dsn=dsn))
\ No newline at end of file
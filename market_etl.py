@@ -0,0 +1,75 @@
+from prefect import flow, task
+from prefect.task_runners import ConcurrentTaskRunner
+from autoru.autoru_etl import AUTORU_ETL
+from avito.avito_etl import AVITO_ETL
+from drom.drom_etl import DROM_ETL
+from youla.youla_etl import YOULA_ETL
+from driver_pool import set_browser_budget
+from link_index import DEFAULT_MAX_AGE_DAYS
+from schema import apply_migrations
+
+SOURCES = {
+    "autoru": AUTORU_ETL,
+    "avito": AVITO_ETL,
+    "drom": DROM_ETL,
+    "youla": YOULA_ETL,
+}
+
+# Число одновременно работающих браузеров каждого источника
+SOURCE_POOL_SIZES = {
+    "autoru": 2,
+    "avito": 2,
+    "drom": 3,
+    "youla": 1,
+}
+
+# Общий лимит меньше суммы SOURCE_POOL_SIZES (8) и учитывает также браузеры
+# сборщиков выдачи: когда все источники парсят одновременно, пулы делят
+# слоты, а освободившиеся слоты закончившего источника достаются остальным
+MAX_BROWSERS = 6
+
+
+@task
+def sync_source_task(source, incremental=True, max_age_days=DEFAULT_MAX_AGE_DAYS, full_refresh=False):
+    site = SOURCES[source]
+    skip_links = site.known_links(max_age_days) if incremental and not full_refresh else None
+    site.stream_to_db(skip_links, pipelined=True, pool_size=SOURCE_POOL_SIZES[source], full_refresh=full_refresh)
+    return source
+
+
+@flow(name="Market ETL Flow", task_runner=ConcurrentTaskRunner())
+def market_etl_flow(incremental=True, max_age_days=DEFAULT_MAX_AGE_DAYS, sources=None, max_browsers=MAX_BROWSERS,
+                    full_refresh=False):
+    """Обновляет данные всех площадок одновременно.
+
+    Каждый источник работает в своем потоке в потоковом режиме (сбор ссылок,
+    парсинг и загрузка в базу идут одновременно, см. pipeline и stream_loader).
+    Источники используют общий кэш страниц, общие ограничители частоты
+    запросов по доменам и общий лимит браузеров max_browsers, а размер пула
+    каждого источника задается в SOURCE_POOL_SIZES. Для ограничения через
+    Prefect задачи помечаются тегом source-<имя>, к которому можно
+    привязать concurrency limit.
+
+    Args:
+        incremental (bool): Загружать только новые и устаревшие объявления.
+        max_age_days (int): Срок, после которого сохраненное объявление обновляется.
+        sources (list[str], optional): Источники; по умолчанию все из SOURCES.
+        max_browsers (int): Общее число браузеров всех источников.
+        full_refresh (bool): Пересобрать таблицы источников целиком в теневых копиях и
+            подменить их по завершении загрузки (см. load_to_database.swap_listings_partition_postgresql).
+    """
+    apply_migrations()
+    set_browser_budget(max_browsers)
+    futures = [
+        sync_source_task.with_options(name=f"sync-{source}", tags=[f"source-{source}"])
+        .submit(source, incremental, max_age_days, full_refresh)
+        for source in sources or SOURCES
+    ]
+    for future in futures:
+        future.wait()
+    for future in futures:
+        future.result()
+
+
+if __name__ == "__main__":
+    market_etl_flow()
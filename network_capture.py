@@ -0,0 +1,79 @@
+import base64
+import json
+
+JSON_MIME_MARKER = "json"
+
+
+def enable_performance_log(options):
+    """Включает журнал производительности Chrome с событиями DevTools Network.*.
+
+    Args:
+        options (selenium.webdriver.ChromeOptions): Опции, которые будут изменены.
+    """
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+def iter_json_responses(driver, url_pattern=None):
+    """Перебирает JSON-ответы, полученные страницей с момента предыдущего вызова.
+
+    Журнал производительности возвращает каждое событие один раз, поэтому
+    повторные вызовы обрабатывают только новые ответы. Тело ответа
+    запрашивается через Network.getResponseBody.
+
+    Args:
+        driver (selenium.webdriver.Chrome): Драйвер, созданный с capture_network=True.
+        url_pattern (re.Pattern, optional): Шаблон адресов ответов, которые нужно читать.
+
+    Yields:
+        tuple: (url, data) для каждого разобранного JSON-ответа.
+    """
+    for entry in driver.get_log("performance"):
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        if message.get("method") != "Network.responseReceived":
+            continue
+        params = message.get("params", {})
+        response = params.get("response", {})
+        url = response.get("url", "")
+        if JSON_MIME_MARKER not in response.get("mimeType", ""):
+            continue
+        if url_pattern and not url_pattern.search(url):
+            continue
+        try:
+            result = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+            body = result.get("body", "")
+            if result.get("base64Encoded"):
+                body = base64.b64decode(body).decode("utf-8")
+            yield url, json.loads(body)
+        except Exception as e:
+            print(f"Не удалось прочитать ответ {url}: {e}")
+
+
+def find_strings(data, pattern):
+    """Рекурсивно находит в разобранном JSON строки, целиком подходящие под шаблон.
+
+    Args:
+        data: Разобранный JSON (dict, list или скаляр).
+        pattern (re.Pattern): Шаблон строки, например адреса объявления.
+
+    Returns:
+        list[str]: Найденные строки в порядке обхода.
+    """
+    found = []
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, str) and pattern.fullmatch(node):
+            found.append(node)
+    return found
+
+
+def links_from_text(text, pattern):
+    """Находит адреса объявлений в тексте страницы или ответа (например, во встроенном состоянии)."""
+    return [match.group(0) for match in pattern.finditer(text)]
@@ -0,0 +1,115 @@
+import queue
+import threading
+import time
+
+DEFAULT_QUEUE_SIZE = 200
+
+_CLOSED = object()
+
+
+class LinkStream:
+    """Ограниченная очередь ссылок между сборщиком выдачи и парсером объявлений.
+
+    Сборщик передает ссылки через put_links сразу после разбора очередной
+    страницы выдачи, а парсер перебирает объект как обычный список ссылок.
+    Повторные ссылки отбрасываются. Если парсер отстает, put_links
+    блокирует сборщик, пока в очереди не освободится место.
+
+    Args:
+        maxsize (int): Максимальное число ссылок, ожидающих обработки.
+
+    Examples:
+        >>> stream = LinkStream()
+        >>> stream.put_links(["https://auto.drom.ru/moscow/toyota/camry/123.html"])
+        >>> stream.close()
+        >>> list(stream)
+        ['https://auto.drom.ru/moscow/toyota/camry/123.html']
+    """
+
+    def __init__(self, maxsize=DEFAULT_QUEUE_SIZE):
+        self.error = None
+        self._queue = queue.Queue(maxsize)
+        self._seen = set()
+        self._cancelled = threading.Event()
+
+    def put_links(self, links):
+        """Добавляет новые ссылки в очередь; подходит как обратный вызов on_links сборщика."""
+        for link in links:
+            if link in self._seen:
+                continue
+            self._seen.add(link)
+            self._put(link)
+
+    def _put(self, item):
+        # После cancel() очередь никто не читает, поэтому ожидание места
+        # прерывается, иначе сборщик и run_pipeline зависли бы на join()
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def close(self, error=None):
+        """Сообщает, что сборщик закончил работу (или завершился с ошибкой error)."""
+        self.error = error
+        self._put(_CLOSED)
+
+    def cancel(self):
+        """Прекращает прием ссылок, например если парсер завершился с ошибкой."""
+        self._cancelled.set()
+
+    def __iter__(self):
+        while True:
+            link = self._queue.get()
+            if link is _CLOSED:
+                return
+            yield link
+
+
+def run_pipeline(collect, parse, maxsize=DEFAULT_QUEUE_SIZE):
+    """Запускает сбор ссылок и парсинг объявлений одновременно.
+
+    Сборщик работает в отдельном потоке и передает ссылки через LinkStream,
+    а парсер начинает обрабатывать их сразу, не дожидаясь конца сбора и
+    файла *_links.json. Общее время приближается к большему из времен
+    сбора и парсинга, а не к их сумме.
+
+    Args:
+        collect (callable): Функция collect(on_links=...), например collect_drom_links.
+        parse (callable): Функция parse(links=...), например parse_drom_data.
+        maxsize (int): Размер очереди ссылок.
+
+    Returns:
+        Результат parse.
+
+    Raises:
+        Exception: Ошибка сборщика пробрасывается после того, как парсер
+            обработает уже собранные ссылки.
+    """
+    stream = LinkStream(maxsize)
+    started = time.monotonic()
+
+    def produce():
+        try:
+            collect(on_links=stream.put_links)
+        except Exception as e:
+            print(f"Ошибка при сборе ссылок: {e}")
+            stream.close(e)
+            return
+        print(f"Сбор ссылок завершен за {time.monotonic() - started:.1f} с")
+        stream.close()
+
+    producer = threading.Thread(target=produce, name="link-collector", daemon=True)
+    producer.start()
+    try:
+        result = parse(links=stream)
+    except BaseException:
+        stream.cancel()
+        raise
+    finally:
+        producer.join()
+
+    if stream.error:
+        raise stream.error
+    return result
@@ -0,0 +1,170 @@
+import asyncio
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_RATE = 1.0
+MIN_RATE = 0.1
+MAX_RATE = 8.0
+RATE_INCREASE = 0.1
+BACKOFF_FACTOR = 0.5
+SLOW_RESPONSE = 8.0
+
+THROTTLE_STATUSES = {429, 503}
+# Страница проверки узнается по своей структуре: заголовку, форме проверки,
+# контейнеру капчи или адресу, на который перенаправил сайт. Простой поиск
+# слова "captcha" по всему HTML срабатывал бы на обычных страницах, в
+# скриптах которых это слово встречается.
+CHALLENGE_TITLES = (
+    "доступ ограничен",
+    "вы не робот",
+    "ой!",
+    "are you a robot",
+    "just a moment",
+    "attention required",
+)
+CHALLENGE_URL_MARKERS = ("/showcaptcha", "/checkcaptcha", "/blocked")
+TITLE_PATTERN = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+CHALLENGE_PATTERN = re.compile(
+    r'<form[^>]+(?:action="[^"]*(?:checkcaptcha|showcaptcha)|id="challenge-form")'
+    r'|<div[^>]+class="[^"]*\b(?:CheckboxCaptcha|AdvancedCaptcha|firewall-container)\b',
+    re.IGNORECASE,
+)
+
+
+def is_challenge_page(html, url=None):
+    """Определяет, что вместо страницы пришла проверка (капча или блокировка).
+
+    Args:
+        html (str): Код страницы.
+        url (str, optional): Адрес, на котором оказался браузер или клиент после
+            перенаправлений.
+
+    Returns:
+        bool: True для страницы проверки.
+    """
+    if url and any(marker in urlsplit(url).path for marker in CHALLENGE_URL_MARKERS):
+        return True
+    match = TITLE_PATTERN.search(html)
+    if match and any(title in match.group(1).strip().lower() for title in CHALLENGE_TITLES):
+        return True
+    return CHALLENGE_PATTERN.search(html) is not None
+
+
+class AdaptiveRateLimiter:
+    """Адаптивный ограничитель частоты запросов к одному домену (token bucket).
+
+    Запросы выдаются со скоростью rate в секунду. Пока ответы приходят
+    быстро и без признаков блокировки, скорость плавно растет на
+    RATE_INCREASE; при статусе 429/503, капче или медленном ответе она
+    уменьшается в 1 / BACKOFF_FACTOR раз, а накопленные токены сгорают.
+
+    Ограничитель потокобезопасен и может использоваться как из пула
+    браузеров, так и из асинхронного HTTP-клиента.
+
+    Args:
+        rate (float): Начальная скорость, запросов в секунду.
+        min_rate (float): Нижняя граница скорости.
+        max_rate (float): Верхняя граница скорости.
+        burst (int): Максимальное число накопленных токенов.
+        slow_response (float): Время ответа в секундах, которое считается признаком перегрузки.
+
+    Examples:
+        >>> limiter = get_limiter("https://auto.ru/cars/used/sale/...")
+        >>> limiter.acquire()
+        >>> limiter.report(elapsed=0.8, status_code=200)
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, min_rate=MIN_RATE, max_rate=MAX_RATE, burst=1,
+                 slow_response=SLOW_RESPONSE):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.slow_response = slow_response
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Резервирует токен и возвращает время ожидания до его появления."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self):
+        """Блокирует поток, пока не наступит очередь следующего запроса."""
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """Асинхронный вариант acquire."""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def report(self, elapsed=None, status_code=None, blocked=False):
+        """Сообщает результат запроса и подстраивает скорость.
+
+        Args:
+            elapsed (float, optional): Время ответа в секундах.
+            status_code (int, optional): HTTP-статус ответа.
+            blocked (bool): Признак капчи или страницы блокировки.
+        """
+        throttled = (blocked or status_code in THROTTLE_STATUSES
+                     or (elapsed is not None and elapsed > self.slow_response))
+        with self._lock:
+            if throttled:
+                self.rate = max(self.min_rate, self.rate * BACKOFF_FACTOR)
+                self._tokens = min(self._tokens, 0)
+            elif status_code is None or status_code < 400:
+                self.rate = min(self.max_rate, self.rate + RATE_INCREASE)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+# Доля общей скорости запросов к домену, которая приходится на этот процесс
+_rate_share = 1.0
+
+
+def domain_of(url):
+    """Возвращает домен адреса без префикса www."""
+    host = urlsplit(url).hostname or ""
+    return host[len("www."):] if host.startswith("www.") else host
+
+
+def set_rate_share(share):
+    """Задает долю скорости запросов к каждому домену, доступную этому процессу.
+
+    Нужна, когда один источник обходят несколько процессов (см. sharding):
+    у каждого процесса свои ограничители, и без деления скоростей сайт
+    получал бы в shards раз больше запросов. Скорость и ее границы уже
+    созданных ограничителей пересчитываются.
+
+    Args:
+        share (float): Доля от 0 до 1, например 1 / shards.
+    """
+    global _rate_share
+    with _limiters_lock:
+        scale = share / _rate_share
+        _rate_share = share
+        for limiter in _limiters.values():
+            with limiter._lock:
+                limiter.rate *= scale
+                limiter.min_rate *= scale
+                limiter.max_rate *= scale
+
+
+def get_limiter(url):
+    """Возвращает общий для процесса ограничитель домена, к которому относится url."""
+    domain = domain_of(url)
+    with _limiters_lock:
+        if domain not in _limiters:
+            _limiters[domain] = AdaptiveRateLimiter(DEFAULT_RATE * _rate_share, MIN_RATE * _rate_share,
+                                                    MAX_RATE * _rate_share)
+        return _limiters[domain]
@@ -0,0 +1,89 @@
+import os
+import httpx
+from selenium import webdriver
+from selenium.webdriver.remote.command import Command
+
+SERVICE_URL_ENV = "BROWSER_SERVICE_URL"
+LEASE_TIMEOUT = 120
+RELEASE_TIMEOUT = 30
+RSS_TIMEOUT = 10
+
+
+def service_url():
+    """Возвращает адрес службы браузеров из переменной BROWSER_SERVICE_URL или None."""
+    return os.environ.get(SERVICE_URL_ENV)
+
+
+class AttachedRemote(webdriver.Remote):
+    """Драйвер, подключенный к уже запущенной сессии службы браузеров.
+
+    Вместо создания новой сессии драйвер присоединяется к сессии,
+    выданной службой (см. browser_service), поэтому браузер не
+    запускается заново. quit() не закрывает браузер, а возвращает
+    сессию службе, которая проверяет ее и выдает следующему клиенту.
+
+    Журнал производительности (get_log) и память браузера (browser_rss)
+    доступны так же, как у локального Chrome, поэтому сбор сетевых
+    ответов (см. network_capture) и контроль памяти пула (см.
+    browser_memory) работают и с сессиями службы.
+
+    Args:
+        base_url (str): Адрес службы браузеров.
+        lease (dict): Ответ службы на /lease: session_id, executor_url, capabilities.
+    """
+
+    def __init__(self, base_url, lease):
+        self._base_url = base_url
+        self._lease = lease
+        super().__init__(command_executor=lease["executor_url"], options=webdriver.ChromeOptions())
+
+    def start_session(self, capabilities, *args, **kwargs):
+        self.session_id = self._lease["session_id"]
+        self.caps = self._lease.get("capabilities") or {}
+
+    def get_log(self, log_type):
+        """Возвращает записи журнала браузера log_type, например "performance"."""
+        return self.execute(Command.GET_LOG, {"type": log_type})["value"]
+
+    def browser_rss(self):
+        """Запрашивает у службы RSS процессов браузера сессии в байтах или None."""
+        try:
+            response = httpx.post(f"{self._base_url}/rss", json={"session_id": self.session_id},
+                                  timeout=RSS_TIMEOUT)
+            response.raise_for_status()
+        except httpx.HTTPError:
+            return None
+        return response.json().get("rss")
+
+    def quit(self):
+        """Возвращает сессию службе браузеров."""
+        try:
+            response = httpx.post(f"{self._base_url}/release", json={"session_id": self.session_id},
+                                  timeout=RELEASE_TIMEOUT)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            print(f"Не удалось вернуть сессию {self.session_id} службе браузеров: {e}")
+
+
+def lease_driver(base_url, arguments, lite=True, capture_network=False):
+    """Получает у службы браузеров готовую сессию с заданными параметрами.
+
+    Args:
+        base_url (str): Адрес службы браузеров, например http://127.0.0.1:4445.
+        arguments (list[str]): Аргументы Chrome.
+        lite (bool): Облегченный профиль загрузки (см. driver_profile).
+        capture_network (bool): Журнал производительности (см. network_capture).
+
+    Returns:
+        AttachedRemote: Драйвер, подключенный к выданной сессии.
+
+    Raises:
+        httpx.HTTPError: Если служба недоступна или не выдала сессию за LEASE_TIMEOUT секунд.
+    """
+    response = httpx.post(f"{base_url}/lease", json={
+        "arguments": list(arguments),
+        "lite": lite,
+        "capture_network": capture_network,
+    }, timeout=LEASE_TIMEOUT)
+    response.raise_for_status()
+    return AttachedRemote(base_url, response.json())
@@ -0,0 +1,134 @@
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from importlib import import_module
+from itertools import islice
+from urllib.parse import unquote
+import zstandard
+from checkpoint import JsonlCheckpoint, export_json_array
+from html_cache import HtmlCache, DEFAULT_CACHE_DIR, canonical_url
+
+CHUNK_SIZE = 32
+
+CANONICAL_PATTERNS = [
+    re.compile(r'<link[^>]+rel=["\']canonical["\'][^>]+href=["\']([^"\']+)["\']', re.IGNORECASE),
+    re.compile(r'<meta[^>]+property=["\']og:url["\'][^>]+content=["\']([^"\']+)["\']', re.IGNORECASE),
+]
+
+
+def link_from_html(html, fallback=None):
+    """Восстанавливает адрес объявления по тегу canonical или og:url архивной страницы."""
+    for pattern in CANONICAL_PATTERNS:
+        match = pattern.search(html)
+        if match:
+            return match.group(1)
+    return fallback
+
+
+def iter_archived_pages(source):
+    """Перебирает архивные страницы из кэша страниц или из каталога файлов.
+
+    Если source содержит index.sqlite, он читается как HtmlCache, и для
+    каждой страницы берется последняя версия. Иначе source считается
+    каталогом файлов *.html или *.html.zst; адрес страницы берется из тега
+    canonical, а при его отсутствии из имени файла.
+
+    Args:
+        source (str): Каталог кэша или архива.
+
+    Yields:
+        tuple: (link, html).
+    """
+    if os.path.exists(os.path.join(source, "index.sqlite")):
+        for url, _, html in HtmlCache(source).iter_entries(latest_only=True):
+            yield url, html
+        return
+
+    decompressor = zstandard.ZstdDecompressor()
+    for root, _, files in os.walk(source):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            if name.endswith(".html.zst"):
+                with open(path, "rb") as f:
+                    html = decompressor.decompress(f.read()).decode("utf-8")
+                stem = name[:-len(".html.zst")]
+            elif name.endswith(".html"):
+                with open(path, "r", encoding="utf-8") as f:
+                    html = f.read()
+                stem = name[:-len(".html")]
+            else:
+                continue
+            yield link_from_html(html, fallback=unquote(stem)), html
+
+
+def extract_chunk(extract_record, chunk):
+    """Извлекает записи из пачки страниц в процессе-обработчике.
+
+    Returns:
+        list[tuple]: (link, record, error) для каждой страницы пачки.
+    """
+    results = []
+    for link, html in chunk:
+        try:
+            results.append((link, extract_record(html, link), None))
+        except Exception as e:
+            results.append((link, None, str(e)))
+    return results
+
+
+def replay_pages(source, extract_record, data_path, checkpoint_path, link_pattern=None, workers=None):
+    """Повторно извлекает записи из архивных страниц без обращения к сети.
+
+    Страницы распределяются пачками по CPU-ядрам, записи дописываются в
+    контрольную точку JSONL и затем переписываются в data_path, как это
+    делает живой парсер. Одновременно в обработке находится ограниченное
+    число пачек, поэтому объем памяти не зависит от размера архива.
+
+    Args:
+        source (str): Каталог кэша страниц или архива HTML-файлов.
+        extract_record (callable): Функция extract_<site>_record(html, link) уровня модуля.
+        data_path (str): Путь к итоговому файлу *_data.json.
+        checkpoint_path (str): Путь к файлу JSONL.
+        link_pattern (re.Pattern, optional): Шаблон адресов страниц объявлений сайта.
+        workers (int, optional): Число процессов; по умолчанию число CPU.
+
+    Returns:
+        int: Количество записей в итоговом файле.
+    """
+    workers = workers or os.cpu_count() or 1
+    pages = ((canonical_url(link), html) for link, html in iter_archived_pages(source)
+             if link and (link_pattern is None or link_pattern.search(link)))
+    chunks = iter(lambda: list(islice(pages, CHUNK_SIZE)), [])
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    with JsonlCheckpoint(checkpoint_path) as checkpoint, ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(extract_chunk, extract_record, chunk) for chunk in islice(chunks, workers * 2)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for link, record, error in future.result():
+                    if error:
+                        print(f"Ошибка при обработке {link}: {error}")
+                        continue
+                    checkpoint.append(record)
+            for chunk in islice(chunks, len(done)):
+                pending.add(executor.submit(extract_chunk, extract_record, chunk))
+
+    count = export_json_array(checkpoint_path, data_path)
+    checkpoint.remove()
+    print(f"Повторно извлечено {count} записей, данные сохранены в {data_path}")
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Повторное извлечение данных из архивных страниц")
+    parser.add_argument("site", choices=["autoru", "avito", "drom", "youla"])
+    parser.add_argument("source", nargs="?", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    module = import_module(f"{args.site}.{args.site}_data")
+    getattr(module, f"replay_{args.site}_data")(args.source, workers=args.workers)
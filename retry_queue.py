@@ -0,0 +1,217 @@
+import heapq
+import random
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from checkpoint import JsonlCheckpoint
+from driver_pool import IDLE, ChallengePageError, HttpStatusError
+
+RetryPolicy = namedtuple("RetryPolicy", ["max_attempts", "base_delay", "max_delay"])
+RetryPolicy.__doc__ = """Правило повторов для одного класса ошибок.
+
+Args:
+    max_attempts (int): Общее число попыток, включая первую.
+    base_delay (float): Пауза перед первым повтором в секундах; перед
+        каждым следующим она удваивается.
+    max_delay (float): Верхняя граница паузы в секундах.
+"""
+
+RETRY_POLICIES = {
+    # страница не успела загрузиться
+    "timeout": RetryPolicy(4, 5, 120),
+    # браузер упал или перестал отвечать; пул пересоздает его
+    "browser": RetryPolicy(3, 5, 60),
+    # 429 и 5xx: сайт перегружен, ждем дольше
+    "server_error": RetryPolicy(4, 15, 300),
+    # 404, 410 и другие 4xx: объявление снято, повтор не поможет
+    "client_error": RetryPolicy(1, 0, 0),
+    # капча: ограничитель домена уже снизил скорость, повтор заметно позже
+    "captcha": RetryPolicy(3, 60, 600),
+    # неожиданная разметка: один повтор на случай недогруженной страницы
+    "parse_error": RetryPolicy(2, 5, 30),
+}
+
+RETRY_STATUSES = {429}
+
+# Наибольшая пауза links в ожидании повтора, после которой пул может отдать готовые результаты
+RETRY_POLL_SECONDS = 1.0
+
+
+def classify_error(error):
+    """Определяет класс ошибки обработки страницы для выбора правила повторов.
+
+    Args:
+        error (Exception): Исключение функции парсинга страницы.
+
+    Returns:
+        str: Ключ RETRY_POLICIES.
+    """
+    if isinstance(error, ChallengePageError):
+        return "captcha"
+    if isinstance(error, HttpStatusError):
+        if error.status_code in RETRY_STATUSES or error.status_code >= 500:
+            return "server_error"
+        return "client_error"
+    if isinstance(error, TimeoutException):
+        return "timeout"
+    if isinstance(error, WebDriverException):
+        return "browser"
+    return "parse_error"
+
+
+def backoff_delay(policy, attempt):
+    """Возвращает паузу перед повтором номер attempt (с 1) с экспоненциальным ростом и разбросом.
+
+    Пауза выбирается случайно между половиной и полным значением
+    base_delay * 2 ** (attempt - 1), чтобы одновременно упавшие ссылки
+    не повторялись одной волной.
+    """
+    cap = min(policy.max_delay, policy.base_delay * 2 ** (attempt - 1))
+    return random.uniform(cap / 2, cap)
+
+
+class RetryQueue:
+    """Очередь повторной обработки ссылок, страницы которых не удалось разобрать.
+
+    Упавшая ссылка возвращается в поток ссылок после паузы с
+    экспоненциальным ростом и разбросом (см. backoff_delay). Пауза и число
+    попыток зависят от класса ошибки (см. classify_error и RETRY_POLICIES):
+    таймауты, падения браузера, ответы 4xx и 5xx, капчи и ошибки разбора
+    повторяются по-разному. Ссылки, исчерпавшие попытки, дописываются в
+    файл неудавшихся ссылок JSONL вместе с классом и текстом ошибки.
+
+    Ожидающие повтора ссылки не занимают браузеры: пока пауза не истекла,
+    пул обрабатывает новые ссылки, а повтор встает в поток, как только
+    наступило его время.
+
+    Args:
+        dead_letter_path (str): Путь к файлу неудавшихся ссылок *_data.failed.jsonl.
+        policies (dict[str, RetryPolicy]): Правила повторов по классам ошибок.
+
+    Examples:
+        >>> with RetryQueue("drom_data.failed.jsonl") as retries:
+        ...     for link, record, error in pool.imap(parse_drom_page, retries.links(links), task_wrapper=retries.wrap):
+        ...         ...
+    """
+
+    def __init__(self, dead_letter_path, policies=RETRY_POLICIES):
+        self.policies = policies
+        self.retried = 0
+        self.dead = 0
+        self._dead_letters = JsonlCheckpoint(dead_letter_path)
+        self._attempts = {}
+        self._scheduled = []
+        self._in_flight = 0
+        self._changed = threading.Condition()
+
+    def __enter__(self):
+        self._dead_letters.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._dead_letters.close()
+
+    def wrap(self, task):
+        """Оборачивает задачу пула task(link) так, чтобы ошибки планировали повтор.
+
+        Оборачивается задача целиком, вместе с получением драйвера из пула
+        (см. DriverPool.imap, параметр task_wrapper): если браузер не удалось
+        запустить, ссылка тоже повторяется или попадает в файл ошибок, а
+        счетчик выданных ссылок уменьшается, и links не ждет ее вечно.
+        Исключение пробрасывается дальше, чтобы пул по-прежнему сообщал об ошибке.
+        """
+        def task_with_retry(link):
+            try:
+                record = task(link)
+            except Exception as e:
+                self._failed(link, e)
+                raise
+            finally:
+                with self._changed:
+                    self._in_flight -= 1
+                    self._changed.notify_all()
+            with self._changed:
+                self._attempts.pop(link, None)
+            return record
+
+        return task_with_retry
+
+    def links(self, source):
+        """Перебирает ссылки source вперемешку с повторами, время которых наступило.
+
+        После того как source закончится, ждет, пока не завершатся все
+        выданные ссылки и не будут обработаны все запланированные повторы.
+        Пауза до повтора может длиться минутами (например, после капчи),
+        поэтому ожидание прерывается каждые RETRY_POLL_SECONDS выдачей
+        driver_pool.IDLE: пул тем временем отдает и сохраняет завершенные страницы.
+
+        Args:
+            source (iterable[str]): Новые ссылки, например pipeline.LinkStream.
+
+        Yields:
+            str: Очередная ссылка для обработки или driver_pool.IDLE.
+        """
+        for link in source:
+            while True:
+                retry = self._pop_due(wait=False)
+                if retry is None:
+                    break
+                yield retry
+            self._start()
+            yield link
+        while True:
+            retry = self._pop_due(wait=True)
+            if retry is None:
+                return
+            yield retry
+
+    def summary(self):
+        """Возвращает строку с числом повторов и неудавшихся ссылок."""
+        return f"Повторов: {self.retried}, ссылок в файле ошибок {self._dead_letters.path}: {self.dead}"
+
+    def _start(self):
+        with self._changed:
+            self._in_flight += 1
+
+    def _pop_due(self, wait):
+        # Возвращает ссылку, время повтора которой наступило. При wait=True ждет
+        # ее не дольше RETRY_POLL_SECONDS и возвращает IDLE, если она не появилась,
+        # а None возвращает, только когда повторов больше не будет
+        with self._changed:
+            deadline = time.monotonic() + RETRY_POLL_SECONDS
+            while True:
+                now = time.monotonic()
+                if self._scheduled and self._scheduled[0][0] <= now:
+                    link = heapq.heappop(self._scheduled)[1]
+                    self._in_flight += 1
+                    return link
+                if not wait or (not self._scheduled and not self._in_flight):
+                    return None
+                if now >= deadline:
+                    return IDLE
+                self._changed.wait(min(self._scheduled[0][0], deadline) - now if self._scheduled else deadline - now)
+
+    def _failed(self, link, error):
+        kind = classify_error(error)
+        policy = self.policies[kind]
+        with self._changed:
+            attempts = self._attempts.get(link, 0) + 1
+            self._attempts[link] = attempts
+            if attempts < policy.max_attempts:
+                delay = backoff_delay(policy, attempts)
+                heapq.heappush(self._scheduled, (time.monotonic() + delay, link))
+                self.retried += 1
+                print(f"Повтор {link} через {delay:.0f} с ({kind}, попытка {attempts + 1} из {policy.max_attempts})")
+                return
+            self._attempts.pop(link)
+            self.dead += 1
+            self._dead_letters.append({
+                "link": link,
+                "error_type": kind,
+                "error": str(error),
+                "attempts": attempts,
+                "failed_at": datetime.now().isoformat(timespec="seconds"),
+            })
+        print(f"Ссылка {link} не обработана после {attempts} попыток ({kind}), записана в файл ошибок")
@@ -0,0 +1,368 @@
+import argparse
+import logging
+from datetime import date
+from database import get_engine
+from html_cache import canonical_url
+
+LISTINGS_TABLE = "listings"
+LISTINGS_VIEW = "listings_view"
+LISTING_SOURCES = ("autoru", "avito", "drom", "youla")
+MIGRATIONS_TABLE = "schema_migrations"
+MIGRATIONS_LOCK_ID = 4_215_001
+
+# Колонки таблицы listings и их типы; порядок задает порядок колонок в таблице
+LISTING_COLUMNS = {
+    "source": "TEXT",
+    "link": "TEXT",
+    "brand": "TEXT",
+    "model": "TEXT",
+    "year": "SMALLINT",
+    "price": "INTEGER",
+    "mileage": "INTEGER",
+    "engine_volume": "REAL",
+    "engine_type_id": "SMALLINT",
+    "body_type_id": "SMALLINT",
+    "drive_type_id": "SMALLINT",
+    "transmission_id": "SMALLINT",
+    "location": "TEXT",
+    "description": "TEXT",
+    "publication_date": "DATE",
+    "content_hash": "TEXT",
+}
+NOT_NULL_COLUMNS = ("source", "link", "publication_date")
+
+# Колонка результата transform_<site>_frame -> (колонка listings, справочник)
+LOOKUP_COLUMNS = {
+    "engine_type": ("engine_type_id", "engine_types"),
+    "body_type": ("body_type_id", "body_types"),
+    "drive_type": ("drive_type_id", "drive_types"),
+    "transmission": ("transmission_id", "transmissions"),
+}
+
+# B-tree индексы по колонкам, по которым чаще всего фильтруются объявления.
+# Уникальный индекс секционированной таблицы обязан включать ключи секционирования,
+# поэтому уникальность ссылки обеспечивается индексом (source, link, publication_date)
+# вместе с тем, что загрузка сохраняет дату объявления, уже записанного в таблицу
+# (см. merge_listings).
+UNIQUE_KEY = ("source", "link", "publication_date")
+LISTING_INDEXES = {
+    "key": UNIQUE_KEY,
+    "link_idx": ("link",),
+    "brand_model_year_idx": ("brand", "model", "year"),
+    "year_idx": ("year",),
+    "price_idx": ("price",),
+    "mileage_idx": ("mileage",),
+}
+
+
+def source_table(source):
+    """Возвращает имя секции источника в listings, например listings_drom."""
+    return f"{LISTINGS_TABLE}_{source}"
+
+
+def month_partition(table_name, month):
+    """Возвращает имя месячной секции таблицы, например listings_drom_2024_05."""
+    return f"{table_name}_{month:%Y_%m}"
+
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def listing_column_definitions():
+    """Возвращает определения колонок listings для CREATE TABLE."""
+    return ", ".join(
+        f'"{column}" {column_type}' + (" NOT NULL" if column in NOT_NULL_COLUMNS else "")
+        for column, column_type in LISTING_COLUMNS.items()
+    )
+
+
+def create_listing_indexes(cursor, table_name, names=None):
+    """Создает индексы LISTING_INDEXES на таблице table_name.
+
+    На секционированной таблице индекс создается и на всех ее секциях.
+    Имена индексов строятся от имени таблицы, поэтому индексы теневой
+    таблицы совпадают по определению с индексами listings и при подключении
+    секции присоединяются к ним без перестроения.
+
+    Args:
+        cursor: Курсор psycopg2 внутри открытой транзакции.
+        table_name (str): Таблица listings, секция источника или ее теневая копия.
+        names (iterable[str], optional): Имена индексов из LISTING_INDEXES; по умолчанию все.
+    """
+    for name in names or LISTING_INDEXES:
+        columns = ", ".join(f'"{column}"' for column in LISTING_INDEXES[name])
+        unique = "UNIQUE " if name == "key" else ""
+        cursor.execute(f"CREATE {unique}INDEX IF NOT EXISTS {table_name}_{name} ON {table_name} ({columns})")
+
+
+def create_source_partition(cursor, source, table_name=None, attach=True):
+    """Создает секцию источника, разбитую по месяцам публикации.
+
+    Args:
+        cursor: Курсор psycopg2 внутри открытой транзакции.
+        source (str): Источник объявлений.
+        table_name (str, optional): Имя секции; по умолчанию source_table(source).
+        attach (bool): Подключить секцию к listings. Теневая копия секции для
+            полной перезагрузки создается отдельно и подключается при подмене.
+    """
+    table_name = table_name or source_table(source)
+    if attach:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {table_name} PARTITION OF {LISTINGS_TABLE} "
+            f"FOR VALUES IN (%s) PARTITION BY RANGE (publication_date)", (source,)
+        )
+    else:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {table_name} (LIKE {LISTINGS_TABLE} INCLUDING DEFAULTS) "
+            f"PARTITION BY RANGE (publication_date)"
+        )
+    # С этим ограничением подключение секции не проверяет ее строки
+    cursor.execute(
+        "SELECT 1 FROM pg_constraint WHERE conrelid = to_regclass(%s) AND conname = %s",
+        (table_name, f"{table_name}_source_check"),
+    )
+    if cursor.fetchone() is None:
+        cursor.execute(f"ALTER TABLE {table_name} ADD CONSTRAINT {table_name}_source_check CHECK (source = %s)",
+                       (source,))
+
+
+def ensure_month_partitions(cursor, table_name, months):
+    """Создает недостающие месячные секции таблицы источника.
+
+    Args:
+        cursor: Курсор psycopg2 внутри открытой транзакции.
+        table_name (str): Секция источника или ее теневая копия.
+        months (iterable[datetime.date]): Первые дни месяцев.
+    """
+    for month in sorted(set(months)):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {month_partition(table_name, month)} PARTITION OF {table_name} "
+            f"FOR VALUES FROM (%s) TO (%s)", (month.isoformat(), next_month(month).isoformat())
+        )
+
+
+def create_listings_view(cursor):
+    """Создает представление listings_view с названиями из справочников вместо их id."""
+    columns = []
+    joins = []
+    for column in LISTING_COLUMNS:
+        lookup = next((name for name, (id_column, _) in LOOKUP_COLUMNS.items() if id_column == column), None)
+        if lookup is None:
+            if column != "content_hash":
+                columns.append(f'l."{column}"')
+            continue
+        table = LOOKUP_COLUMNS[lookup][1]
+        columns.append(f'{table}.name AS "{lookup}"')
+        joins.append(f"LEFT JOIN {table} ON {table}.id = l.{column}")
+    cursor.execute(f"CREATE OR REPLACE VIEW {LISTINGS_VIEW} AS SELECT {', '.join(columns)} "
+                   f"FROM {LISTINGS_TABLE} l {' '.join(joins)}")
+
+
+def merge_listings(cursor, source, table_name, staging, columns):
+    """Переносит объявления источника из таблицы staging в его секцию listings.
+
+    Строки staging имеют колонки результата transform_<site>_frame. Значения
+    справочных колонок заменяются на id из справочников (новые значения
+    добавляются в справочник), числа приводятся к типам LISTING_COLUMNS,
+    для месяцев публикации создаются недостающие секции. Объявление, уже
+    записанное в секцию, сохраняет свою дату публикации, чтобы не переехать
+    в другую месячную секцию и не задвоиться. Неизменившиеся объявления
+    (по content_hash) не перезаписываются.
+
+    Args:
+        cursor: Курсор psycopg2 внутри открытой транзакции.
+        source (str): Источник объявлений.
+        table_name (str): Секция источника или ее теневая копия.
+        staging (str): Таблица с загружаемыми строками.
+        columns (iterable[str]): Колонки staging.
+
+    Returns:
+        tuple: (число загружаемых объявлений, число добавленных или измененных).
+    """
+    columns = set(columns)
+    live_table = source_table(source)
+    rows = f"{table_name}_rows"
+
+    expressions = []
+    joins = []
+    for lookup, (id_column, lookup_table) in LOOKUP_COLUMNS.items():
+        if lookup not in columns:
+            continue
+        # Значение добавляется, только если его еще нет: иначе каждая пачка
+        # тратила бы номера последовательности SMALLSERIAL на конфликтующие вставки
+        cursor.execute(
+            f'INSERT INTO {lookup_table} (name) SELECT DISTINCT s."{lookup}" FROM {staging} s '
+            f'WHERE s."{lookup}" IS NOT NULL '
+            f'AND NOT EXISTS (SELECT 1 FROM {lookup_table} l WHERE l.name = s."{lookup}") '
+            f'ON CONFLICT (name) DO NOTHING'
+        )
+        joins.append(f'LEFT JOIN {lookup_table} ON {lookup_table}.name = s."{lookup}"')
+
+    # Условие на source позволяет искать по индексу key (source, link, publication_date):
+    # у теневой копии во время полной перезагрузки других индексов нет
+    known_dates = [table_name] if table_name == live_table else [table_name, live_table]
+    for index, known in enumerate(known_dates):
+        joins.append(f"LEFT JOIN LATERAL (SELECT publication_date FROM {known} "
+                     f"WHERE source = %(source)s AND link = s.link "
+                     f"ORDER BY publication_date LIMIT 1) known_{index} ON true")
+
+    for column, column_type in LISTING_COLUMNS.items():
+        lookup = next((name for name, (id_column, _) in LOOKUP_COLUMNS.items() if id_column == column), None)
+        if column == "source":
+            expression = f"%(source)s::{column_type}"
+        elif column == "publication_date":
+            dates = [f"known_{index}.publication_date" for index in range(len(known_dates))]
+            if column in columns:
+                dates.append("s.publication_date::date")
+            expression = f"COALESCE({', '.join(dates)}, CURRENT_DATE)"
+        elif column == "content_hash":
+            continue
+        elif lookup is not None:
+            expression = f"{LOOKUP_COLUMNS[lookup][1]}.id" if lookup in columns else "NULL"
+        elif column in columns:
+            expression = f's."{column}"::{column_type}'
+        else:
+            expression = f"NULL::{column_type}"
+        expressions.append(f'{expression} AS "{column}"')
+
+    cursor.execute(f"DROP TABLE IF EXISTS {rows}")
+    cursor.execute(
+        f"CREATE TEMP TABLE {rows} ON COMMIT DROP AS "
+        f"SELECT DISTINCT ON (s.link) {', '.join(expressions)} FROM {staging} s {' '.join(joins)} "
+        f"WHERE s.link IS NOT NULL ORDER BY s.link", {"source": source}
+    )
+    count = cursor.rowcount
+
+    # Пачки одного источника (например, из разных шардов) создают месячные секции по очереди
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (table_name,))
+    cursor.execute(f"SELECT DISTINCT date_trunc('month', publication_date)::date FROM {rows}")
+    ensure_month_partitions(cursor, table_name, [month for (month,) in cursor.fetchall()])
+
+    column_list = ", ".join(f'"{column}"' for column in LISTING_COLUMNS)
+    key = ", ".join(UNIQUE_KEY)
+    assignments = ", ".join(f'"{column}" = EXCLUDED."{column}"' for column in LISTING_COLUMNS
+                            if column not in UNIQUE_KEY)
+    cursor.execute(
+        f"INSERT INTO {table_name} AS t ({column_list}) SELECT r.*, md5(r::text) FROM {rows} r "
+        f"ON CONFLICT ({key}) DO UPDATE SET {assignments} "
+        f"WHERE t.content_hash IS DISTINCT FROM EXCLUDED.content_hash"
+    )
+    return count, cursor.rowcount
+
+
+def create_lookup_tables(cursor):
+    for _, table in LOOKUP_COLUMNS.values():
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} (id SMALLSERIAL PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+
+
+def create_listings(cursor):
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {LISTINGS_TABLE} ({listing_column_definitions()}) "
+                   f"PARTITION BY LIST (source)")
+    for source in LISTING_SOURCES:
+        create_source_partition(cursor, source)
+        # Индексы секции создаются под теми же именами, что и при полной перезагрузке
+        create_listing_indexes(cursor, source_table(source))
+    create_listing_indexes(cursor, LISTINGS_TABLE)
+    create_listings_view(cursor)
+
+
+def import_legacy_tables(cursor):
+    # Таблицы площадок, которые раньше загружались целиком из DataFrame, переносятся
+    # в listings, а на их месте остаются представления для прежних читателей
+    for source in LISTING_SOURCES:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (source,))
+        row = cursor.fetchone()
+        if row is not None and row[0] == "r":
+            legacy = f"{source}_legacy"
+            cursor.execute(f"ALTER TABLE {source} RENAME TO {legacy}")
+            cursor.execute("SELECT column_name FROM information_schema.columns WHERE table_name = %s", (legacy,))
+            columns = [column for (column,) in cursor.fetchall()]
+            if "link" in columns:
+                merge_listings(cursor, source, source_table(source), legacy, columns)
+            logging.getLogger(__name__).info(f"Table '{source}' moved into '{LISTINGS_TABLE}' as '{legacy}'")
+        if row is None or row[0] == "r":
+            cursor.execute(f"CREATE VIEW {source} AS SELECT * FROM {LISTINGS_VIEW} WHERE source = %s", (source,))
+
+
+def canonicalize_links(cursor):
+    # Ссылки, сохраненные до приведения к каноническому виду (например, ссылки avito
+    # с параметром context), переписываются; повторы одного объявления удаляются
+    cursor.execute(f"SELECT DISTINCT link FROM {LISTINGS_TABLE} WHERE link ~ '[?#]'")
+    pairs = [(link, canonical_url(link)) for (link,) in cursor.fetchall()]
+    pairs = [(link, canonical) for link, canonical in pairs if link != canonical]
+    if not pairs:
+        return
+    cursor.execute("CREATE TEMP TABLE link_map (link TEXT PRIMARY KEY, canonical TEXT NOT NULL) ON COMMIT DROP")
+    cursor.executemany("INSERT INTO link_map (link, canonical) VALUES (%s, %s)", pairs)
+    cursor.execute(
+        f"DELETE FROM {LISTINGS_TABLE} l USING link_map m WHERE l.link = m.link AND EXISTS ("
+        f"SELECT 1 FROM {LISTINGS_TABLE} c LEFT JOIN link_map cm ON cm.link = c.link "
+        f"WHERE c.source = l.source AND COALESCE(cm.canonical, c.link) = m.canonical "
+        f"AND (cm.link IS NULL OR c.link > l.link))"
+    )
+    cursor.execute(f"UPDATE {LISTINGS_TABLE} l SET link = m.canonical FROM link_map m WHERE l.link = m.link")
+    logging.getLogger(__name__).info(f"Canonicalized {len(pairs)} stored links")
+
+
+# Миграции применяются по порядку версий и не изменяются после выпуска;
+# изменения схемы (например, новый источник в LISTING_SOURCES) добавляются новой миграцией
+MIGRATIONS = [
+    (1, "lookup tables", create_lookup_tables),
+    (2, "partitioned listings", create_listings),
+    (3, "import per-source tables", import_legacy_tables),
+    (4, "canonical links", canonicalize_links),
+]
+
+
+def apply_migrations(dsn=None):
+    """Применяет к базе данных миграции схемы, которые еще не применялись.
+
+    Примененные версии записываются в таблицу schema_migrations, каждая
+    миграция выполняется в своей транзакции, поэтому повторный вызов ничего
+    не меняет, а упавшая миграция не оставляет схему наполовину измененной.
+    Одновременные вызовы (например, из потоков разных площадок) ждут друг
+    друга на рекомендательной блокировке транзакции.
+
+    Args:
+        dsn (str, optional): Адрес базы данных; по умолчанию из конфигурации (см. database).
+
+    Returns:
+        list[int]: Версии примененных миграций.
+    """
+    logger = logging.getLogger(__name__)
+    connection = get_engine(dsn).raw_connection()
+    applied = []
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATIONS_LOCK_ID,))
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} "
+                           f"(version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at TIMESTAMP DEFAULT now())")
+            connection.commit()
+            for version, name, migrate in MIGRATIONS:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATIONS_LOCK_ID,))
+                cursor.execute(f"SELECT 1 FROM {MIGRATIONS_TABLE} WHERE version = %s", (version,))
+                if cursor.fetchone() is not None:
+                    connection.rollback()
+                    continue
+                logger.info(f"Applying schema migration {version}: {name}")
+                migrate(cursor)
+                cursor.execute(f"INSERT INTO {MIGRATIONS_TABLE} (version, name) VALUES (%s, %s)", (version, name))
+                connection.commit()
+                applied.append(version)
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+    return applied
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Применение миграций схемы базы данных объявлений")
+    parser.add_argument("--dsn", help="адрес базы данных; по умолчанию DATABASE_URL или переменные PG*")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    versions = apply_migrations(args.dsn)
+    print(f"Применено миграций: {len(versions)}" if versions else "Схема базы данных актуальна")
@@ -0,0 +1,97 @@
+import json
+import os
+import zlib
+from prefect_dask import DaskTaskRunner
+from checkpoint import JsonlCheckpoint, export_json_array
+from html_cache import canonical_url
+
+DASK_ADDRESS_ENV = "DASK_SCHEDULER_ADDRESS"
+
+
+def shard_of(link, shards):
+    """Возвращает номер шарда ссылки по CRC32 ее канонического вида."""
+    return zlib.crc32(canonical_url(link).encode("utf-8")) % shards
+
+
+def shard_links(links, shard, shards):
+    """Возвращает ссылки из links, относящиеся к шарду с номером shard из shards.
+
+    Шард ссылки определяется ее стабильным хэшем (см. shard_of), а не
+    позицией в списке: collect_links сохраняет ссылки в произвольном
+    порядке, а встроенный hash строк меняется от запуска к запуску. Поэтому
+    при повторном запуске каждый шард получает те же ссылки и может
+    продолжить работу по своей контрольной точке.
+    """
+    return [link for link in links if shard_of(link, shards) == shard]
+
+
+def shard_pool_size(pool_size, shards):
+    """Возвращает размер пула браузеров одного шарда, чтобы всего их было не больше pool_size."""
+    return max(1, pool_size // shards)
+
+
+def shard_data_path(data_path, shard):
+    """Возвращает путь к частичному файлу шарда, например autoru_data.shard2.json."""
+    stem, extension = os.path.splitext(data_path)
+    return f"{stem}.shard{shard}{extension}"
+
+
+def merge_shard_outputs(shard_paths, data_path):
+    """Объединяет частичные файлы шардов в итоговый файл и удаляет их.
+
+    Записи переносятся через промежуточный JSONL-файл, поэтому в памяти
+    одновременно находится не больше одного частичного файла.
+
+    Args:
+        shard_paths (list[str]): Пути к частичным файлам *.shardN.json.
+        data_path (str): Путь к итоговому файлу *_data.json.
+
+    Returns:
+        int: Количество записей в итоговом файле.
+    """
+    merged_path = os.path.splitext(data_path)[0] + ".merge.jsonl"
+    if os.path.exists(merged_path):
+        os.remove(merged_path)
+
+    with JsonlCheckpoint(merged_path) as merged:
+        for path in shard_paths:
+            if not os.path.exists(path):
+                print(f"Частичный файл {path} не найден")
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for record in json.load(f):
+                    merged.append(record)
+
+    count = export_json_array(merged_path, data_path)
+    merged.remove()
+    for path in shard_paths:
+        if os.path.exists(path):
+            os.remove(path)
+    print(f"Объединено {len(shard_paths)} частей, {count} записей сохранено в {data_path}")
+    return count
+
+
+def create_task_runner(workers=1):
+    """Создает Dask-исполнитель задач Prefect для параллельных шардов.
+
+    Если задана переменная окружения DASK_SCHEDULER_ADDRESS, задачи
+    отправляются во внешний кластер Dask (несколько машин), иначе
+    поднимается локальный кластер из workers отдельных процессов, по
+    одному на шард. В каждом процессе работает свой пул браузеров и свой
+    ограничитель частоты запросов, поэтому их размеры делятся между
+    шардами (см. shard_pool_size и rate_limiter.set_rate_share).
+
+    Args:
+        workers (int): Число процессов локального кластера, обычно равное числу шардов.
+
+    Returns:
+        prefect_dask.DaskTaskRunner: Исполнитель для параметра task_runner потока.
+    """
+    address = os.environ.get(DASK_ADDRESS_ENV)
+    if address:
+        return DaskTaskRunner(address=address)
+    return DaskTaskRunner(cluster_kwargs={
+        "n_workers": max(1, workers),
+        "threads_per_worker": 1,
+        "processes": True,
+    })
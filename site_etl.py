@@ -0,0 +1,237 @@
+import json
+from functools import partial
+from prefect import flow, task, unmapped
+from driver_pool import DEFAULT_POOL_SIZE
+from rate_limiter import set_rate_share
+from link_index import LinkIndex, DEFAULT_MAX_AGE_DAYS
+from pipeline import run_pipeline
+from checkpoint import rejected_path_for
+from sharding import shard_links, shard_data_path, shard_pool_size, merge_shard_outputs, create_task_runner
+from stream_loader import MicroBatchLoader
+from load_to_database import (upsert_listings_postgresql, fetch_links_postgresql, prepare_listings_shadow_postgresql,
+                              swap_listings_partition_postgresql, swap_load_listings_postgresql, shadow_table_name)
+from schema import apply_migrations, source_table
+
+
+class LoadError(Exception):
+    """Загрузка в базу данных не удалась; подробности записаны в журнал load_to_database."""
+
+
+def check_loaded(succeeded, action):
+    """Превращает False, возвращенный функцией load_to_database, в исключение LoadError.
+
+    Иначе поток Prefect завершился бы успешно, а ссылки неудавшейся пачки
+    были бы отмечены в индексе как свежие и не загружались бы повторно.
+    """
+    if not succeeded:
+        raise LoadError(action)
+
+
+class SiteEtl:
+    """Поток ETL одной площадки: сбор ссылок, парсинг, преобразование и загрузка в базу.
+
+    Шаги потока одинаковы для всех площадок, поэтому площадка описывается
+    только своими функциями сбора, парсинга и преобразования, а имена
+    таблиц и файлов строятся из имени источника. Поток Prefect площадки
+    создает build_etl_flow, чтобы у развертываний оставались свои имена
+    потоков.
+
+    Args:
+        source (str): Имя источника; из него строятся имя таблицы и файлы <source>_*.json.
+        title (str): Имя площадки в названиях потоков Prefect.
+        collect_links (callable): Функция collect_<site>_links(on_links=None).
+        parse_data (callable): Функция parse_<site>_data(...).
+        transform_data (callable): Функция transform_<site>_data().
+        transform_frame (callable): Функция transform_<site>_frame(df).
+
+    Examples:
+        >>> DROM_ETL = SiteEtl("drom", "Drom", collect_drom_links, parse_drom_data,
+        ...                    transform_drom_data, transform_drom_frame)
+        >>> etl_flow = DROM_ETL.build_etl_flow()
+        >>> etl_flow(incremental=True, streaming=True)
+    """
+
+    def __init__(self, source, title, collect_links, parse_data, transform_data, transform_frame):
+        self.source = source
+        self.title = title
+        self.collect_links = collect_links
+        self.parse_data = parse_data
+        self.transform_data = transform_data
+        self.transform_frame = transform_frame
+        self.table_name = source_table(source)
+        self.shadow_table_name = shadow_table_name(self.table_name)
+        self.link_index_path = f"{source}_index.json"
+        self.links_path = f"{source}_links.json"
+        self.data_path = f"{source}_data.json"
+
+    def build_etl_flow(self):
+        """Создает поток Prefect площадки с параметрами, как у run_etl."""
+        @flow(name=f"{self.title} Shards Flow")
+        def parse_shards_flow(shards, skip_links=None, streaming=False, full_refresh=False):
+            parse_shards(self, shards, skip_links, streaming, full_refresh)
+
+        @flow(name=f"{self.title} ETL Flow")
+        def etl_flow(incremental=False, max_age_days=DEFAULT_MAX_AGE_DAYS, pipelined=False, streaming=False,
+                     shards=1, full_refresh=False):
+            run_etl(self, parse_shards_flow, incremental, max_age_days, pipelined, streaming, shards, full_refresh)
+
+        return etl_flow
+
+    def known_links(self, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        stored_links = fetch_links_postgresql(self.table_name)
+        with LinkIndex.locked(self.link_index_path) as index:
+            return index.fresh_links(stored_links, max_age_days)
+
+    def touch_links(self, df):
+        # Шарды пишут в один индекс из разных процессов, поэтому он обновляется под блокировкой
+        with LinkIndex.locked(self.link_index_path) as index:
+            index.touch(df['link'])
+
+    def prepare_shadow(self):
+        check_loaded(prepare_listings_shadow_postgresql(self.source),
+                     f"Не удалось создать теневую копию таблицы {self.table_name}")
+
+    def swap_table(self):
+        check_loaded(swap_listings_partition_postgresql(self.source),
+                     f"Не удалось подменить таблицу {self.table_name} теневой копией")
+
+    def merge_batch(self, df, table_name=None):
+        table_name = table_name or self.table_name
+        check_loaded(upsert_listings_postgresql(df, self.source, table_name),
+                     f"Не удалось загрузить {len(df)} записей в {table_name}")
+        # Ссылки отмечаются загруженными только после успешной записи
+        self.touch_links(df)
+
+    def load(self, df, full_refresh=False):
+        if full_refresh:
+            check_loaded(swap_load_listings_postgresql(df, self.source),
+                         f"Не удалось перезагрузить таблицу {self.table_name}")
+            self.touch_links(df)
+        else:
+            self.merge_batch(df)
+
+    def stream_to_db(self, skip_links=None, pipelined=False, pool_size=DEFAULT_POOL_SIZE, full_refresh=False):
+        if full_refresh:
+            self.prepare_shadow()
+        merge = partial(self.merge_batch, table_name=self.shadow_table_name if full_refresh else self.table_name)
+        with MicroBatchLoader(self.transform_frame, merge, rejected_path=rejected_path_for(self.data_path)) as loader:
+            parse = partial(self.parse_data, pool_size=pool_size, skip_links=skip_links, on_record=loader.add)
+            if pipelined:
+                run_pipeline(self.collect_links, parse)
+            else:
+                self.collect_links()
+                parse()
+        if full_refresh:
+            self.swap_table()
+
+    def parse_shard(self, shard, shards, skip_links=None, streaming=False, full_refresh=False):
+        # Шарды работают одновременно, поэтому браузеры и скорость запросов к сайту делятся между ними
+        set_rate_share(1 / shards)
+        parse = partial(self.parse_data, pool_size=shard_pool_size(DEFAULT_POOL_SIZE, shards), skip_links=skip_links)
+        with open(self.links_path, "r", encoding="utf-8") as f:
+            links = shard_links(json.load(f), shard, shards)
+        data_path = shard_data_path(self.data_path, shard)
+        if streaming:
+            merge = partial(self.merge_batch, table_name=self.shadow_table_name if full_refresh else self.table_name)
+            with MicroBatchLoader(self.transform_frame, merge, rejected_path=rejected_path_for(data_path)) as loader:
+                parse(links=links, on_record=loader.add, data_path=data_path)
+        else:
+            parse(links=links, data_path=data_path)
+        return data_path
+
+
+@task
+def migrate_schema_task():
+    apply_migrations()
+
+
+@task
+def collect_links_task(site):
+    site.collect_links()
+
+
+@task
+def known_links_task(site, max_age_days=DEFAULT_MAX_AGE_DAYS):
+    return site.known_links(max_age_days)
+
+
+@task
+def parse_data_task(site, skip_links=None):
+    site.parse_data(skip_links=skip_links)
+
+
+@task
+def collect_and_parse_task(site, skip_links=None):
+    run_pipeline(site.collect_links, partial(site.parse_data, skip_links=skip_links))
+
+
+@task
+def transform_data_task(site):
+    return site.transform_data()
+
+
+@task
+def load_to_db_task(site, df, full_refresh=False):
+    site.load(df, full_refresh)
+
+
+@task
+def prepare_shadow_task(site):
+    site.prepare_shadow()
+
+
+@task
+def swap_table_task(site):
+    site.swap_table()
+
+
+@task
+def stream_to_db_task(site, skip_links=None, pipelined=False, full_refresh=False):
+    site.stream_to_db(skip_links, pipelined, full_refresh=full_refresh)
+
+
+@task
+def parse_shard_task(site, shard, shards, skip_links=None, streaming=False, full_refresh=False):
+    return site.parse_shard(shard, shards, skip_links, streaming, full_refresh)
+
+
+@task
+def merge_shards_task(site, shard_paths):
+    merge_shard_outputs(shard_paths, site.data_path)
+
+
+def parse_shards(site, shards, skip_links=None, streaming=False, full_refresh=False):
+    shard_paths = parse_shard_task.map(unmapped(site), list(range(shards)), unmapped(shards), unmapped(skip_links),
+                                       unmapped(streaming), unmapped(full_refresh))
+    merge_shards_task(site, shard_paths)
+
+
+def run_etl(site, parse_shards_flow, incremental=False, max_age_days=DEFAULT_MAX_AGE_DAYS, pipelined=False,
+            streaming=False, shards=1, full_refresh=False):
+    # Полная перезагрузка собирает таблицу заново в теневой копии и подменяет ее целиком
+    incremental = incremental and not full_refresh
+    migrate_schema_task()
+    if shards > 1:
+        collect_links_task(site)
+        skip_links = known_links_task(site, max_age_days) if incremental else None
+        if streaming and full_refresh:
+            prepare_shadow_task(site)
+        parse_shards_flow.with_options(task_runner=create_task_runner(shards))(shards, skip_links, streaming,
+                                                                                full_refresh)
+        if streaming:
+            if full_refresh:
+                swap_table_task(site)
+            return
+    elif streaming:
+        skip_links = known_links_task(site, max_age_days) if incremental else None
+        stream_to_db_task(site, skip_links, pipelined, full_refresh)
+        return
+    elif pipelined:
+        skip_links = known_links_task(site, max_age_days) if incremental else None
+        collect_and_parse_task(site, skip_links)
+    else:
+        collect_links_task(site)
+        skip_links = known_links_task(site, max_age_days) if incremental else None
+        parse_data_task(site, skip_links)
+    df = transform_data_task(site)
+    load_to_db_task(site, df, full_refresh)
@@ -0,0 +1,128 @@
+import json
+from collections import namedtuple
+from functools import partial
+from checkpoint import checkpoint_path_for
+from detail_parser import run_detail_parser
+from driver_pool import create_chrome_driver, load_page, DEFAULT_POOL_SIZE, DEFAULT_MAX_PAGES
+from extraction import Extractor
+from html_cache import DEFAULT_CACHE_DIR
+from replay import replay_pages
+
+SiteSpec = namedtuple("SiteSpec", ["name", "fields", "chrome_arguments", "detail_link_pattern",
+                                   "wait_locator", "wait_timeout"], defaults=[None, None, 10])
+SiteSpec.__doc__ = """Декларативное описание парсера объявлений одного сайта.
+
+Args:
+    name (str): Имя сайта; из него строятся имена файлов <name>_links.json и <name>_data.json.
+    fields (list[extraction.Field]): Поля записи в порядке их следования в *_data.json.
+    chrome_arguments (list[str]): Аргументы Chrome для браузеров пула.
+    detail_link_pattern (re.Pattern, optional): Шаблон адресов страниц объявлений,
+        по которому отбираются страницы архива при повторном извлечении.
+    wait_locator (tuple, optional): Локатор (By, selector), появление которого
+        означает, что страница объявления загрузилась.
+    wait_timeout (float): Время ожидания wait_locator в секундах.
+"""
+
+
+class SiteParser:
+    """Парсер объявлений сайта, собранный из описания SiteSpec.
+
+    Селекторы полей компилируются один раз при создании объекта (см.
+    extraction.Extractor) и затем применяются ко всем страницам сайта:
+    в пуле браузеров, при повторном извлечении из архива и в потоковом
+    режиме. Загрузка списка ссылок, контрольная точка, повторы и пул
+    браузеров общие для всех сайтов, поэтому новый сайт описывается
+    только своим SiteSpec, а отдельная функция загрузки страницы нужна,
+    лишь если странице требуются действия в браузере (см. youla_data).
+
+    Args:
+        spec (SiteSpec): Описание сайта.
+
+    Examples:
+        >>> DROM = SiteParser(SiteSpec("drom", [Field("title", "css:h1")], CHROME_ARGUMENTS))
+        >>> DROM.extract_record(html, "https://auto.drom.ru/moscow/toyota/camry/123.html")
+        {'title': 'Toyota Camry, 2019', 'link': 'https://auto.drom.ru/moscow/toyota/camry/123.html'}
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.extractor = Extractor(spec.fields)
+
+    @property
+    def links_path(self):
+        return f"{self.spec.name}_links.json"
+
+    @property
+    def data_path(self):
+        return f"{self.spec.name}_data.json"
+
+    def extract_record(self, html, link):
+        """Извлекает запись объявления из HTML-снимка страницы и добавляет к ней ссылку."""
+        record = self.extractor.extract(html)
+        record["link"] = link
+        return record
+
+    def parse_page(self, driver, link):
+        """Загружает страницу объявления, дожидаясь wait_locator, и извлекает из нее запись.
+
+        Raises:
+            TimeoutException: Если wait_locator не появился за wait_timeout секунд.
+        """
+        print(f"Обработка: {link}")
+        html = load_page(driver, link, self.spec.wait_locator, timeout=self.spec.wait_timeout)
+        return self.extract_record(html, link)
+
+    def parse_data(self, parse_page=None, pool_size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES,
+                   skip_links=None, links=None, on_record=None, data_path=None):
+        """Обрабатывает страницы объявлений через пул браузеров (см. detail_parser).
+
+        Если links не переданы, ссылки читаются из файла <name>_links.json.
+
+        Args:
+            parse_page (callable, optional): Функция parse_page(driver, link); по
+                умолчанию SiteParser.parse_page.
+            pool_size (int): Число одновременно работающих браузеров.
+            max_pages (int): Число страниц, после которого браузер перезапускается.
+            skip_links (set[str], optional): Ссылки, которые не нужно загружать.
+            links (iterable[str], optional): Ссылки вместо файла <name>_links.json.
+            on_record (callable, optional): Функция, получающая каждую новую запись.
+            data_path (str, optional): Итоговый файл; по умолчанию <name>_data.json.
+
+        Returns:
+            int: Количество записей в итоговом файле.
+        """
+        data_path = data_path or self.data_path
+        if links is None:
+            try:
+                with open(self.links_path, "r", encoding="utf-8") as f:
+                    links = json.load(f)
+                print(f"Успешно загружено {len(links)} ссылок из {self.links_path}")
+            except Exception as e:
+                print(f"Ошибка при чтении файла {self.links_path}: {str(e)}")
+                links = []
+
+            if not links:
+                print("Список ссылок пуст. Завершаем работу.")
+                with open(data_path, "w", encoding="utf-8") as f:
+                    json.dump([], f, ensure_ascii=False, indent=4)
+                return 0
+
+        return run_detail_parser(links, parse_page or self.parse_page,
+                                 partial(create_chrome_driver, self.spec.chrome_arguments),
+                                 data_path, checkpoint_path_for(data_path), pool_size=pool_size,
+                                 max_pages=max_pages, skip_links=skip_links, on_record=on_record)
+
+    def replay(self, extract_record, source=DEFAULT_CACHE_DIR, workers=None):
+        """Повторно извлекает записи из архивных страниц сайта (см. replay.replay_pages).
+
+        Args:
+            extract_record (callable): Функция extract_<site>_record уровня модуля;
+                сам объект SiteParser в процессы-обработчики не передается.
+            source (str): Каталог кэша страниц или архива HTML-файлов.
+            workers (int, optional): Число процессов; по умолчанию число CPU.
+
+        Returns:
+            int: Количество извлеченных записей.
+        """
+        return replay_pages(source, extract_record, self.data_path, checkpoint_path_for(self.data_path),
+                            link_pattern=self.spec.detail_link_pattern, workers=workers)
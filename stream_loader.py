@@ -0,0 +1,150 @@
+import threading
+import time
+from datetime import datetime
+import pandas as pd
+from checkpoint import JsonlCheckpoint
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_FLUSH_SECONDS = 30
+
+
+class MicroBatchLoader:
+    """Преобразует и загружает записи в базу данных небольшими пачками по мере парсинга.
+
+    Записи накапливаются до batch_size штук или до истечения flush_seconds
+    с момента первой записи пачки, после чего пачка преобразуется функцией
+    transform_<site>_frame и передается в load_frame. В памяти хранится
+    только текущая пачка, поэтому расход памяти не зависит от числа
+    объявлений, а новые объявления появляются в базе еще во время обхода.
+
+    Срок flush_seconds отслеживает фоновый поток, который запускается при
+    входе в контекст: неполная пачка загружается вовремя, даже если парсер
+    надолго остановился (ждет браузер, очередь повторов или ограничитель).
+    Ошибка загрузки в фоновом потоке пробрасывается при следующем вызове
+    add, flush или при выходе из контекста.
+
+    Если пачка целиком не преобразуется (например, из-за одной записи
+    с неожиданным форматом), записи преобразуются по одной, а
+    непреобразуемые сохраняются в rejected_path вместе с текстом ошибки,
+    чтобы их можно было разобрать и загрузить позже. Без rejected_path
+    ошибка преобразования пробрасывается, и записи не теряются молча.
+
+    Args:
+        transform_frame (callable): Функция transform_<site>_frame(df).
+        load_frame (callable): Функция load_frame(df), сохраняющая очищенную пачку.
+        batch_size (int): Число записей в пачке.
+        flush_seconds (float): Максимальное время ожидания неполной пачки.
+        rejected_path (str, optional): Файл JSONL для непреобразуемых записей,
+            например drom_data.rejected.jsonl (см. checkpoint.rejected_path_for).
+
+    Examples:
+        >>> loader = MicroBatchLoader(transform_drom_frame, append_batch, rejected_path="drom_data.rejected.jsonl")
+        >>> with loader:
+        ...     parse_drom_data(on_record=loader.add)
+    """
+
+    def __init__(self, transform_frame, load_frame, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_seconds=DEFAULT_FLUSH_SECONDS, rejected_path=None):
+        self.transform_frame = transform_frame
+        self.load_frame = load_frame
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.loaded = 0
+        self.rejected = 0
+        self._rejected = JsonlCheckpoint(rejected_path) if rejected_path else None
+        self._batch = []
+        self._started = None
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._timer = None
+        self._error = None
+
+    def __enter__(self):
+        if self._rejected is not None:
+            self._rejected.open()
+        self._stopped.clear()
+        self._timer = threading.Thread(target=self._flush_on_timer, name="micro-batch-timer", daemon=True)
+        self._timer.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stopped.set()
+        if self._timer is not None:
+            self._timer.join()
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            if self._rejected is not None:
+                self._rejected.close()
+
+    def _flush_on_timer(self):
+        interval = min(self.flush_seconds, 1.0)
+        while not self._stopped.wait(interval):
+            with self._lock:
+                if not self._batch or time.monotonic() - self._started < self.flush_seconds:
+                    continue
+                try:
+                    self.flush()
+                except Exception as e:
+                    self._error = e
+                    return
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def add(self, record):
+        """Добавляет запись в текущую пачку и загружает пачку, если она заполнена."""
+        with self._lock:
+            self._raise_error()
+            if not self._batch:
+                self._started = time.monotonic()
+            self._batch.append(record)
+            if len(self._batch) >= self.batch_size or time.monotonic() - self._started >= self.flush_seconds:
+                self.flush()
+
+    def flush(self):
+        """Преобразует и загружает накопленные записи.
+
+        Returns:
+            int: Количество загруженных строк.
+        """
+        with self._lock:
+            self._raise_error()
+            if not self._batch:
+                return 0
+            batch, self._batch = self._batch, []
+            df = self._transform(batch)
+            if df.empty:
+                return 0
+            self.load_frame(df)
+            self.loaded += len(df)
+            print(f"Загружено в базу {len(df)} записей, всего {self.loaded}")
+            return len(df)
+
+    def _transform(self, batch):
+        try:
+            return self.transform_frame(pd.DataFrame.from_records(batch))
+        except Exception:
+            if self._rejected is None:
+                raise
+            frames = []
+            for record in batch:
+                try:
+                    frames.append(self.transform_frame(pd.DataFrame.from_records([record])))
+                except Exception as e:
+                    self._reject(record, e)
+            frames = [frame for frame in frames if not frame.empty]
+            return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def _reject(self, record, error):
+        self.rejected += 1
+        self._rejected.append({
+            "link": record.get("link"),
+            "error": f"{type(error).__name__}: {error}",
+            "failed_at": datetime.now().isoformat(timespec="seconds"),
+            "record": record,
+        })
+        print(f"Запись {record.get('link')} не преобразована ({error}), сохранена в {self._rejected.path}")
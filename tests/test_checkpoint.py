@@ -0,0 +1,56 @@
+import json
+from checkpoint import JsonlCheckpoint, checkpoint_path_for, dead_letter_path_for, export_json_array, iter_jsonl
+
+
+def test_done_links_survive_reopen(tmp_path):
+    path = str(tmp_path / "drom_data.jsonl")
+    with JsonlCheckpoint(path) as checkpoint:
+        checkpoint.append({"title": "Toyota Camry", "link": "https://auto.drom.ru/1.html"})
+        checkpoint.append({"title": "Kia Rio", "link": "https://auto.drom.ru/2.html"})
+
+    with JsonlCheckpoint(path) as checkpoint:
+        assert checkpoint.done_links() == {"https://auto.drom.ru/1.html", "https://auto.drom.ru/2.html"}
+
+
+def test_broken_tail_is_skipped_and_not_glued_to_next_record(tmp_path):
+    path = tmp_path / "drom_data.jsonl"
+    path.write_text('{"link": "https://auto.drom.ru/1.html"}\n{"link": "https://auto.dr', encoding="utf-8")
+
+    with JsonlCheckpoint(str(path)) as checkpoint:
+        checkpoint.append({"link": "https://auto.drom.ru/2.html"})
+        assert checkpoint.done_links() == {"https://auto.drom.ru/1.html", "https://auto.drom.ru/2.html"}
+    assert [record["link"] for record in iter_jsonl(str(path))] == [
+        "https://auto.drom.ru/1.html", "https://auto.drom.ru/2.html"]
+
+
+def test_export_matches_json_dump(tmp_path):
+    records = [{"title": "Лада Веста", "link": "https://auto.drom.ru/1.html", "options": ["ABS", "ESP"]},
+               {"title": "Kia Rio", "link": "https://auto.drom.ru/2.html"}]
+    jsonl_path = str(tmp_path / "drom_data.jsonl")
+    with JsonlCheckpoint(jsonl_path) as checkpoint:
+        for record in records:
+            checkpoint.append(record)
+
+    json_path = tmp_path / "drom_data.json"
+    assert export_json_array(jsonl_path, str(json_path)) == 2
+    assert json_path.read_text(encoding="utf-8") == json.dumps(records, ensure_ascii=False, indent=4)
+
+
+def test_export_of_missing_checkpoint_is_empty_array(tmp_path):
+    json_path = tmp_path / "drom_data.json"
+    assert export_json_array(str(tmp_path / "missing.jsonl"), str(json_path)) == 0
+    assert json.loads(json_path.read_text(encoding="utf-8")) == []
+
+
+def test_remove_deletes_file(tmp_path):
+    path = tmp_path / "drom_data.jsonl"
+    checkpoint = JsonlCheckpoint(str(path))
+    checkpoint.open()
+    checkpoint.append({"link": "https://auto.drom.ru/1.html"})
+    checkpoint.remove()
+    assert not path.exists()
+
+
+def test_derived_paths():
+    assert checkpoint_path_for("autoru_data.json") == "autoru_data.jsonl"
+    assert dead_letter_path_for("autoru_data.json") == "autoru_data.failed.jsonl"
@@ -0,0 +1,48 @@
+from embedded_state import EmbeddedState, json_ld, labeled, lookup, number_text
+from extraction import Extractor, Field, parse_html
+
+PAGE = """
+<html>
+  <head>
+    <script type="application/ld+json">
+      {"@graph": [{"@type": "BreadcrumbList", "name": "Хлебные крошки"},
+                  {"@type": "Car", "name": "Toyota Camry", "offers": {"price": "1250000.00"}}]}
+    </script>
+    <script>window.__INITIAL_STATE__ = {"specs": [{"label": "Год выпуска", "value": 2019},
+                                                  {"label": "Пробег", "displayValue": "45 000  км"}]};</script>
+    <script type="application/json" id="seller">{"name": "Автосалон"}</script>
+  </head>
+  <body><h1>Camry из DOM</h1><span class="year">2018</span></body>
+</html>
+"""
+
+
+def test_state_is_collected_from_json_ld_window_state_and_json_scripts():
+    state = EmbeddedState.from_tree(parse_html(PAGE))
+    assert [item["@type"] for item in state.json_ld] == ["BreadcrumbList", "Car"]
+    assert set(state.objects) == {"__INITIAL_STATE__", "seller"}
+
+
+def test_getters_read_vehicle_json_ld_and_labeled_specs():
+    state = EmbeddedState.from_tree(parse_html(PAGE))
+    assert json_ld("name")(state) == "Toyota Camry"
+    assert json_ld("offers.price", lambda value: number_text(value, grouped=True))(state) == "1 250 000"
+    assert labeled("Год выпуска")(state) == "2019"
+    assert labeled("Пробег")(state) == "45 000 км"
+    assert labeled("Цвет")(state) is None
+
+
+def test_lookup_walks_dicts_and_lists():
+    data = {"items": [{"name": "a"}, {"name": "b"}]}
+    assert lookup(data, "items.1.name") == "b"
+    assert lookup(data, "items.5.name") is None
+    assert lookup(data, "missing.name") is None
+
+
+def test_embedded_state_takes_precedence_over_dom():
+    extractor = Extractor([
+        Field("title", "//h1", state=json_ld("name")),
+        Field("year", "css:span.year", state=labeled("Год выпуска")),
+        Field("color", "css:span.year", state=labeled("Цвет")),
+    ])
+    assert extractor.extract(PAGE) == {"title": "Toyota Camry", "year": "2019", "color": "2018"}
@@ -0,0 +1,42 @@
+from extraction import Extractor, Field, NOT_SPECIFIED, first_word, node_text, parse_html
+
+PAGE = """
+<html>
+  <head><title>Toyota Camry</title><script>var title = "not a title";</script></head>
+  <body>
+    <h1 class="title">Toyota Camry, 2019</h1>
+    <span class="price">1 999 999&nbsp;₽</span>
+    <div class="description">Первая строка<br>вторая строка<p>Абзац</p>хвост<style>.x{}</style>
+      <span style="display: none">скрыто</span><span aria-hidden="true">тоже скрыто</span> конец</div>
+  </body>
+</html>
+"""
+
+
+def test_node_text_breaks_lines_around_blocks_and_skips_hidden_text():
+    description = parse_html(PAGE).cssselect("div.description")[0]
+    assert node_text(description) == "Первая строка\nвторая строка\nАбзац\nхвост конец"
+
+
+def test_extractor_reads_css_and_xpath_fields():
+    extractor = Extractor([
+        Field("title", "//h1"),
+        Field("price", "css:span.price"),
+        Field("brand", "css:h1.title", post=first_word),
+    ])
+    assert extractor.extract(PAGE) == {
+        "title": "Toyota Camry, 2019",
+        "price": "1 999 999 ₽",
+        "brand": "Toyota",
+    }
+
+
+def test_selectors_are_tried_in_order_and_missing_fields_are_marked():
+    extractor = Extractor([
+        Field("mileage", ["css:span.mileage", "css:span.price"]),
+        Field("color", "css:span.color", post=str.upper),
+    ])
+    record = extractor.extract(PAGE)
+    assert record["mileage"] == "1 999 999 ₽"
+    assert record["color"] == NOT_SPECIFIED
+
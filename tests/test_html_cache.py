@@ -0,0 +1,63 @@
+import os
+import time
+import pytest
+import html_cache
+from html_cache import HtmlCache, canonical_url
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://WWW.avito.ru/moskva/avtomobili/x_123?context=abc&b=2&a=1#photo",
+     "https://www.avito.ru/moskva/avtomobili/x_123?a=1&b=2"),
+    ("https://auto.ru/cars/used/sale/1/?utm_source=yandex&from=search", "https://auto.ru/cars/used/sale/1/"),
+    ("https://auto.drom.ru/moscow/toyota/camry/123.html", "https://auto.drom.ru/moscow/toyota/camry/123.html"),
+])
+def test_canonical_url(url, expected):
+    assert canonical_url(url) == expected
+
+
+def test_put_and_get_by_canonical_url(tmp_path):
+    cache = HtmlCache(str(tmp_path))
+    cache.put("https://www.avito.ru/moskva/x_1?context=abc", "<html>Камри</html>")
+    assert cache.get("https://www.avito.ru/moskva/x_1") == "<html>Камри</html>"
+    assert cache.get("https://www.avito.ru/moskva/x_2") is None
+
+
+def test_stale_entries_are_not_returned_for_fresh_reads(tmp_path, monkeypatch):
+    cache = HtmlCache(str(tmp_path))
+    cache.put("https://auto.ru/1", "<html>1</html>")
+    now = time.time()
+    monkeypatch.setattr(html_cache.time, "time", lambda: now + 120)
+    assert cache.get("https://auto.ru/1", max_age=60) is None
+    assert cache.get("https://auto.ru/1", max_age=None) == "<html>1</html>"
+
+
+def test_identical_pages_share_one_blob(tmp_path):
+    cache = HtmlCache(str(tmp_path))
+    first = cache.put("https://auto.ru/1", "<html>same</html>")
+    second = cache.put("https://auto.ru/2", "<html>same</html>")
+    assert first == second
+    blobs = [name for _, _, names in os.walk(tmp_path / "objects") for name in names]
+    assert len(blobs) == 1
+
+
+def test_evict_removes_expired_entries_and_least_recently_used_pages(tmp_path, monkeypatch):
+    cache = HtmlCache(str(tmp_path), ttl_days=1, max_bytes=10 ** 9)
+    cache.put("https://auto.ru/old", "<html>old</html>")
+    now = time.time()
+    monkeypatch.setattr(html_cache.time, "time", lambda: now + 2 * 24 * 60 * 60)
+    assert cache.evict() == 1
+    assert cache.get("https://auto.ru/old", max_age=None) is None
+
+    cache.max_bytes = 0
+    cache.put("https://auto.ru/new", "<html>new</html>")
+    cache.evict()
+    assert cache.get("https://auto.ru/new", max_age=None) is None
+
+
+def test_put_evicts_periodically_to_stay_within_max_bytes(tmp_path):
+    cache = HtmlCache(str(tmp_path), max_bytes=4000)
+    for i in range(100):
+        cache.put(f"https://auto.ru/{i}", os.urandom(400).hex())
+    size = sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(tmp_path / "objects") for name in names)
+    assert size <= 4000 * (1 + html_cache.EVICT_WRITTEN_FRACTION) + 1000
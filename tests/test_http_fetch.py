@@ -0,0 +1,66 @@
+import pytest
+import html_cache
+import rate_limiter
+from http_fetch import fetch_pages, needs_browser, record_page, serve_recorded_pages
+
+LISTING_PAGE = '<html><body><div class="ListingItem"><a href="/cars/used/sale/1/">Camry</a></div></body></html>'
+
+
+@pytest.fixture
+def stand(tmp_path, monkeypatch):
+    """Локальный стенд с записанными страницами вместо сайта; кэш страниц во временном каталоге."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(html_cache, "_cache", None)
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    directory = str(tmp_path / "recorded")
+    server, base_url = serve_recorded_pages(directory)
+    rate_limiter.get_limiter(base_url).rate = 100
+    yield directory, base_url
+    server.shutdown()
+
+
+@pytest.mark.parametrize("status_code, html, expected", [
+    (200, LISTING_PAGE, False),
+    (403, LISTING_PAGE, True),
+    (200, '<html><head><title>Доступ ограничен</title></head></html>', True),
+    (200, '<body><p>Please enable JavaScript to continue</p></body>', True),
+    (200, '<noscript>Enable JavaScript</noscript>' + LISTING_PAGE, False),
+    (200, "<html><body>skeleton</body></html>", True),
+])
+def test_needs_browser(status_code, html, expected):
+    assert needs_browser(status_code, html, ready_marker="ListingItem") is expected
+
+
+def test_pages_are_fetched_from_recorded_stand(stand):
+    directory, base_url = stand
+    urls = [f"{base_url}/rossiya/cars/used/?page={page}" for page in (1, 2)]
+    for url in urls:
+        record_page(directory, url, LISTING_PAGE.replace("Camry", url))
+
+    received = []
+    pages = fetch_pages(urls, ready_marker="ListingItem", on_page=lambda url, html: received.append(url))
+
+    assert [url for url, _ in pages] == urls
+    assert all(url in html for url, html in pages)
+    assert sorted(received) == sorted(urls)
+
+
+def test_pages_needing_browser_are_missing_without_browser_factory(stand):
+    directory, base_url = stand
+    ready, skeleton, missing = (f"{base_url}/rossiya/cars/used/?page={page}" for page in (1, 2, 3))
+    record_page(directory, ready, LISTING_PAGE)
+    record_page(directory, skeleton, "<html><body>skeleton</body></html>")
+
+    pages = dict(fetch_pages([ready, skeleton, missing], ready_marker="ListingItem"))
+
+    assert pages == {ready: LISTING_PAGE, skeleton: None, missing: None}
+
+
+def test_fetched_pages_are_served_from_cache(stand):
+    directory, base_url = stand
+    url = f"{base_url}/rossiya/cars/used/?page=1"
+    record_page(directory, url, LISTING_PAGE)
+    fetch_pages([url], ready_marker="ListingItem")
+
+    record_page(directory, url, "<html>changed</html>")
+    assert fetch_pages([url], ready_marker="ListingItem", cache_max_age=60) == [(url, LISTING_PAGE)]
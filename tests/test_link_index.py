@@ -0,0 +1,61 @@
+import json
+import multiprocessing
+from datetime import date, timedelta
+from link_index import LinkIndex
+
+
+def test_links_are_stored_canonically_and_keep_latest_date(tmp_path):
+    path = tmp_path / "avito_index.json"
+    path.write_text(json.dumps({
+        "https://www.avito.ru/moskva/x_1?context=abc": "2024-01-01",
+        "https://www.avito.ru/moskva/x_1": "2024-03-01",
+    }), encoding="utf-8")
+    index = LinkIndex(str(path))
+    assert index.entries == {"https://www.avito.ru/moskva/x_1": "2024-03-01"}
+
+
+def test_fresh_links_skips_recent_and_reloads_stale(tmp_path):
+    index = LinkIndex(str(tmp_path / "drom_index.json"))
+    index.touch(["https://auto.drom.ru/1.html"], when=date.today() - timedelta(days=10))
+    index.touch(["https://auto.drom.ru/2.html"], when=date.today() - timedelta(days=2))
+    stored = ["https://auto.drom.ru/1.html", "https://auto.drom.ru/2.html", "https://auto.drom.ru/3.html"]
+    assert index.fresh_links(stored, max_age_days=7) == {"https://auto.drom.ru/2.html", "https://auto.drom.ru/3.html"}
+    # Ссылки из таблицы, которых не было в индексе, добавляются в него сегодняшней датой
+    assert index.entries["https://auto.drom.ru/3.html"] == date.today().isoformat()
+
+
+def test_save_round_trip(tmp_path):
+    path = str(tmp_path / "autoru_index.json")
+    index = LinkIndex(path)
+    index.touch(["https://auto.ru/cars/used/sale/1/?from=search"], when=date(2024, 5, 1))
+    index.save()
+    assert LinkIndex(path).entries == {"https://auto.ru/cars/used/sale/1/": "2024-05-01"}
+
+
+def touch_links(path, worker, count):
+    for i in range(count):
+        with LinkIndex.locked(path) as index:
+            index.touch([f"https://auto.drom.ru/{worker}/{i}.html"])
+
+
+def test_concurrent_processes_keep_each_others_updates(tmp_path):
+    path = str(tmp_path / "drom_index.json")
+    workers = [multiprocessing.Process(target=touch_links, args=(path, worker, 25)) for worker in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+    assert len(LinkIndex(path).entries) == 100
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["drom_index.json", "drom_index.json.lock"]
+
+
+def test_index_is_not_saved_when_block_fails(tmp_path):
+    path = str(tmp_path / "drom_index.json")
+    try:
+        with LinkIndex.locked(path) as index:
+            index.touch(["https://auto.drom.ru/1.html"])
+            raise RuntimeError("загрузка не удалась")
+    except RuntimeError:
+        pass
+    assert LinkIndex(path).entries == {}
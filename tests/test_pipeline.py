@@ -0,0 +1,69 @@
+import threading
+import pytest
+from pipeline import LinkStream, run_pipeline
+
+DEADLOCK_TIMEOUT = 10
+
+
+def run_with_timeout(target):
+    result = {}
+
+    def run():
+        try:
+            result["value"] = target()
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(DEADLOCK_TIMEOUT)
+    assert not thread.is_alive(), "run_pipeline завис"
+    return result
+
+
+def test_stream_drops_duplicates_and_ends_on_close():
+    stream = LinkStream()
+    stream.put_links(["a", "b", "a"])
+    stream.put_links(["c", "b"])
+    stream.close()
+    assert list(stream) == ["a", "b", "c"]
+
+
+def test_parser_receives_links_while_collector_runs():
+    def collect(on_links):
+        for page in range(5):
+            on_links([f"{page}-{i}" for i in range(10)])
+
+    def parse(links):
+        return [link for link in links]
+
+    result = run_with_timeout(lambda: run_pipeline(collect, parse, maxsize=3))
+    assert len(result["value"]) == 50
+
+
+def test_collector_error_is_raised_after_parsing_collected_links():
+    parsed = []
+
+    def collect(on_links):
+        on_links(["a", "b"])
+        raise RuntimeError("выдача недоступна")
+
+    def parse(links):
+        parsed.extend(links)
+
+    result = run_with_timeout(lambda: run_pipeline(collect, parse))
+    assert parsed == ["a", "b"]
+    assert isinstance(result["error"], RuntimeError)
+
+
+def test_parser_failure_with_full_queue_does_not_deadlock():
+    def collect(on_links):
+        on_links([str(i) for i in range(20)])
+
+    def parse(links):
+        next(iter(links))
+        raise ValueError("ошибка парсера")
+
+    result = run_with_timeout(lambda: run_pipeline(collect, parse, maxsize=2))
+    with pytest.raises(ValueError):
+        raise result["error"]
@@ -0,0 +1,77 @@
+import pytest
+import rate_limiter
+from rate_limiter import AdaptiveRateLimiter, BACKOFF_FACTOR, RATE_INCREASE, is_challenge_page
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiters(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    monkeypatch.setattr(rate_limiter, "_rate_share", 1.0)
+
+
+@pytest.mark.parametrize("html, url", [
+    ("<html><head><title>Доступ ограничен: проблема с IP</title></head></html>", None),
+    ("<html><head><title>Ой! Вы не робот?</title></head></html>", None),
+    ('<form method="post" action="/checkcaptcha?key=1"><input name="rep"></form>', None),
+    ('<div class="CheckboxCaptcha CheckboxCaptcha_checked"></div>', None),
+    ("<html></html>", "https://sso.auto.ru/showcaptcha?retpath=https://auto.ru/"),
+])
+def test_challenge_pages_are_detected(html, url):
+    assert is_challenge_page(html, url)
+
+
+@pytest.mark.parametrize("html", [
+    "<html><head><title>Toyota Camry 2019 — купить</title>"
+    "<script>window.captchaConfig = {enabled: false}; var text = 'вы не робот';</script></head></html>",
+    '<div class="listing">Защита от роботов: captcha не требуется</div>',
+])
+def test_ordinary_pages_mentioning_captcha_are_not_challenges(html):
+    assert not is_challenge_page(html, "https://auto.ru/cars/used/sale/toyota/camry/1-abc/")
+
+
+def test_throttled_responses_back_off_and_fast_ones_speed_up():
+    limiter = AdaptiveRateLimiter(rate=2.0)
+    limiter.report(elapsed=0.5, status_code=429)
+    assert limiter.rate == pytest.approx(2.0 * BACKOFF_FACTOR)
+    limiter.report(elapsed=0.5, blocked=True)
+    assert limiter.rate == pytest.approx(2.0 * BACKOFF_FACTOR ** 2)
+    limiter.report(elapsed=0.5, status_code=200)
+    assert limiter.rate == pytest.approx(2.0 * BACKOFF_FACTOR ** 2 + RATE_INCREASE)
+
+
+def test_rate_stays_within_bounds():
+    limiter = AdaptiveRateLimiter(rate=1.0, min_rate=0.5, max_rate=1.05)
+    for _ in range(5):
+        limiter.report(elapsed=limiter.slow_response + 1)
+    assert limiter.rate == 0.5
+    for _ in range(20):
+        limiter.report(elapsed=0.1, status_code=200)
+    assert limiter.rate == 1.05
+
+
+def test_client_errors_do_not_change_rate():
+    limiter = AdaptiveRateLimiter(rate=1.0)
+    limiter.report(elapsed=0.1, status_code=404)
+    assert limiter.rate == 1.0
+
+
+def test_acquire_spaces_requests(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(rate_limiter.time, "sleep", sleeps.append)
+    limiter = AdaptiveRateLimiter(rate=4.0)
+    limiter.acquire()
+    limiter.acquire()
+    assert sleeps and sleeps[0] == pytest.approx(0.25, abs=0.05)
+
+
+def test_limiters_are_shared_per_domain():
+    assert rate_limiter.get_limiter("https://www.drom.ru/a") is rate_limiter.get_limiter("https://drom.ru/b")
+    assert rate_limiter.get_limiter("https://drom.ru/") is not rate_limiter.get_limiter("https://avito.ru/")
+
+
+def test_rate_share_scales_existing_and_new_limiters():
+    existing = rate_limiter.get_limiter("https://drom.ru/")
+    rate_limiter.set_rate_share(0.25)
+    assert existing.rate == pytest.approx(rate_limiter.DEFAULT_RATE * 0.25)
+    assert existing.max_rate == pytest.approx(rate_limiter.MAX_RATE * 0.25)
+    assert rate_limiter.get_limiter("https://avito.ru/").rate == pytest.approx(rate_limiter.DEFAULT_RATE * 0.25)
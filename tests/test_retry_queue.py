@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+import pytest
+from selenium.common.exceptions import TimeoutException, WebDriverException
+import retry_queue
+from driver_pool import ChallengePageError, DriverPool, HttpStatusError
+from retry_queue import RetryPolicy, RetryQueue, classify_error
+
+DEADLOCK_TIMEOUT = 10
+FAST_POLICIES = {kind: RetryPolicy(policy.max_attempts, 0, 0) for kind, policy in retry_queue.RETRY_POLICIES.items()}
+
+
+class FakeDriver:
+    session_id = "fake"
+
+    def quit(self):
+        pass
+
+
+@pytest.mark.parametrize("error, kind", [
+    (ChallengePageError("https://auto.ru/"), "captcha"),
+    (HttpStatusError("https://auto.ru/", 429), "server_error"),
+    (HttpStatusError("https://auto.ru/", 502), "server_error"),
+    (HttpStatusError("https://auto.ru/", 404), "client_error"),
+    (TimeoutException(), "timeout"),
+    (WebDriverException(), "browser"),
+    (KeyError("price"), "parse_error"),
+])
+def test_classify_error(error, kind):
+    assert classify_error(error) == kind
+
+
+def run_pool(tmp_path, driver_factory, parse_page, links, policies=FAST_POLICIES):
+    results = []
+    retries = RetryQueue(str(tmp_path / "drom_data.failed.jsonl"), policies)
+
+    def run():
+        with retries, DriverPool(driver_factory, size=2, max_memory_mb=None) as pool:
+            results.extend(pool.imap(parse_page, retries.links(links), task_wrapper=retries.wrap))
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(DEADLOCK_TIMEOUT)
+    assert not thread.is_alive(), "очередь повторов зависла"
+    return results, retries
+
+
+def dead_letters(tmp_path):
+    path = tmp_path / "drom_data.failed.jsonl"
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()] if path.exists() else []
+
+
+def test_failed_link_is_retried_until_it_succeeds(tmp_path):
+    failures = {"a": 2}
+
+    def parse_page(driver, link):
+        if failures.get(link):
+            failures[link] -= 1
+            raise TimeoutException()
+        return link.upper()
+
+    results, retries = run_pool(tmp_path, FakeDriver, parse_page, ["a", "b"])
+    assert sorted(record for _, record, error in results if not error) == ["A", "B"]
+    assert retries.retried == 2
+    assert dead_letters(tmp_path) == []
+
+
+def test_link_is_dead_lettered_after_last_attempt(tmp_path):
+    def parse_page(driver, link):
+        raise HttpStatusError(link, 404)
+
+    results, retries = run_pool(tmp_path, FakeDriver, parse_page, ["https://auto.drom.ru/1.html"])
+    assert [error.status_code for _, _, error in results] == [404]
+    assert retries.dead == 1
+    assert [(entry["link"], entry["error_type"]) for entry in dead_letters(tmp_path)] == [
+        ("https://auto.drom.ru/1.html", "client_error")]
+
+
+def test_lease_failure_is_retried_and_does_not_deadlock(tmp_path):
+    starts = {"count": 0}
+    lock = threading.Lock()
+
+    def driver_factory():
+        with lock:
+            starts["count"] += 1
+            if starts["count"] <= 2:
+                raise WebDriverException("chrome не запустился")
+        return FakeDriver()
+
+    results, retries = run_pool(tmp_path, driver_factory, lambda driver, link: link.upper(), ["a", "b"])
+    assert sorted(record for _, record, error in results if not error) == ["A", "B"]
+    assert retries.retried == 2
+
+
+def test_lease_failure_is_dead_lettered_when_attempts_run_out(tmp_path):
+    def driver_factory():
+        raise WebDriverException("chrome не запустился")
+
+    results, retries = run_pool(tmp_path, driver_factory, lambda driver, link: link, ["a"])
+    assert all(error for _, _, error in results)
+    assert [entry["error_type"] for entry in dead_letters(tmp_path)] == ["browser"]
+
+
+def test_finished_pages_are_yielded_while_waiting_for_a_retry(tmp_path):
+    policies = dict(FAST_POLICIES, timeout=RetryPolicy(2, 4, 4))
+    attempts = {"fail": 0}
+
+    def parse_page(driver, link):
+        if link == "fail":
+            attempts["fail"] += 1
+            if attempts["fail"] == 1:
+                raise TimeoutException()
+        else:
+            time.sleep(0.2)
+        return link
+
+    yielded = {}
+    retries = RetryQueue(str(tmp_path / "drom_data.failed.jsonl"), policies)
+
+    def run():
+        start = time.monotonic()
+        with retries, DriverPool(FakeDriver, size=2, max_memory_mb=None) as pool:
+            for link, record, error in pool.imap(parse_page, retries.links(["fail", "slow"]),
+                                                 task_wrapper=retries.wrap):
+                if not error:
+                    yielded[record] = time.monotonic() - start
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(DEADLOCK_TIMEOUT)
+    assert not thread.is_alive(), "очередь повторов зависла"
+    assert set(yielded) == {"fail", "slow"}
+    # Повтор наступает не раньше чем через 2 с, а готовая страница отдается, не дожидаясь его
+    assert yielded["slow"] < 1.8 < yielded["fail"]
@@ -0,0 +1,62 @@
+import json
+import random
+import pytest
+from checkpoint import JsonlCheckpoint
+from html_cache import canonical_url
+pytest.importorskip("prefect_dask")
+from sharding import merge_shard_outputs, shard_data_path, shard_links, shard_pool_size
+
+
+def test_shards_split_links_without_overlap():
+    links = [f"https://auto.drom.ru/{i}.html" for i in range(100)]
+    shards = [shard_links(links, shard, 3) for shard in range(3)]
+    assert sorted(link for part in shards for link in part) == sorted(links)
+    assert all(shards)
+
+
+def test_shard_assignment_does_not_depend_on_link_order():
+    links = [f"https://www.avito.ru/moskva/avtomobili/x_{i}" for i in range(100)]
+    shuffled = links[:]
+    random.Random(1).shuffle(shuffled)
+    # Параметр context меняется от сеанса к сеансу и не должен менять шард ссылки
+    with_context = [f"{link}?context=session{i}" for i, link in enumerate(shuffled)]
+    for shard in range(4):
+        expected = set(shard_links(links, shard, 4))
+        assert set(shard_links(shuffled, shard, 4)) == expected
+        assert {canonical_url(link) for link in shard_links(with_context, shard, 4)} == expected
+
+
+def test_shard_data_path():
+    assert shard_data_path("autoru_data.json", 2) == "autoru_data.shard2.json"
+
+
+def test_shard_pool_size_splits_browsers_between_shards():
+    assert shard_pool_size(4, 2) == 2
+    assert shard_pool_size(4, 3) == 1
+    assert shard_pool_size(4, 8) == 1
+
+
+def test_merge_shard_outputs_joins_parts_and_removes_them(tmp_path):
+    data_path = str(tmp_path / "drom_data.json")
+    paths = []
+    for shard, records in enumerate([[{"link": "a"}, {"link": "b"}], [{"link": "c"}]]):
+        path = shard_data_path(data_path, shard)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(records, f)
+        paths.append(path)
+    missing = shard_data_path(data_path, 2)
+
+    assert merge_shard_outputs(paths + [missing], data_path) == 3
+    with open(data_path, encoding="utf-8") as f:
+        assert [record["link"] for record in json.load(f)] == ["a", "b", "c"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["drom_data.json"]
+
+
+def test_merge_shard_outputs_overwrites_leftover_merge_file(tmp_path):
+    data_path = str(tmp_path / "drom_data.json")
+    with JsonlCheckpoint(str(tmp_path / "drom_data.merge.jsonl")) as leftover:
+        leftover.append({"link": "stale"})
+    path = shard_data_path(data_path, 0)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([{"link": "a"}], f)
+    assert merge_shard_outputs([path], data_path) == 1
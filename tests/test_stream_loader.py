@@ -0,0 +1,81 @@
+import threading
+import time
+import pytest
+from checkpoint import iter_jsonl
+from stream_loader import MicroBatchLoader
+
+
+def transform_frame(df):
+    df = df.copy()
+    df["price"] = df["price"].astype(int)
+    return df
+
+
+class Sink:
+    def __init__(self):
+        self.batches = []
+        self.loaded = threading.Event()
+
+    def __call__(self, df):
+        self.batches.append(df["link"].tolist())
+        self.loaded.set()
+
+
+def test_full_batches_are_loaded_and_rest_on_exit():
+    sink = Sink()
+    with MicroBatchLoader(transform_frame, sink, batch_size=2, flush_seconds=60) as loader:
+        for i in range(5):
+            loader.add({"link": f"https://auto.drom.ru/{i}.html", "price": str(i)})
+        assert sink.batches == [["https://auto.drom.ru/0.html", "https://auto.drom.ru/1.html"],
+                                ["https://auto.drom.ru/2.html", "https://auto.drom.ru/3.html"]]
+    assert sink.batches[-1] == ["https://auto.drom.ru/4.html"]
+    assert loader.loaded == 5
+
+
+def test_partial_batch_is_flushed_on_timer_while_parser_is_idle():
+    sink = Sink()
+    with MicroBatchLoader(transform_frame, sink, batch_size=100, flush_seconds=0.2) as loader:
+        loader.add({"link": "https://auto.drom.ru/1.html", "price": "100"})
+        assert sink.loaded.wait(5), "неполная пачка не загружена по таймеру"
+        assert sink.batches == [["https://auto.drom.ru/1.html"]]
+
+
+def test_untransformable_records_are_saved_to_rejected_file(tmp_path):
+    sink = Sink()
+    rejected_path = tmp_path / "drom_data.rejected.jsonl"
+    bad = {"link": "https://auto.drom.ru/2.html", "price": "договорная"}
+    with MicroBatchLoader(transform_frame, sink, batch_size=3, rejected_path=str(rejected_path)) as loader:
+        loader.add({"link": "https://auto.drom.ru/1.html", "price": "100"})
+        loader.add(bad)
+        loader.add({"link": "https://auto.drom.ru/3.html", "price": "300"})
+    assert sink.batches == [["https://auto.drom.ru/1.html", "https://auto.drom.ru/3.html"]]
+    assert loader.rejected == 1
+    rejected = list(iter_jsonl(str(rejected_path)))
+    assert [entry["record"] for entry in rejected] == [bad]
+    assert rejected[0]["link"] == bad["link"] and "ValueError" in rejected[0]["error"]
+
+
+def test_transform_error_is_raised_without_rejected_file():
+    sink = Sink()
+    with pytest.raises(ValueError):
+        with MicroBatchLoader(transform_frame, sink, batch_size=1) as loader:
+            loader.add({"link": "https://auto.drom.ru/2.html", "price": "договорная"})
+    assert sink.batches == []
+
+
+def test_timer_load_error_is_raised_to_parser():
+    def failing_load(df):
+        raise RuntimeError("база недоступна")
+
+    with pytest.raises(RuntimeError):
+        with MicroBatchLoader(transform_frame, failing_load, batch_size=100, flush_seconds=0.1) as loader:
+            loader.add({"link": "https://auto.drom.ru/1.html", "price": "100"})
+            time.sleep(1.5)
+            loader.add({"link": "https://auto.drom.ru/2.html", "price": "200"})
+
+
+def test_empty_loader_loads_nothing():
+    sink = Sink()
+    with MicroBatchLoader(transform_frame, sink):
+        pass
+    assert sink.batches == []
@@ -0,0 +1,64 @@
+import os
+import pandas as pd
+import pytest
+from autoru.autoru_transform import transform_autoru_frame
+from avito.avito_transform import transform_avito_frame
+from drom.drom_transform import transform_drom_frame
+from youla.youla_transform import transform_youla_frame
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SITES = [
+    ("autoru", transform_autoru_frame),
+    ("avito", transform_avito_frame),
+    ("drom", transform_drom_frame),
+    ("youla", transform_youla_frame),
+]
+
+
+def read_records(site):
+    return pd.read_json(os.path.join(ROOT, site, f"{site}_data.json")).to_dict("records")
+
+
+def transform(transform_frame, records):
+    return transform_frame(pd.DataFrame.from_records(records)).reset_index(drop=True)
+
+
+def normalized(df):
+    # Пустые значения пачки из одной строки имеют тип object (None), а у всего файла — float (NaN)
+    return df.astype(object).where(df.notna(), None)
+
+
+@pytest.mark.parametrize("site, transform_frame", SITES)
+def test_single_record_batches_match_full_file_transform(site, transform_frame):
+    records = read_records(site)
+    full = transform(transform_frame, records)
+    rows = [transform(transform_frame, [record]) for record in records]
+    single = pd.concat([row for row in rows if not row.empty], ignore_index=True)
+    pd.testing.assert_frame_equal(normalized(single), normalized(full))
+
+
+@pytest.mark.parametrize("site, transform_frame", SITES)
+def test_batch_of_dropped_records_gives_empty_frame(site, transform_frame):
+    records = read_records(site)
+    kept = set(transform(transform_frame, records)["link"])
+    dropped = [record for record in records if record["link"] not in kept]
+    assert dropped, f"в {site}_data.json нет отбрасываемых записей"
+    assert transform(transform_frame, dropped).empty
+
+
+def test_column_of_unknown_values_becomes_none():
+    records = read_records("drom")[:5]
+    for record in records:
+        record["drive_type"] = "Не указано"
+        record["location"] = "Не указано"
+    result = transform(transform_drom_frame, records)
+    assert len(result) == 5
+    assert result["drive_type"].isna().all()
+    assert result["location"].isna().all()
+
+
+def test_batch_without_titles_gives_empty_frame():
+    records = read_records("youla")[:3]
+    for record in records:
+        record["title"] = "Не указано"
+    assert transform(transform_youla_frame, records).empty
@@ -1,17 +1,123 @@
-import json
-import time
-from selenium import webdriver
+import re
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from extraction import Field, NOT_SPECIFIED
+from embedded_state import json_ld, labeled, number_text
+from site_parser import SiteParser, SiteSpec
+from html_cache import get_cache, DEFAULT_CACHE_DIR
+from driver_pool import load_page, DEFAULT_POOL_SIZE, DEFAULT_MAX_PAGES
+
+CHROME_ARGUMENTS = [
+    "--headless",
+    "--disable-gpu",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+]
+
+DETAIL_LINK_PATTERN = re.compile(r"youla\.ru/[^/]+/auto/.+")
+
+
+YOULA = SiteParser(SiteSpec(
+    name="youla",
+    chrome_arguments=CHROME_ARGUMENTS,
+    detail_link_pattern=DETAIL_LINK_PATTERN,
+    fields=[
+        Field("title", "css:h1"),
+        Field("price", "css:span.sc-fxhZON.fzJDlO", state=json_ld("offers.price", lambda value: number_text(value, grouped=True))),
+        Field("year", "//dt[contains(text(), 'Год выпуска')]/following-sibling::dd", state=labeled("Год выпуска")),
+        Field("power", "//dt[contains(text(), 'Мощность')]/following-sibling::dd", state=labeled("Мощность")),
+        Field("fuel", "//dt[contains(text(), 'Тип двигателя')]/following-sibling::dd", state=labeled("Тип двигателя")),
+        Field("engine_volume", "//dt[contains(text(), 'Объем двигателя')]/following-sibling::dd",
+              state=labeled("Объем двигателя")),
+        Field("transmission", "//dt[contains(text(), 'Коробка передач')]/following-sibling::dd",
+              state=labeled("Коробка передач")),
+        Field("mileage", "//dt[contains(text(), 'Пробег')]/following-sibling::dd", state=labeled("Пробег")),
+        Field("body_type", "//dt[contains(text(), 'Кузов')]/following-sibling::dd", state=labeled("Кузов")),
+        Field("drive_type", "//dt[contains(text(), 'Привод')]/following-sibling::dd", state=labeled("Привод")),
+        Field("description", "//dt[contains(text(), 'Описание')]/following-sibling::dd",
+              state=[labeled("Описание"), json_ld("description")]),
+        Field("location", "//dt[contains(text(), 'Местоположение')]/following-sibling::dd",
+              state=labeled("Местоположение")),
+        Field("publication_date", "//dt[contains(text(), 'Размещено')]/following-sibling::dd",
+              state=labeled("Размещено")),
+    ],
+))
+
+
+def extract_youla_record(html, link):
+    """Извлекает запись объявления youla.ru из HTML-снимка страницы.
+
+    Характеристики берутся из состояния приложения, встроенного в страницу,
+    по тем же подписям, что и в блоке "Все параметры", а цена из JSON-LD;
+    если состояния нет, поля извлекаются из DOM.
 
+    Args:
+        html (str): Исходный код страницы объявления.
+        link (str): Ссылка на объявление.
+
+    Returns:
+        dict: Запись с полями объявления в формате youla_data.json.
+    """
+    return YOULA.extract_record(html, link)
+
+
+def expand_parameters(driver):
+    """Раскрывает блок "Все параметры" и возвращает обновленный исходный код страницы.
+
+    Returns:
+        str | None: HTML страницы или None, если кнопки нет или блок не раскрылся.
+    """
+    try:
+        show_more_button = driver.find_element(By.XPATH, "//button[contains(text(), 'Все параметры')]")
+        show_more_button.click()
+        WebDriverWait(driver, 2).until(
+            EC.presence_of_element_located((By.XPATH, "//dt[contains(text(), 'Размещено')]")))
+    except WebDriverException:
+        return None
+    return driver.page_source
+
+
+def parse_youla_page(driver, link):
+    """Загружает страницу объявления youla.ru и извлекает из нее запись.
+
+    Исходный код страницы забирается из браузера один раз, все поля
+    извлекаются локально (см. extract_youla_record). Кнопка "Все параметры"
+    нажимается, только если характеристик нет ни во встроенном состоянии,
+    ни в DOM.
+
+    Args:
+        driver (selenium.webdriver.Remote): Драйвер, выданный пулом.
+        link (str): Ссылка на объявление.
 
-def parse_youla_data():
+    Returns:
+        dict: Запись с полями объявления в формате youla_data.json.
+    """
+    print(f"Обработка: {link}")
+    cache = get_cache()
+    html = cache.get(link)
+    if html is not None:
+        return extract_youla_record(html, link)
+
+    html = load_page(driver, link, use_cache=False)
+    record = extract_youla_record(html, link)
+    if record["publication_date"] == NOT_SPECIFIED:
+        expanded_html = expand_parameters(driver)
+        if expanded_html is not None:
+            html = expanded_html
+            record = extract_youla_record(html, link)
+
+    cache.put(link, html)
+    return record
+
+
+def parse_youla_data(pool_size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES, skip_links=None,
+                     links=None, on_record=None, data_path="youla_data.json"):
     """Парсит детальную информацию об автомобилях с сайта по сохраненным ссылкам.
 
-    Функция загружает список ссылок из файла json, последовательно посещает
-    каждую страницу с объявлением и извлекает следующие данные:
+    Функция загружает список ссылок из файла json, параллельно посещает
+    страницы с объявлениями через пул браузеров и извлекает следующие данные:
     - Название автомобиля
     - Цену
     - Описание
@@ -25,7 +131,17 @@ def parse_youla_data():
     - Ссылку на объявление
 
     Args:
-        Нет аргументов.
+        pool_size (int): Число одновременно работающих браузеров.
+        max_pages (int): Число страниц, после которого браузер перезапускается.
+        skip_links (set[str], optional): Ссылки, которые не нужно загружать повторно
+            (инкрементальный режим).
+        links (iterable[str], optional): Ссылки для обработки вместо youla_links.json,
+            например поток ссылок от работающего сборщика (см. pipeline.LinkStream).
+        on_record (callable, optional): Функция, получающая каждую новую запись сразу
+            после извлечения (см. stream_loader).
+        data_path (str): Итоговый файл; контрольная точка ведется рядом в файле .jsonl.
+            Отдельные пути позволяют нескольким процессам парсить свои части
+            списка ссылок (см. sharding).
 
     Returns:
         None: Функция не возвращает значений, но сохраняет результаты в файл.
@@ -37,9 +153,17 @@ def parse_youla_data():
         Exception: Другие возможные исключения при парсинге.
 
     Notes:
-        - Использует headless-режим браузера Chrome.
-        - Добавляет задержки между запросами для имитации человеческого поведения.
+        - Использует пул headless-браузеров Chrome (см. driver_pool.DriverPool)
+          с облегченным профилем загрузки (см. driver_profile).
+        - Частота запросов регулируется адаптивным ограничителем домена (см. rate_limiter).
+        - Забирает исходный код страницы один раз и извлекает поля локально (см. extraction).
+        - Поля сначала читаются из встроенного в страницу JSON-состояния
+          (см. embedded_state), DOM используется как запасной путь.
+        - Страницы сохраняются в кэш (см. html_cache); если свежая копия уже есть,
+          поля извлекаются из нее без обращения к сети.
         - Обрабатывает случаи отсутствия данных, заменяя их на "Не указано".
+        - Каждая запись сразу дописывается в контрольную точку youla_data.jsonl;
+          при повторном запуске уже обработанные ссылки пропускаются.
         - Сохраняет данные в формате JSON с сохранением кириллических символов.
 
     Examples:
@@ -47,81 +171,31 @@ def parse_youla_data():
         Обработка: https://auto.ru/cars/used/sale/.../
         Данные сохранены в json
     """
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-
-    service = Service("C:/chromedriver-win64/chromedriver.exe")
-
-    with open("youla_links.json", "r", encoding="utf-8") as f:
-        links = json.load(f)
-
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    cars_data = []
-
-    def get_text_by_xpath(xpath):
-        try:
-            return driver.find_element(By.XPATH, xpath).text.strip()
-        except:
-            return "Не указано"
-
-    def get_text_by_css(selector):
-        try:
-            return driver.find_element(By.CSS_SELECTOR, selector).text.strip()
-        except:
-            return "Не указано"
-
-    for link in links:
-        driver.get(link)
-        print(f"Обработка: {link}")
-        try:
-            wait = WebDriverWait(driver, 5)
-
-            try:
-                show_more_button = driver.find_element(By.XPATH, "//button[contains(text(), 'Все параметры')]")
-                show_more_button.click()
-                time.sleep(1)
-            except:
-                pass
-
-            def get_publication_date():
-                try:
-                    publication_date_label = driver.find_element(By.XPATH, "//dt[contains(text(), 'Размещено')]")
-                    publication_date = publication_date_label.find_element(By.XPATH,
-                                                                           "following-sibling::dd").text.strip()
-                    return publication_date
-                except:
-                    return "Не указано"
-
-            car_data = {
-                "title": get_text_by_css('h1'),
-                "price": get_text_by_css('span.sc-fxhZON.fzJDlO'),
-                "year": get_text_by_xpath("//dt[contains(text(), 'Год выпуска')]/following-sibling::dd"),
-                "power": get_text_by_xpath("//dt[contains(text(), 'Мощность')]/following-sibling::dd"),
-                "fuel": get_text_by_xpath("//dt[contains(text(), 'Тип двигателя')]/following-sibling::dd"),
-                "engine_volume": get_text_by_xpath("//dt[contains(text(), 'Объем двигателя')]/following-sibling::dd"),
-                "transmission": get_text_by_xpath("//dt[contains(text(), 'Коробка передач')]/following-sibling::dd"),
-                "mileage": get_text_by_xpath("//dt[contains(text(), 'Пробег')]/following-sibling::dd"),
-                "body_type": get_text_by_xpath("//dt[contains(text(), 'Кузов')]/following-sibling::dd"),
-                "drive_type": get_text_by_xpath("//dt[contains(text(), 'Привод')]/following-sibling::dd"),
-                "description": get_text_by_xpath("//dt[contains(text(), 'Описание')]/following-sibling::dd"),
-                "location": get_text_by_xpath("//dt[contains(text(), 'Местоположение')]/following-sibling::dd"),
-                "publication_date": get_publication_date(),
-                "link": link
-            }
-
-            cars_data.append(car_data)
-
-        except Exception as e:
-            print(f"Ошибка при обработке {link}: {e}")
-            continue
-
-    with open("youla_data.json", "w", encoding="utf-8") as f:
-        json.dump(cars_data, f, ensure_ascii=False, indent=4)
-    print("Данные сохранены в youla_data.json")
-
-    driver.quit()
-
-parse_youla_data()
\ No newline at end of file
+    YOULA.parse_data(parse_youla_page, pool_size=pool_size, max_pages=max_pages, skip_links=skip_links,
+                     links=links, on_record=on_record, data_path=data_path)
+
+
+def replay_youla_data(source=DEFAULT_CACHE_DIR, workers=None):
+    """Повторно извлекает данные из архивных страниц объявлений без обращения к сети.
+
+    Применяет extract_youla_record ко всем сохраненным страницам объявлений
+    youla из кэша страниц или каталога архивных HTML-файлов параллельно на
+    всех ядрах процессора и сохраняет результат в тех же файлах, что и
+    parse_youla_data.
+
+    Args:
+        source (str): Каталог кэша страниц (см. html_cache) или архива HTML-файлов.
+        workers (int, optional): Число процессов; по умолчанию число CPU.
+
+    Returns:
+        int: Количество извлеченных записей.
+
+    Examples:
+        >>> replay_youla_data("html_cache")
+        Повторно извлечено 300 записей, данные сохранены в youla_data.json
+    """
+    return YOULA.replay(extract_youla_record, source, workers)
+
+
+if __name__ == "__main__":
+    parse_youla_data()
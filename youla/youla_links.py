@@ -1,18 +1,66 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
+import re
 import time
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
 import json
+from functools import partial
+from urllib.parse import urlsplit
+from driver_pool import budgeted_driver, create_chrome_driver
+from network_capture import iter_json_responses, find_strings, links_from_text
+from html_cache import canonical_url
+from rate_limiter import get_limiter, is_challenge_page
 
-def collect_youla_links():
+BASE_URL = "https://youla.ru/moskva/auto/s-probegom"
+
+CHROME_ARGUMENTS = [
+    "--headless",
+    "--disable-geolocation",
+    "--disable-blink-features=AutomationControlled",
+]
+
+# Ответы ленты выдачи, которые страница запрашивает при прокрутке
+FEED_URL_PATTERN = re.compile(r"api-gw\.youla\.io|youla\.ru/(web-)?api/")
+LISTING_LINK_TEMPLATE = r"(?:https://youla\.ru)?/{city}/auto/[\w-]+/[\w-]+-[0-9a-f]{{24}}(?:\?[\w=&%.-]*)?"
+
+MAX_EMPTY_STEPS = 3
+
+
+def absolute_link(link):
+    """Дополняет относительный адрес объявления доменом youla.ru."""
+    return link if link.startswith("http") else "https://youla.ru" + link
+
+
+def listing_link_pattern(base_url=BASE_URL):
+    """Возвращает шаблон ссылок на объявления города, к которому относится выдача base_url.
+
+    Шаблон захватывает и параметры запроса (например, ?source_view=catalog),
+    чтобы ссылка не обрезалась посередине; дубликаты отсекаются по
+    каноническому адресу (см. html_cache.canonical_url).
+
+    Examples:
+        >>> pattern = listing_link_pattern("https://youla.ru/sankt-peterburg/auto/s-probegom")
+        >>> pattern.findall('href="/sankt-peterburg/auto/toyota/camry-0123456789abcdef01234567?source_view=catalog"')
+        ['/sankt-peterburg/auto/toyota/camry-0123456789abcdef01234567?source_view=catalog']
+    """
+    city = urlsplit(base_url).path.strip("/").split("/")[0]
+    return re.compile(LISTING_LINK_TEMPLATE.format(city=re.escape(city)))
+
+
+def collect_youla_links(base_url=BASE_URL, num_links=300, on_links=None):
     """Собирает ссылки на объявления о продаже автомобилей с сайта.
 
-    Функция использует Selenium WebDriver для парсинга страниц с объявлениями.
-    Проходит по указанному количеству страниц, собирает все уникальные ссылки
-    на объявления и сохраняет их в JSON-файл.
+    Функция открывает выдачу в Selenium WebDriver и прокручивает ее, но
+    ссылки берет не из DOM, а из JSON-ответов ленты, которые страница
+    запрашивает при прокрутке: они читаются из журнала производительности
+    Chrome (см. network_capture). Каждый ответ разбирается один раз, поэтому
+    время сбора растет линейно с числом ссылок. Ссылки первой порции берутся
+    из исходного кода страницы. Собранные ссылки сохраняются в JSON-файл.
 
     Args:
-        Нет аргументов.
+        base_url (str): Адрес выдачи.
+        num_links (int): Количество ссылок, которое нужно собрать.
+        on_links (callable, optional): Функция on_links(links), которой передаются
+            новые ссылки сразу после разбора каждого ответа ленты (см. pipeline).
 
     Returns:
         None: Функция не возвращает значений, но сохраняет результаты в файл.
@@ -22,52 +70,68 @@ def collect_youla_links():
         IOError: При проблемах с сохранением файла.
 
     Notes:
-        - Использует headless-режим браузера для фоновой работы.
-        - Добавляет пользовательский user-agent для обхода защиты.
+        - Использует headless-режим браузера с облегченным профилем (см. driver_profile).
+        - Браузер занимает слот общего лимита браузеров (см. driver_pool.budgeted_driver).
         - Сохраняет только уникальные ссылки (дубликаты игнорируются).
-        - Включает задержки для имитации человеческого поведения.
+        - Вместо фиксированных пауз ждет новых ответов ленты; частота
+          прокрутки регулируется адаптивным ограничителем домена (см. rate_limiter).
+        - Сбор завершается, если MAX_EMPTY_STEPS прокруток подряд не принесли новых ссылок.
 
     Examples:
-        Обработка страницы 1...
-        Страница 1: Найдено объявлений: 25
-        Обработка страницы 2...
-        Страница 2: Найдено объявлений: 25
-        Ссылки сохранены в autoru_links.json
+        >>> collect_youla_links(num_links=1000)
+        Ответ ленты: новых ссылок 30, всего 60
+        Ответ ленты: новых ссылок 30, всего 90
+        Собрано 1000 ссылок.
     """
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--disable-geolocation")
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-    chrome_options.add_argument("--headless")
-
-    driver = webdriver.Chrome()
-
-    driver.get("https://youla.ru/moskva/auto/s-probegom")
-
-    scroll_pause_time = 1
-    screen_height = driver.execute_script("return window.screen.height;")
-    i = 1
-
-    links = set()
-
-    while len(links) < 300:
-        driver.execute_script(f"window.scrollTo(0, {screen_height * i});")
-        i += 1
-        time.sleep(scroll_pause_time)
-        time.sleep(1)
-
-        elements = driver.find_elements(By.CSS_SELECTOR, "a[href*='/moskva/auto/']")
-        for elem in elements:
-            href = elem.get_attribute("href")
-            if href:
-                links.add(href)
-            if len(links) >= 300:
-                break
+    with budgeted_driver(partial(create_chrome_driver, CHROME_ARGUMENTS, capture_network=True)) as driver:
+        limiter = get_limiter(base_url)
+        limiter.acquire()
+        driver.get(base_url)
+
+        link_pattern = listing_link_pattern(base_url)
+        links = {}
+
+        def add_links(found):
+            new_links = []
+            for link in map(absolute_link, found):
+                key = canonical_url(link)
+                if key not in links and len(links) < num_links:
+                    links[key] = None
+                    new_links.append(key)
+            if on_links and new_links:
+                on_links(new_links)
+            return len(new_links)
+
+        add_links(links_from_text(driver.page_source, link_pattern))
+
+        screen_height = driver.execute_script("return window.screen.height;")
+        i = 1
+        empty_steps = 0
+
+        while len(links) < num_links and empty_steps < MAX_EMPTY_STEPS:
+            limiter.acquire()
+            driver.execute_script(f"window.scrollTo(0, {screen_height * i});")
+            i += 1
+            started = time.monotonic()
+            responses = []
+            try:
+                WebDriverWait(driver, 5, poll_frequency=0.2).until(
+                    lambda d: responses.extend(iter_json_responses(d, FEED_URL_PATTERN)) or responses)
+                limiter.report(time.monotonic() - started)
+            except TimeoutException:
+                # В конце ленты новых ответов нет, и это не признак блокировки:
+                # ограничителю сообщается только о капче, иначе скорость не меняется
+                if is_challenge_page(driver.page_source, driver.current_url):
+                    limiter.report(time.monotonic() - started, blocked=True)
+
+            new_links = sum(add_links(find_strings(data, link_pattern)) for url, data in responses)
+            empty_steps = 0 if new_links else empty_steps + 1
+            print(f"Ответ ленты: новых ссылок {new_links}, всего {len(links)}")
 
     with open("youla_links.json", "w") as f:
         json.dump(list(links), f, ensure_ascii=False, indent=4)
     print(f"Собрано {len(links)} ссылок.")
 
-    driver.quit()
 
-collect_youla_links()
\ No newline at end of file
+if __name__ == "__main__":
+    collect_youla_links()
\ No newline at end of file
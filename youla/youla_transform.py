@@ -48,6 +48,45 @@ def extract_publication(publication_date):
         return None
     return datetime.now().strftime('%d-%m-%Y')
 
+def transform_youla_frame(youla_df):
+    """Преобразует и очищает сырые записи объявлений youla.
+
+    Выполняет те же преобразования, что и transform_youla_data, но над
+    переданным DataFrame, поэтому подходит и для всего файла, и для
+    небольших пачек записей, получаемых во время парсинга (см. stream_loader).
+
+    Args:
+        youla_df (pandas.DataFrame): Записи в формате youla_data.json.
+
+    Returns:
+        pandas.DataFrame: Очищенный DataFrame (см. transform_youla_data).
+    """
+    youla_df['title'] = youla_df['title'].replace('Не указано', None)
+    youla_df.dropna(subset=['title'], inplace=True)
+    youla_df[['brand', 'model', 'year']] = pd.DataFrame(youla_df['title'].apply(extract_car_info).tolist(),
+                                                        index=youla_df.index, columns=['brand', 'model', 'year'])
+    youla_df['price'] = youla_df['price'].apply(extract_price).astype(int)
+    youla_df['engine_type'] = youla_df['fuel'].apply(extract_engine_type)
+    youla_df['engine_volume'] = youla_df['engine_volume'].apply(extract_engine_volume)
+    youla_df['transmission'] = youla_df['transmission'].apply(extract_transmission)
+    youla_df['mileage'] = youla_df['mileage'].replace('Не указано', None)
+    youla_df.dropna(subset=['mileage'], inplace=True)
+    youla_df['mileage'] = youla_df['mileage'].apply(lambda x: x[:-2]).astype(int)
+    youla_df['location'] = youla_df['location'].apply(lambda x: 'москва')
+    youla_df['publication_date'] = youla_df['publication_date'].apply(extract_publication)
+    youla_df['publication_date'] = pd.to_datetime(youla_df['publication_date'], format='%d-%m-%Y', errors='coerce')
+    youla_df = youla_df.drop(columns=['title', 'power', 'fuel'])
+    youla_df.columns = youla_df.columns.str.lower()
+    for col in youla_df.columns:
+        if col != 'link':
+            youla_df[col] = youla_df[col].apply(lambda x: x.lower() if isinstance(x, str) else x)
+
+    #print(youla_df[['engine_volume', 'transmission', 'mileage', 'body_type', 'drive_type']])
+    # print(youla_df[['location', 'publication_date']])
+
+    # print(youla_df.dtypes)
+    return youla_df
+
 def transform_youla_data():
     """Преобразует и очищает данные об автомобилях из файла json.
 
@@ -93,32 +132,8 @@ def transform_youla_data():
                'publication_date', 'description', 'link'],
               dtype='object')
     """
-    youla_df = pd.read_json('youla_data.json')
-
-    youla_df['title'] = youla_df['title'].replace('Не указано', None)
-    youla_df.dropna(subset=['title'], inplace=True)
-    youla_df[['brand', 'model', 'year']] = youla_df['title'].apply(extract_car_info).apply(pd.Series)
-    youla_df['price'] = youla_df['price'].apply(extract_price).apply(pd.Series).astype(int)
-    youla_df['engine_type'] = youla_df['fuel'].apply(extract_engine_type).apply(pd.Series)
-    youla_df['engine_volume'] = youla_df['engine_volume'].apply(extract_engine_volume)
-    youla_df['transmission'] = youla_df['transmission'].apply(extract_transmission).apply(pd.Series)
-    youla_df['mileage'] = youla_df['mileage'].replace('Не указано', None)
-    youla_df.dropna(subset=['mileage'], inplace=True)
-    youla_df['mileage'] = youla_df['mileage'].apply(lambda x: x[:-2]).apply(pd.Series).astype(int)
-    youla_df['location'] = youla_df['location'].apply(lambda x: 'москва').apply(pd.Series)
-    youla_df['publication_date'] = youla_df['publication_date'].apply(extract_publication).apply(pd.Series)
-    youla_df['publication_date'] = pd.to_datetime(youla_df['publication_date'], format='%d-%m-%Y', errors='coerce')
-    youla_df = youla_df.drop(columns=['title', 'power', 'fuel'])
-    youla_df.columns = youla_df.columns.str.lower()
-    for col in youla_df.columns:
-        if col != 'link':
-            youla_df[col] = youla_df[col].apply(lambda x: x.lower() if isinstance(x, str) else x)
-
+    youla_df = transform_youla_frame(pd.read_json('youla_data.json'))
     print(youla_df[['brand', 'model', 'year', 'price', 'engine_type']])
-    #print(youla_df[['engine_volume', 'transmission', 'mileage', 'body_type', 'drive_type']])
-    # print(youla_df[['location', 'publication_date']])
-
-    # print(youla_df.dtypes)
     return youla_df
 
 if __name__ == '__main__':